@@ -0,0 +1,224 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Iterable, Optional
+
+from dotenv import load_dotenv
+
+from log import get_logger
+import deadline
+
+load_dotenv()
+
+logger = get_logger("admission")
+
+# Priority classes, highest first
+INTERACTIVE, BATCH = "interactive", "batch"
+PRIORITIES = (INTERACTIVE, BATCH)
+
+# Work admitted at once per worker, in cost units (one news topic = 1 unit)
+ADMISSION_CAPACITY = float(os.getenv("ADMISSION_CAPACITY", "12"))
+# Share of the capacity batch work may hold, so interactive briefs always find room
+ADMISSION_BATCH_SHARE = float(os.getenv("ADMISSION_BATCH_SHARE", "0.5"))
+# Longest expected queueing delay accepted per class before shedding with 503
+ADMISSION_MAX_QUEUE_SECONDS = {
+    INTERACTIVE: float(os.getenv("ADMISSION_MAX_QUEUE_SECONDS", "15")),
+    BATCH: float(os.getenv("ADMISSION_BATCH_MAX_QUEUE_SECONDS", "120")),
+}
+# Initial guess of wall-clock seconds per cost unit; refined from finished work
+ADMISSION_SECONDS_PER_UNIT = float(os.getenv("ADMISSION_SECONDS_PER_UNIT", "8"))
+
+# Relative cost of scraping one topic from each source. Social sources start
+# an npx MCP server and an agent run per call, so they weigh more than news.
+SOURCE_COSTS = {"news": 1.0, "reddit": 2.0, "twitter": 2.0}
+# Broadcast script, translation and TTS of one language
+BRIEF_COST = 1.0
+
+
+class Overloaded(Exception):
+    """Raised when work is shed instead of queued; `retry_after` is in seconds"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TooLarge(Exception):
+    """Raised for work costing more than its class may ever hold, which no wait would admit"""
+    status_code = 413
+
+    def __init__(self, message: str, cost: float, limit: float):
+        super().__init__(message)
+        self.cost = cost
+        self.limit = limit
+
+
+def estimate_cost(topics: int, sources: Iterable[str], languages: int = 1) -> float:
+    """
+    Estimated cost of a brief in units.
+    Args:
+        topics: Number of topics scraped
+        sources: Sources scraped per topic
+        languages: Localized outputs (script, translation and TTS each)
+    """
+    return topics * sum(SOURCE_COSTS.get(s, 1.0) for s in sources) + languages * BRIEF_COST
+
+
+class _Waiter:
+    __slots__ = ("cost", "future")
+
+    def __init__(self, cost: float):
+        self.cost = cost
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+class AdmissionController:
+    """
+    Per-worker admission control with one FIFO queue per priority class.
+
+    Work is admitted while the cost in flight stays within `capacity`
+    (batch work within its share of it). Queued interactive work always goes
+    before queued batch work. Rather than letting queues grow until clients
+    time out, work whose expected queueing delay exceeds its class's
+    threshold, or the request's remaining deadline, is shed right away, and
+    work that waits longer than that anyway is shed from the queue. The
+    delay estimate uses the observed seconds per cost unit of finished work.
+    Work costing more than its class may hold could never be admitted and is
+    rejected outright.
+    """
+
+    def __init__(self, capacity: float = ADMISSION_CAPACITY, batch_share: float = ADMISSION_BATCH_SHARE,
+                 max_queue_seconds: Optional[Dict[str, float]] = None,
+                 seconds_per_unit: float = ADMISSION_SECONDS_PER_UNIT):
+        self.capacity = capacity
+        self.limits = {INTERACTIVE: capacity, BATCH: capacity * batch_share}
+        self.max_queue_seconds = max_queue_seconds or dict(ADMISSION_MAX_QUEUE_SECONDS)
+        self.seconds_per_unit = seconds_per_unit
+        self._in_flight = {p: 0.0 for p in PRIORITIES}
+        self._queues: Dict[str, Deque[_Waiter]] = {p: deque() for p in PRIORITIES}
+        self._shed = {p: 0 for p in PRIORITIES}
+
+    def _fits(self, cost: float, priority: str) -> bool:
+        total = sum(self._in_flight.values())
+        return total + cost <= self.capacity and self._in_flight[priority] + cost <= self.limits[priority]
+
+    def estimated_wait(self, cost: float, priority: str) -> float:
+        """Expected queueing delay in seconds for new work of this cost and class."""
+        ahead = sum(w.cost for p in PRIORITIES[:PRIORITIES.index(priority) + 1] for w in self._queues[p])
+        if not ahead and self._fits(cost, priority):
+            return 0.0
+        excess = sum(self._in_flight.values()) + ahead + cost - self.limits[priority]
+        return max(excess, cost) * self.seconds_per_unit / self.capacity
+
+    def _max_wait(self, priority: str) -> float:
+        limit = self.max_queue_seconds[priority]
+        left = deadline.remaining()
+        if left is not None:
+            # Waiting longer would leave too little of the deadline for the brief itself
+            limit = min(limit, left - deadline.BRIEF_RESERVE_SECONDS)
+        return limit
+
+    def _reject(self, priority: str, wait: float, reason: str) -> Overloaded:
+        self._shed[priority] += 1
+        logger.warning("Shedding load: %s", reason, extra={
+            "priority": priority, "estimated_wait": round(wait, 1), "in_flight": self.in_flight,
+        })
+        return Overloaded(f"Server overloaded ({reason}), retry later", retry_after=max(1, math.ceil(wait)))
+
+    def check(self, cost: float, priority: str = INTERACTIVE) -> None:
+        """
+        Shed early, without queueing: use before accepting work that is
+        admitted later (e.g. a background job).
+        Raises:
+            TooLarge: If the work costs more than its class's share of the capacity
+            Overloaded: If the expected queueing delay is over the limit
+        """
+        if cost > self.limits[priority]:
+            logger.warning("Rejecting oversized work", extra={
+                "priority": priority, "cost": cost, "limit": self.limits[priority],
+            })
+            raise TooLarge(f"Request too large: it costs {cost:g} units, {priority} work may hold "
+                           f"at most {self.limits[priority]:g}; split it into smaller requests",
+                           cost, self.limits[priority])
+        wait = self.estimated_wait(cost, priority)
+        if wait > 0 and wait > self._max_wait(priority):
+            raise self._reject(priority, wait, "queue too long")
+
+    def _grant(self) -> None:
+        """Admit queued work in priority order while it fits."""
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            while queue and self._fits(queue[0].cost, priority):
+                waiter = queue.popleft()
+                self._in_flight[priority] += waiter.cost
+                waiter.future.set_result(None)
+            if queue:
+                # Lower classes never overtake a waiting higher one
+                return
+
+    @asynccontextmanager
+    async def admit(self, cost: float, priority: str = INTERACTIVE) -> AsyncIterator[float]:
+        """
+        Hold `cost` units of capacity for the duration of the block.
+        Yields:
+            float: Seconds spent queued
+        Raises:
+            TooLarge: If the work could never fit
+            Overloaded: If the work is shed instead of admitted
+        """
+        self.check(cost, priority)
+        queued_at = time.monotonic()
+        if not any(self._queues[p] for p in PRIORITIES[:PRIORITIES.index(priority) + 1]) \
+                and self._fits(cost, priority):
+            self._in_flight[priority] += cost
+        else:
+            waiter = _Waiter(cost)
+            self._queues[priority].append(waiter)
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter.future), max(self._max_wait(priority), 0.001))
+            except asyncio.TimeoutError:
+                # Admitted in the same instant the wait ran out: go ahead
+                if not waiter.future.done():
+                    self._queues[priority].remove(waiter)
+                    self._grant()
+                    raise self._reject(priority, self.estimated_wait(cost, priority), "queued too long") from None
+            except BaseException:
+                # Cancelled while queued: leave the queue, or give back capacity granted meanwhile
+                if waiter in self._queues[priority]:
+                    self._queues[priority].remove(waiter)
+                elif waiter.future.done():
+                    self._in_flight[priority] -= cost
+                self._grant()
+                raise
+        queued = time.monotonic() - queued_at
+        started = time.monotonic()
+        try:
+            yield queued
+        finally:
+            self._in_flight[priority] -= cost
+            # Smooth the seconds-per-unit estimate used for queueing delays
+            observed = (time.monotonic() - started) / cost if cost else 0.0
+            self.seconds_per_unit = 0.8 * self.seconds_per_unit + 0.2 * observed
+            self._grant()
+
+    @property
+    def in_flight(self) -> float:
+        return sum(self._in_flight.values())
+
+    def stats(self) -> dict:
+        """Current load of this worker, for monitoring."""
+        return {
+            "capacity": self.capacity,
+            "in_flight": dict(self._in_flight),
+            "queued": {p: len(q) for p, q in self._queues.items()},
+            "queued_cost": {p: sum(w.cost for w in q) for p, q in self._queues.items()},
+            "shed": dict(self._shed),
+            "seconds_per_unit": round(self.seconds_per_unit, 3),
+            "estimated_wait": {p: round(self.estimated_wait(1.0, p), 3) for p in PRIORITIES},
+        }
+
+
+admission = AdmissionController()
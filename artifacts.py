@@ -0,0 +1,156 @@
+import asyncio
+import contextvars
+import json
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, List, Optional
+
+import zstandard
+from dotenv import load_dotenv
+
+from log import get_logger, request_id_var, job_id_var
+
+load_dotenv()
+
+logger = get_logger("artifacts")
+
+ARTIFACTS_ENABLED = os.getenv("ARTIFACTS_ENABLED", "true").lower() == "true"
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR", "artifacts")
+ARTIFACT_ZSTD_LEVEL = int(os.getenv("ARTIFACT_ZSTD_LEVEL", "3"))
+# Requests older than this are deleted by the retention job (0 keeps everything)
+ARTIFACT_MAX_AGE_HOURS = float(os.getenv("ARTIFACT_MAX_AGE_HOURS", "168"))
+ARTIFACT_RETENTION_INTERVAL_SECONDS = float(os.getenv("ARTIFACT_RETENTION_INTERVAL_SECONDS", "3600"))
+
+# Topic that artifacts recorded in this context belong to (set per scraped topic)
+topic_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("artifact_topic", default=None)
+
+_UNSAFE = re.compile(r"[^a-z0-9_-]+")
+
+
+def _slug(value: Optional[str]) -> str:
+    """Filesystem-safe name; request ids come from a client header, topics from users."""
+    return _UNSAFE.sub("-", (value or "_").lower()).strip("-")[:80] or "_"
+
+
+class ArtifactStore:
+    """
+    Compressed record of everything a request scraped and generated.
+
+    Each artifact is one zstd-compressed JSON document under
+    ``<root>/<request_id>/<topic>/<time_ns>-<kind>.json.zst`` (topic ``_``
+    for request-wide artifacts), so a request's inputs can be listed, read
+    back and replayed through later stages without scraping again.
+    Writes happen on a background thread; record() only enqueues.
+    """
+
+    def __init__(self, root: str = ARTIFACT_DIR, level: int = ARTIFACT_ZSTD_LEVEL):
+        self.root = Path(root)
+        self.level = level
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+
+    def _ensure_writer(self) -> None:
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="artifact-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self) -> None:
+        compressor = zstandard.ZstdCompressor(level=self.level)
+        while True:
+            doc = self._queue.get()
+            try:
+                path = (self.root / _slug(doc["request_id"]) / _slug(doc["topic"])
+                        / f"{time.time_ns()}-{_slug(doc['kind'])}.json.zst")
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(".part")
+                tmp.write_bytes(compressor.compress(json.dumps(doc, default=str, ensure_ascii=False).encode("utf-8")))
+                os.replace(tmp, path)
+            except Exception as e:
+                logger.warning("Artifact write failed: %s", e, extra={"kind": doc.get("kind")})
+            finally:
+                self._queue.task_done()
+
+    def record(self, kind: str, data: Any, topic: Optional[str] = None, **meta) -> None:
+        """
+        Store an artifact for the current request. Safe to call from any thread.
+        Args:
+            kind: Artifact type, e.g. "raw_html", "headlines", "llm"
+            data: JSON-serializable payload
+            topic: Topic it belongs to (defaults to the context's topic)
+            **meta: Extra fields stored alongside the payload
+        """
+        if not ARTIFACTS_ENABLED:
+            return
+        self._ensure_writer()
+        self._queue.put({
+            "kind": kind,
+            "request_id": request_id_var.get() or job_id_var.get() or "adhoc",
+            "job_id": job_id_var.get(),
+            "topic": topic or topic_var.get(),
+            "ts": time.time(),
+            "data": data,
+            **meta,
+        })
+
+    def flush(self) -> None:
+        """Block until every recorded artifact is on disk."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def load(self, request_id: str, kind: Optional[str] = None, topic: Optional[str] = None) -> List[dict]:
+        """
+        Read back a request's artifacts in the order they were recorded.
+        Args:
+            request_id: The request's X-Request-ID
+            kind: Only artifacts of this kind
+            topic: Only artifacts of this topic
+        Returns:
+            List[dict]: Artifact documents (kind, request_id, topic, ts, data, ...)
+        """
+        base = self.root / _slug(request_id)
+        if not base.is_dir():
+            return []
+        pattern = f"*-{_slug(kind)}.json.zst" if kind else "*.json.zst"
+        topic_dir = _slug(topic) if topic else "*"
+        paths = sorted(base.glob(f"{topic_dir}/{pattern}"), key=lambda p: p.name)
+        decompressor = zstandard.ZstdDecompressor()
+        return [json.loads(decompressor.decompress(p.read_bytes())) for p in paths]
+
+    def enforce_retention(self, max_age_hours: float = ARTIFACT_MAX_AGE_HOURS) -> int:
+        """
+        Delete the artifacts of requests older than the age quota.
+        Returns:
+            int: Number of requests removed
+        """
+        if not max_age_hours or not self.root.is_dir():
+            return 0
+        cutoff = time.time() - max_age_hours * 3600
+        removed = 0
+        for request_dir in self.root.iterdir():
+            if request_dir.is_dir() and request_dir.stat().st_mtime < cutoff:
+                shutil.rmtree(request_dir, ignore_errors=True)
+                removed += 1
+        return removed
+
+
+artifact_store = ArtifactStore()
+
+
+async def artifact_retention_loop(store: ArtifactStore = artifact_store,
+                                  interval: float = ARTIFACT_RETENTION_INTERVAL_SECONDS) -> None:
+    """Background job applying the artifact age quota every `interval` seconds."""
+    while True:
+        try:
+            removed = await asyncio.to_thread(store.enforce_retention)
+            if removed:
+                logger.info("Artifact retention removed requests", extra={"removed": removed})
+        except Exception as e:
+            logger.exception("Artifact retention failed: %s", e)
+        await asyncio.sleep(interval)
@@ -0,0 +1,164 @@
+import os
+import shutil
+import subprocess
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from log import get_logger
+from audio_store import AudioStore, audio_store
+
+load_dotenv()
+
+logger = get_logger("audio_profiles")
+
+# ffmpeg executable used for transcoding (without it every profile serves the master)
+FFMPEG_BINARY = os.getenv("FFMPEG_BINARY", "ffmpeg")
+AUDIO_TRANSCODE_TIMEOUT_SECONDS = float(os.getenv("AUDIO_TRANSCODE_TIMEOUT_SECONDS", "60"))
+# Profile used when neither the request nor its client type names one
+AUDIO_DEFAULT_PROFILE = os.getenv("AUDIO_DEFAULT_PROFILE", "speech_mp3")
+# Default profile per X-Client-Type header, e.g. "mobile=speech_opus,web=speech_mp3"
+AUDIO_CLIENT_PROFILES = dict(
+    pair.strip().split("=", 1)
+    for pair in os.getenv("AUDIO_CLIENT_PROFILES", "mobile=speech_opus,web=speech_mp3,podcast=speech_mp3").split(",")
+    if "=" in pair
+)
+
+# The synthesized file itself, served without transcoding
+MASTER = "master"
+
+MEDIA_TYPES = {"mp3": "audio/mpeg", "ogg": "audio/ogg"}
+
+
+@dataclass(frozen=True)
+class AudioProfile:
+    name: str
+    # ffmpeg encoder, e.g. "libmp3lame" or "libopus"
+    codec: str
+    ext: str
+    bitrate_kbps: int
+    sample_rate: int
+    channels: int = 1
+
+    def ffmpeg_args(self) -> List[str]:
+        args = ["-vn", "-map_metadata", "-1", "-ac", str(self.channels), "-ar", str(self.sample_rate),
+                "-c:a", self.codec, "-b:a", f"{self.bitrate_kbps}k"]
+        if self.codec == "libopus":
+            # Opus' speech mode: better intelligibility per bit for a single narrator
+            args += ["-application", "voip"]
+        return args
+
+
+# A narrated brief is one mono voice, so speech profiles drop stereo and most of
+# the 44.1 kHz bandwidth: MP3 at 48 kbps / 24 kHz is about a third of the size of
+# a typical TTS master, Opus at 24 kbps about a sixth.
+PROFILES: Dict[str, AudioProfile] = {
+    "speech_mp3": AudioProfile(
+        "speech_mp3", "libmp3lame", "mp3",
+        bitrate_kbps=int(os.getenv("AUDIO_SPEECH_MP3_BITRATE_KBPS", "48")),
+        sample_rate=int(os.getenv("AUDIO_SPEECH_MP3_SAMPLE_RATE", "24000")),
+    ),
+    "speech_opus": AudioProfile(
+        "speech_opus", "libopus", "ogg",
+        bitrate_kbps=int(os.getenv("AUDIO_SPEECH_OPUS_BITRATE_KBPS", "24")),
+        sample_rate=int(os.getenv("AUDIO_SPEECH_OPUS_SAMPLE_RATE", "24000")),
+    ),
+}
+PROFILE_NAMES = (MASTER, *PROFILES)
+
+_ffmpeg: Optional[str] = None
+_ffmpeg_checked = False
+# One transcode per (master, profile) at a time; later callers reuse its result
+_locks: Dict[str, threading.Lock] = {}
+_locks_lock = threading.Lock()
+
+
+def profile_for_client(client_type: Optional[str]) -> str:
+    """Default profile for an X-Client-Type value (AUDIO_DEFAULT_PROFILE if unknown)."""
+    return AUDIO_CLIENT_PROFILES.get((client_type or "").strip().lower(), AUDIO_DEFAULT_PROFILE)
+
+
+def media_type_for(entry: dict) -> str:
+    """Media type of a stored audio file from its audio store index entry."""
+    return MEDIA_TYPES.get(Path(entry["path"]).suffix.lstrip("."), "audio/mpeg")
+
+
+def _find_ffmpeg() -> Optional[str]:
+    global _ffmpeg, _ffmpeg_checked
+    if not _ffmpeg_checked:
+        _ffmpeg = shutil.which(FFMPEG_BINARY)
+        _ffmpeg_checked = True
+        if _ffmpeg is None:
+            logger.warning("ffmpeg not found (%s): audio is served as synthesized, without transcoding",
+                           FFMPEG_BINARY)
+    return _ffmpeg
+
+
+def ensure_variant(digest: str, profile: str, store: AudioStore = audio_store) -> str:
+    """
+    Return the digest of a stored file's audio in `profile`, transcoding the
+    master on first use. Variants are content-addressed files of their own,
+    linked from the master's index entry, so every later request (and the
+    /audio endpoint) reuses them. Any failure falls back to the master: a
+    brief must not be lost to transcoding.
+    Args:
+        digest: Digest of the master, or of any variant of it
+        profile: MASTER or a PROFILES name
+    Returns:
+        str: Digest of the file to serve
+    """
+    entry = store.get(digest)
+    if entry is None:
+        # Not in the store (nothing to transcode); the caller handles it as before
+        return digest
+    if entry.get("master"):
+        digest, entry = entry["master"], store.get(entry["master"]) or entry
+    if profile == MASTER or profile not in PROFILES:
+        return digest
+    variant = entry.get("variants", {}).get(profile)
+    if variant and store.resolve(variant) is not None:
+        return variant
+    source = store.resolve(digest)
+    ffmpeg = _find_ffmpeg()
+    if source is None or ffmpeg is None:
+        return digest
+
+    with _locks_lock:
+        lock = _locks.setdefault(f"{digest}:{profile}", threading.Lock())
+    with lock:
+        variant = (store.get(digest) or {}).get("variants", {}).get(profile)
+        if variant and store.resolve(variant) is not None:
+            return variant
+        spec = PROFILES[profile]
+        tmp = store.temp_path(f".{spec.ext}")
+        try:
+            subprocess.run(
+                [ffmpeg, "-nostdin", "-hide_banner", "-loglevel", "error", "-y", "-i", str(source),
+                 *spec.ffmpeg_args(), tmp],
+                check=True, capture_output=True, timeout=AUDIO_TRANSCODE_TIMEOUT_SECONDS,
+            )
+            path = store.ingest_file(tmp, ext=spec.ext, metadata={
+                "engine": "ffmpeg",
+                "master": digest,
+                "profile": profile,
+                "language": entry.get("language"),
+                "duration_seconds": entry.get("duration_seconds"),
+            })
+        except (OSError, subprocess.SubprocessError) as e:
+            stderr = getattr(e, "stderr", None) or b""
+            logger.warning("Transcoding failed, serving the master: %s", e, extra={
+                "profile": profile, "stderr": stderr.decode(errors="replace")[-500:],
+            })
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return digest
+        variant = Path(path).stem
+        store.annotate(digest, {"variants": {**(store.get(digest) or {}).get("variants", {}), profile: variant}})
+        logger.info("Audio transcoded", extra={
+            "profile": profile, "master_bytes": entry.get("size"),
+            "bytes": (store.get(variant) or {}).get("size"),
+        })
+        return variant
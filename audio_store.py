@@ -0,0 +1,344 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional
+
+from dotenv import load_dotenv
+
+from log import get_logger
+
+load_dotenv()
+
+try:
+    import fcntl
+except ImportError:  # Not on Windows: the index is only locked within one process
+    fcntl = None
+
+logger = get_logger("audio_store")
+
+# Retention defaults (0 disables the corresponding quota)
+AUDIO_MAX_AGE_HOURS = float(os.getenv("AUDIO_MAX_AGE_HOURS", "168"))
+AUDIO_MAX_TOTAL_MB = float(os.getenv("AUDIO_MAX_TOTAL_MB", "1024"))
+AUDIO_RETENTION_INTERVAL_SECONDS = float(os.getenv("AUDIO_RETENTION_INTERVAL_SECONDS", "900"))
+
+
+# Extensions of stored files (synthesized MP3 masters, transcoded variants)
+AUDIO_EXTENSIONS = ("mp3", "ogg")
+
+# Layer III bitrates in kbps, indexed by the 4-bit bitrate field
+_MP3_BITRATES = {
+    "mpeg1": [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    "mpeg2": [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+
+
+def _id3_size(head: bytes) -> int:
+    """Return the size of a leading ID3v2 tag, or 0."""
+    if len(head) >= 10 and head[:3] == b"ID3":
+        size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+        return 10 + size
+    return 0
+
+
+def estimate_mp3_duration(head: bytes, total_bytes: int) -> Optional[float]:
+    """
+    Estimate MP3 duration from the first frame header and the file size.
+    Exact for constant bitrate files, which is what the TTS engines emit.
+    Args:
+        head: First bytes of the file (enough to cover any ID3 tag + one header)
+        total_bytes: Size of the whole file
+    Returns:
+        Optional[float]: Duration in seconds, or None if no Layer III header was found
+    """
+    offset = _id3_size(head)
+    for i in range(offset, len(head) - 3):
+        b1, b2, b3 = head[i], head[i + 1], head[i + 2]
+        if b1 != 0xFF or (b2 & 0xE0) != 0xE0:
+            continue
+        version = (b2 >> 3) & 0x3
+        layer = (b2 >> 1) & 0x3
+        bitrate_idx = b3 >> 4
+        if version == 1 or layer != 1 or bitrate_idx in (0, 15):
+            continue
+        table = _MP3_BITRATES["mpeg1" if version == 3 else "mpeg2"]
+        kbps = table[bitrate_idx]
+        return round((total_bytes - offset) * 8 / (kbps * 1000), 2)
+    return None
+
+
+class AudioStore:
+    """
+    Content-addressed audio storage.
+
+    Files are named by the SHA-256 of their bytes and sharded into two levels
+    of subdirectories (``ab/cd/abcd....mp3``). Every write goes to a temp file
+    in the target directory and is renamed into place, so readers never see a
+    partial file and concurrent writers of the same content are harmless.
+    Metadata for every file lives in ``index.json`` at the store root. Every
+    worker process keeps a copy in memory; updates re-read and merge the file
+    under an exclusive lock before writing it back, and lookups of unknown
+    digests reload it, so workers see each other's files.
+    """
+
+    def __init__(self, root: str = "audio"):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / "index.json"
+        self.lock_path = self.root / ".index.lock"
+        self._lock = threading.Lock()
+        self._index: Dict[str, dict] = {}
+        self._index_version = None
+        self._reload()
+
+    def _load_index(self) -> Dict[str, dict]:
+        try:
+            return json.loads(self.index_path.read_text())
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _reload(self) -> None:
+        """
+        Replace the in-memory index with index.json if another process changed
+        it, keeping this process' newer access times. Entries missing from the
+        file were removed by another worker's retention. Caller holds self._lock.
+        """
+        try:
+            stat = self.index_path.stat()
+            # Every write replaces the file, so a new inode means new content
+            version = (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            version = None
+        if version == self._index_version:
+            return
+        index = self._load_index()
+        for digest, entry in index.items():
+            mine = self._index.get(digest)
+            if mine is not None:
+                entry["last_access"] = max(entry.get("last_access", 0), mine.get("last_access", 0))
+        self._index, self._index_version = index, version
+
+    def _write_index(self) -> None:
+        # Caller holds self._lock and the file lock
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".index.", suffix=".tmp")
+        with os.fdopen(fd, "w") as fh:
+            json.dump(self._index, fh)
+        os.replace(tmp, self.index_path)
+        stat = self.index_path.stat()
+        self._index_version = (stat.st_ino, stat.st_mtime_ns)
+
+    @contextmanager
+    def _update(self) -> Iterator[Dict[str, dict]]:
+        """Read-merge-write cycle of the index, exclusive across threads and worker processes."""
+        with self._lock, open(self.lock_path, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # Always re-read under the lock before changing the index
+                self._index_version = None
+                self._reload()
+                yield self._index
+                self._write_index()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def path_for(self, digest: str, ext: str = "mp3") -> Path:
+        """Return the sharded path for a content digest."""
+        return self.root / digest[:2] / digest[2:4] / f"{digest}.{ext}"
+
+    def _record(self, digest: str, path: Path, metadata: Optional[dict]) -> None:
+        now = time.time()
+        with self._update() as index:
+            entry = index.get(digest) or {"created": now}
+            entry.update(metadata or {})
+            entry.update({
+                "path": str(path.relative_to(self.root)),
+                "size": path.stat().st_size,
+                "last_access": now,
+            })
+            index[digest] = entry
+
+    def save_bytes(self, data: bytes, ext: str = "mp3", metadata: Optional[dict] = None) -> str:
+        """
+        Store audio bytes under their content hash.
+        Returns:
+            str: Path of the stored file
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest, ext)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=".part")
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+        self._record(digest, path, metadata)
+        return str(path)
+
+    def save_stream(self, chunks: Iterable[bytes], ext: str = "mp3",
+                    metadata: Optional[dict] = None) -> str:
+        """
+        Write an audio stream to disk chunk by chunk, hashing and measuring it
+        on the way, then move it into its content-addressed location.
+        Only the first 64 KB are buffered (for the duration estimate), so memory
+        use does not grow with the audio length.
+        Returns:
+            str: Path of the stored file
+        """
+        sha = hashlib.sha256()
+        head = bytearray()
+        total = 0
+        tmp = self.temp_path()
+        try:
+            with open(tmp, "wb") as fh:
+                for chunk in chunks:
+                    if not chunk:
+                        continue
+                    sha.update(chunk)
+                    fh.write(chunk)
+                    total += len(chunk)
+                    if len(head) < 1 << 16:
+                        head.extend(chunk[:(1 << 16) - len(head)])
+        except BaseException:
+            os.remove(tmp)
+            raise
+
+        digest = sha.hexdigest()
+        path = self.path_for(digest, ext)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            os.remove(tmp)
+        else:
+            os.replace(tmp, path)
+
+        info = dict(metadata or {})
+        if ext == "mp3":
+            info["duration_seconds"] = estimate_mp3_duration(bytes(head), total)
+        self._record(digest, path, info)
+        return str(path)
+
+    def ingest_file(self, src: str, ext: str = "mp3", metadata: Optional[dict] = None) -> str:
+        """
+        Move an already written file (e.g. a gTTS output) into the store.
+        Returns:
+            str: Path of the stored file
+        """
+        sha = hashlib.sha256()
+        with open(src, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 16), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        path = self.path_for(digest, ext)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            os.remove(src)
+        else:
+            os.replace(src, path)
+        self._record(digest, path, metadata)
+        return str(path)
+
+    def temp_path(self, suffix: str = ".part") -> str:
+        """Return a fresh temp file path inside the store (same filesystem as the shards)."""
+        tmp_dir = self.root / "tmp"
+        tmp_dir.mkdir(exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=tmp_dir, suffix=suffix)
+        os.close(fd)
+        return tmp
+
+    def resolve(self, digest: str) -> Optional[Path]:
+        """Return the absolute file path for a digest, or None if it is not stored."""
+        entry = self.get(digest)
+        if entry:
+            path = self.root / entry["path"]
+            return path if path.exists() else None
+        # Written but not (yet) indexed, e.g. the index write of another worker was lost
+        return next((p for p in (self.path_for(digest, ext) for ext in AUDIO_EXTENSIONS) if p.exists()), None)
+
+    def annotate(self, digest: str, metadata: dict) -> None:
+        """Merge fields into a stored file's index entry (no-op if it is gone)."""
+        with self._update() as index:
+            entry = index.get(digest)
+            if entry is not None:
+                entry.update(metadata)
+
+    def get(self, digest: str) -> Optional[dict]:
+        """Return the index entry for a digest and mark it as accessed."""
+        with self._lock:
+            # Pick up files written (or removed) by other workers since the last look
+            self._reload()
+            entry = self._index.get(digest)
+            if entry:
+                entry["last_access"] = time.time()
+            return dict(entry) if entry else None
+
+    def enforce_retention(self, max_age_hours: float = AUDIO_MAX_AGE_HOURS,
+                          max_total_mb: float = AUDIO_MAX_TOTAL_MB) -> int:
+        """
+        Delete files older than the age quota, then least recently used files
+        until the store fits the size quota.
+        Returns:
+            int: Number of files removed
+        """
+        now = time.time()
+        removed = 0
+        with self._update():
+            victims = []
+            if max_age_hours:
+                cutoff = now - max_age_hours * 3600
+                victims = [d for d, e in self._index.items() if e["created"] < cutoff]
+            expired = set(victims)
+            remaining = sorted(
+                (d for d in self._index if d not in expired),
+                key=lambda d: self._index[d]["last_access"],
+            )
+            if max_total_mb:
+                budget = max_total_mb * 1024 * 1024
+                total = sum(self._index[d]["size"] for d in remaining)
+                while remaining and total > budget:
+                    digest = remaining.pop(0)
+                    total -= self._index[digest]["size"]
+                    victims.append(digest)
+
+            for digest in victims:
+                entry = self._index.pop(digest)
+                try:
+                    (self.root / entry["path"]).unlink()
+                except FileNotFoundError:
+                    pass
+                removed += 1
+        return removed
+
+
+_stores: Dict[str, AudioStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_audio_store(root: str) -> AudioStore:
+    """Return the shared AudioStore for a root directory."""
+    key = str(Path(root).resolve())
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = AudioStore(root)
+        return _stores[key]
+
+
+audio_store = get_audio_store(os.getenv("AUDIO_DIR", "audio"))
+
+
+async def retention_loop(store: AudioStore = audio_store,
+                         interval: float = AUDIO_RETENTION_INTERVAL_SECONDS) -> None:
+    """Background job applying the retention quotas every `interval` seconds."""
+    while True:
+        try:
+            removed = await asyncio.to_thread(store.enforce_retention)
+            if removed:
+                logger.info("Retention removed files", extra={"removed": removed})
+        except Exception as e:
+            logger.exception("Retention failed: %s", e)
+        await asyncio.sleep(interval)
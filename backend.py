@@ -1,142 +1,771 @@
-import os, base64, traceback
+import os, base64, asyncio, hashlib, time, uuid
 from pathlib import Path
-from datetime import datetime
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from typing import Dict, List, Optional, Set
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse, Response
 from dotenv import load_dotenv
 
-from models import NewsRequest
+from log import get_logger, elapsed, request_id_var
+from models import NewsRequest, BatchNewsRequest
 from utils import (
     generate_broadcast_news,
     text_to_audio_murf,
     get_voice_for_language,
-    translate_for_language,
 )
-from news_scraper import NewsScraper
-from reddit_scraper import scrape_reddit_topics
-from twitter_scraper import scrape_twitter_topics
+from audio_store import audio_store, retention_loop
+from llm import warm_up, LLM_PROVIDER
+from shared_state import single_flight, SharedQueue, FlightError
+from artifacts import artifact_store, artifact_retention_loop
+import deadline
+import feeds
+from http_caching import CompressionMiddleware, is_not_modified, http_date
+from admission import admission, estimate_cost, Overloaded, TooLarge, INTERACTIVE, BATCH, SOURCE_COSTS, BRIEF_COST
+import progress
+import profiling
+import audio_profiles
+from profiling import loop_monitor
+from translator import translate_script, direct_generation_enabled
+from seen_index import SeenIndex, no_updates_script
+from extractive import condense_analysis
+import sources
 
-app = FastAPI()
 load_dotenv()
 
-print(f"[{datetime.now()}] 🚀 NewsNinja Backend Starting...")
-print(f"[{datetime.now()}] 📡 Environment: {os.getenv('ENVIRONMENT', 'development')}")
-print(f"[{datetime.now()}] 🔑 API Keys Configured: Gemini={'✅' if os.getenv('GEMINI_API_KEY') else '❌'}, Murf={'✅' if os.getenv('MURF_API_KEY') else '❌'}")
+logger = get_logger("backend")
+
+# Source plugins: news, the social sources and any SOURCE_PLUGINS modules
+sources.load_plugins()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background retention job for the audio store
+    retention_task = asyncio.create_task(retention_loop())
+    artifact_retention_task = asyncio.create_task(artifact_retention_loop())
+    # Run queued brief jobs, whichever worker accepted them
+    job_workers = [asyncio.create_task(job_worker()) for _ in range(JOB_WORKER_CONCURRENCY)]
+    # Log whatever blocks the event loop past LOOP_LAG_THRESHOLD_MS
+    loop_monitor.start()
+    # Load the local model in the background so startup isn't held up
+    warm_up_task = progress.spawn(warm_up())
+    yield
+    warm_up_task.cancel()
+    retention_task.cancel()
+    artifact_retention_task.cancel()
+    for task in job_workers:
+        task.cancel()
+    loop_monitor.stop()
+
+app = FastAPI(lifespan=lifespan)
+# gzip/brotli for JSON and feed documents; audio is served as-is
+app.add_middleware(CompressionMiddleware)
+
+# Sources covered by each NewsRequest.source_type (SourceType values)
+SOURCES_BY_TYPE = {
+    "news": {"news"},
+    "reddit": {"reddit"},
+    "twitter": {"twitter"},
+    "both": {"news", "reddit"},
+    # Every registered source, plugins included
+    "all": set(sources.SOURCES),
+}
+
+# Batch endpoint limits
+BATCH_SCRAPE_CONCURRENCY = int(os.getenv("BATCH_SCRAPE_CONCURRENCY", "3"))
+BATCH_TOPICS_PER_CALL = int(os.getenv("BATCH_TOPICS_PER_CALL", "5"))
+BATCH_BRIEF_CONCURRENCY = int(os.getenv("BATCH_BRIEF_CONCURRENCY", "4"))
+# How long a coalesced brief may run before a waiting duplicate takes over
+COALESCE_LOCK_TTL_SECONDS = float(os.getenv("COALESCE_LOCK_TTL_SECONDS", "600"))
+# Background jobs each worker runs at once, taken from the queue shared by all workers
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "2"))
+
+job_queue = SharedQueue("jobs", ttl=progress.JOB_TTL_SECONDS)
+
+logger.info("NewsNinja backend starting", extra={
+    "environment": os.getenv("ENVIRONMENT", "development"),
+    "llm_provider": LLM_PROVIDER,
+    "gemini_configured": bool(os.getenv("GEMINI_API_KEY")),
+    "murf_configured": bool(os.getenv("MURF_API_KEY")),
+})
+
+@app.middleware("http")
+async def correlation_id_middleware(request: Request, call_next):
+    """Tag every log record of a request with its X-Request-ID (generated if absent)."""
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    """Shed work gets 503 and a hint of when capacity should be back."""
+    return JSONResponse({"detail": str(exc)}, status_code=503,
+                        headers={"Retry-After": str(int(exc.retry_after))})
+
+@app.exception_handler(TooLarge)
+async def too_large_handler(request: Request, exc: TooLarge):
+    """Work that could never be admitted gets 413 rather than a queue slot."""
+    return JSONResponse({"detail": str(exc)}, status_code=413)
+
+def brief_cost(req: NewsRequest, scraped: bool = True) -> float:
+    """Admission cost of one brief; replays skip scraping."""
+    sources = SOURCES_BY_TYPE.get(req.source_type, set()) if scraped else ()
+    return estimate_cost(len(req.topics), sources, len(req.target_languages()))
+
+@app.get("/admission")
+async def admission_status():
+    """Load, queues and shed counts of this worker."""
+    return JSONResponse(admission.stats())
+
+@app.get("/sources")
+async def source_status():
+    """Registered sources: their stages, rate limits, cache policy and per-stage metrics."""
+    return JSONResponse(sources.describe())
+
+@app.get("/event-loop")
+async def event_loop_status():
+    """Event-loop blocking episodes seen by this worker."""
+    return JSONResponse(loop_monitor.stats())
+
+async def localize_brief(summary_en: str, language: str, already_localized: bool = False,
+                         inline_audio: bool = True,
+                         audio_profile: str = audio_profiles.AUDIO_DEFAULT_PROFILE) -> dict:
+    """
+    Translate the English summary and synthesize audio for one locale.
+    Args:
+        summary_en: Broadcast script (English unless already_localized)
+        language: Murf locale code, e.g. "hi-IN"
+        already_localized: True when the script was written directly in `language`
+        inline_audio: Also return the audio as base64 in `audio_content`
+        audio_profile: Output profile the synthesized master is transcoded to
+    Returns:
+        dict: summary_text, audio_url, audio_duration, audio_profile,
+              audio_media_type, audio_bytes, voice_id, language
+              and (if inline_audio) audio_content
+    """
+    # Translation
+    if already_localized:
+        final_summary = summary_en
+        logger.info("Summary written directly in target language", extra={"language": language})
+    elif language != "en-US":
+        translate_start = time.perf_counter()
+        final_summary = await translate_script(os.getenv("GEMINI_API_KEY"), summary_en, language)
+        translate_duration = elapsed(translate_start)
+        logger.info("Translation completed", extra={"language": language, "seconds": translate_duration})
+        progress.emit("translation_done", language=language, text=final_summary, seconds=translate_duration)
+    else:
+        final_summary = summary_en
+
+    # Audio Generation
+    audio_start = time.perf_counter()
+    voice_id = get_voice_for_language(language)
+    audio_path = await asyncio.to_thread(
+        text_to_audio_murf,
+        text=final_summary,
+        voice_id=voice_id,
+        language=language,
+        output_dir="audio",
+    )
+    logger.info("Audio generated", extra={
+        "language": language, "seconds": elapsed(audio_start), "audio_path": audio_path,
+    })
+
+    if not (audio_path and Path(audio_path).exists()):
+        raise RuntimeError(f"Audio generation failed for {language}")
+
+    # Transcode the master to the requested profile (cached per master and profile)
+    digest = await asyncio.to_thread(audio_profiles.ensure_variant, Path(audio_path).stem, audio_profile)
+    entry = audio_store.get(digest) or {}
+    audio_path = audio_store.resolve(digest) or audio_path
+    localized = {
+        "language": language,
+        "voice_id": voice_id,
+        "summary_text": final_summary,
+        "audio_url": f"/audio/{digest}",
+        "audio_duration": entry.get("duration_seconds"),
+        "audio_profile": entry.get("profile", audio_profiles.MASTER),
+        "audio_media_type": audio_profiles.media_type_for(entry) if entry else "audio/mpeg",
+        "audio_bytes": entry.get("size"),
+    }
+
+    progress.emit("audio_ready", language=language, audio_url=localized["audio_url"],
+                  audio_duration=localized["audio_duration"])
+
+    # Encoding (only for clients that still want the audio inline)
+    if inline_audio:
+        audio_b64 = base64.b64encode(Path(audio_path).read_bytes()).decode()
+        logger.debug("Audio encoded inline", extra={"language": language, "base64_bytes": len(audio_b64)})
+        localized["audio_content"] = audio_b64
+
+    return localized
+
+@app.api_route("/audio/{digest}", methods=["GET", "HEAD"])
+async def get_audio(digest: str, request: Request, profile: Optional[str] = None):
+    """
+    Serve a stored audio file straight from disk. Files are content-addressed,
+    so the digest is a strong ETag and the response never changes: clients and
+    CDNs may cache it for good, revalidate with 304s and resume with Range.
+    With ?profile=..., the file is served in that output profile instead,
+    transcoded on first use.
+    """
+    if profile is not None:
+        if profile not in audio_profiles.PROFILE_NAMES:
+            raise HTTPException(status_code=400, detail=f"Unknown audio profile {profile!r}")
+        digest = await asyncio.to_thread(audio_profiles.ensure_variant, digest, profile)
+    entry = audio_store.get(digest)
+    path = audio_store.resolve(digest)
+    if entry is None or path is None:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    headers = {
+        "ETag": f'"{digest}"',
+        "Last-Modified": http_date(entry["created"]),
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+    if is_not_modified(request.headers, headers["ETag"], entry["created"]):
+        return Response(status_code=304, headers=headers)
+    # FileResponse answers Range / If-Range requests with 206 partial content
+    return FileResponse(path, media_type=audio_profiles.media_type_for(entry), filename=path.name, headers=headers)
+
+@app.api_route("/feeds/{feed_id}.xml", methods=["GET", "HEAD"])
+async def get_feed(feed_id: str, request: Request):
+    """RSS podcast feed of a topic set or a subscriber (ids come from brief metadata)."""
+    feed = await feeds.load(feed_id)
+    if feed is None:
+        raise HTTPException(status_code=404, detail="Feed not found")
+    # Episodes whose audio was removed by retention drop out of the feed
+    feed["episodes"] = [e for e in feed["episodes"] if feeds.episode_audio_exists(e)]
+    body = feeds.render_rss(feed_id, feed, str(request.base_url))
+    headers = {
+        "ETag": f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+        "Last-Modified": http_date(feed["updated"]),
+        "Cache-Control": f"public, max-age={feeds.FEED_MAX_AGE_SECONDS}",
+    }
+    if is_not_modified(request.headers, headers["ETag"], feed["updated"]):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/rss+xml", headers=headers)
+
+async def scrape_sources(topics: List[str], names: Set[str], seen: Optional[SeenIndex] = None) -> dict:
+    """
+    Scrape and analyze the given topics on each requested source, all at once.
+    Args:
+        topics: Topics to scrape
+        names: Registered sources to scrape, e.g. {"news", "reddit"}
+        seen: The user's seen-headline index ("since" mode); news only
+    Returns:
+        dict: Per-source analysis keyed like {"news": {"news_analysis": {...}}}
+    """
+    results = await sources.scrape(topics, [name for name in sources.SOURCES if name in names], seen=seen)
+
+    # Per-source results are the input of build_brief; keeping them allows a replay
+    artifact_store.record("source_results", results, topics=topics)
+    return results
+
+async def build_brief(req: NewsRequest, results: dict, start_time: float,
+                      seen: Optional[SeenIndex] = None, publish: bool = True, user_feed: bool = True) -> dict:
+    """
+    Turn scraped source results into the broadcast script and localized audio.
+    Args:
+        start_time: time.perf_counter() value when the request started
+        seen: The user's seen-headline index when the results were scraped in
+              "since" mode; it is committed once the brief is done
+        publish: Add the brief to its podcast feeds
+        user_feed: Also add it to the requesting user's feed; off for briefs
+                   shared by coalesced requests, see publish_user_feed().
+                   "since" briefs always go to the user's feed, and only there
+    Returns:
+        dict: JSON-serializable response body for one NewsRequest
+    """
+    # Summary Generation
+    languages = req.target_languages()
+    summary_start = time.perf_counter()
+    news_data, topics, unchanged = results.get("news"), req.topics, []
+    if seen is not None and news_data:
+        # Topics with no new headlines are left out of the broadcast, unless a
+        # social source still has something to say about them
+        unchanged = [t for t in req.topics if t in seen.unchanged_topics()]
+        news_data = {**news_data, "news_analysis": {
+            t: s for t, s in news_data["news_analysis"].items() if t not in unchanged
+        }}
+        if not (results.keys() - {"news"}):
+            topics = [t for t in req.topics if t not in unchanged]
+    skipped = [t for t in unchanged if t not in topics]
+    # Writing directly in the target language only pays off for a single locale;
+    # fan-out requests share one English summary instead. The "no updates" line
+    # is English, so since-briefs that need it are translated as usual.
+    direct = len(languages) == 1 and direct_generation_enabled(languages[0]) and bool(topics) and not skipped
+    # Short on time: ask for a compact script, which also makes translation and TTS faster
+    left = deadline.remaining()
+    short = left is not None and left < deadline.SHORT_SCRIPT_BELOW_SECONDS
+    if short:
+        deadline.note("short script")
+    progress.emit("summary_start")
+    if topics:
+        # Trim long social analyses to their most central sentences before the LLM
+        social = await asyncio.to_thread(lambda: [
+            {"name": name, "title": source.title, "heading": source.heading, "cue": source.cue,
+             "data": condense_analysis(results.get(name), f"{name}_analysis")}
+            for name, source in sources.SOURCES.items() if name != "news" and results.get(name)
+        ])
+        # Stream summary tokens only when someone is listening for progress
+        on_chunk = (lambda text: progress.emit("summary_token", text=text)) if progress.current_job() else None
+        summary_en = await asyncio.to_thread(
+            generate_broadcast_news,
+            api_key=os.getenv("GEMINI_API_KEY"),
+            news_data=news_data,
+            social=social,
+            topics=topics,
+            language=languages[0] if direct else "en-US",
+            on_chunk=on_chunk,
+            short=short,
+        )
+        if skipped:
+            summary_en = f"{summary_en.rstrip()}\n\n{no_updates_script(skipped)}"
+    else:
+        # Nothing new anywhere: a one-line brief instead of a full broadcast
+        summary_en = no_updates_script(req.topics)
+    summary_duration = elapsed(summary_start)
+    logger.info("Broadcast summary generated", extra={"seconds": summary_duration, "chars": len(summary_en)})
+    progress.emit("summary_done", text=summary_en, seconds=summary_duration)
+
+    # Translation + Audio, fanned out per language
+    localized_list = await asyncio.gather(*(
+        localize_brief(summary_en, language, already_localized=direct, inline_audio=req.inline_audio,
+                       audio_profile=req.audio_profile or audio_profiles.AUDIO_DEFAULT_PROFILE)
+        for language in languages
+    ))
+    localized = dict(zip(languages, localized_list))
+    primary = localized_list[0]
+
+    artifact_store.record("brief", {
+        "summary": summary_en,
+        "direct": direct,
+        "localized": {lang: {k: v for k, v in loc.items() if k != "audio_content"} for lang, loc in localized.items()},
+    })
+
+    total_duration = elapsed(start_time)
+    response = {
+        "summary_text": primary["summary_text"],
+        "audio_content": primary.get("audio_content"),
+        "audio_url": primary["audio_url"],
+        "metadata": {
+            "topics": req.topics,
+            "sources": req.source_type.value,
+            "language": languages[0],
+            "audio_duration": primary["audio_duration"],
+            "audio_profile": primary["audio_profile"],
+            "audio_media_type": primary["audio_media_type"],
+            "audio_bytes": primary["audio_bytes"],
+            "processing_time": total_duration
+        }
+    }
+    if results.get("news", {}).get("topic_status"):
+        response["metadata"]["news_topic_status"] = {
+            t: results["news"]["topic_status"][t] for t in req.topics if t in results["news"]["topic_status"]
+        }
+    if req.languages:
+        response["localized"] = localized
+        response["metadata"]["languages"] = languages
+    if publish and feeds.FEEDS_ENABLED:
+        try:
+            # A "since" brief holds only what this user hadn't heard: it goes to their feed alone
+            response["metadata"]["feeds"] = await feeds.publish_brief(
+                req.topics, req.source_type.value, localized, req.user_id if user_feed or req.since else None,
+                topic_feeds=not req.since,
+            )
+        except Exception as e:
+            # A feed outage must not cost the user their brief
+            logger.warning("Feed publishing failed: %s", e)
+    if deadline.report() is not None:
+        response["metadata"]["deadline"] = deadline.report()
+    if seen is not None:
+        response["metadata"]["unchanged_topics"] = unchanged
+        # Only now does the user count as having heard these headlines
+        await seen.commit()
+    return response
+
+def with_client_audio_profile(req: NewsRequest, request: Request) -> NewsRequest:
+    """Default the audio profile from the X-Client-Type header unless the request names one."""
+    if req.audio_profile is not None:
+        return req
+    profile = audio_profiles.profile_for_client(request.headers.get("X-Client-Type"))
+    return req.model_copy(update={"audio_profile": profile})
+
+async def publish_user_feed(req: NewsRequest, paths: dict) -> dict:
+    """
+    Add a coalesced brief to the requester's own feed.
+    Args:
+        paths: The shared brief's feed paths (publish_brief() output)
+    Returns:
+        dict: The paths with only this requester's user feed
+    """
+    if req.since:
+        # Coalesced only with the same user's requests, and already in their feed
+        return paths
+    paths = {k: v for k, v in paths.items() if k != "user"}
+    if not req.user_id or "episode" not in paths:
+        return paths
+    try:
+        user = await feeds.publish_to_user(req.user_id, req.topics, req.source_type.value,
+                                           req.target_languages()[0], paths["episode"])
+    except Exception as e:
+        logger.warning("Feed publishing failed: %s", e)
+        return paths
+    if user:
+        paths["user"] = user
+    return paths
+
+def without_inline_audio(response: dict) -> dict:
+    """Copy of a brief without its base64 audio, for sharing with coalesced duplicates."""
+    shared = {k: v for k, v in response.items() if k != "audio_content"}
+    if "localized" in response:
+        shared["localized"] = {lang: {k: v for k, v in loc.items() if k != "audio_content"}
+                               for lang, loc in response["localized"].items()}
+    return shared
+
+def _read_inline_audio(audio_url: str) -> Optional[str]:
+    path = audio_store.resolve(audio_url.rsplit("/", 1)[-1])
+    if path is None:
+        logger.warning("Shared audio not found locally", extra={"audio_url": audio_url})
+        return None
+    return base64.b64encode(path.read_bytes()).decode()
+
+async def with_inline_audio(response: dict) -> dict:
+    """Put back the base64 audio that without_inline_audio() left out, read from the audio store."""
+    response = {**response, "audio_content": await asyncio.to_thread(_read_inline_audio, response["audio_url"])}
+    if "localized" in response:
+        response["localized"] = {
+            lang: {**loc, "audio_content": await asyncio.to_thread(_read_inline_audio, loc["audio_url"])}
+            for lang, loc in response["localized"].items()
+        }
+    return response
+
+def seen_index_for(req: NewsRequest) -> Optional[SeenIndex]:
+    """Return the user's seen-headline index for a "since" request, else None."""
+    return SeenIndex(req.user_id) if req.since else None
 
 @app.post("/generate-news-audio")
-async def generate_news_audio(req: NewsRequest):
+async def generate_news_audio(req: NewsRequest, request: Request):
+    # Opt-in statistical profile of the whole brief (X-Profile: 1, ?profile=1 or PROFILE_SAMPLE_RATE)
+    with profiling.maybe_profile(request) as profile_url:
+        response = await _generate_news_audio(with_client_audio_profile(req, request))
+    if profile_url:
+        response.headers["X-Profile-URL"] = profile_url
+    return response
+
+async def _generate_news_audio(req: NewsRequest) -> JSONResponse:
     try:
-        print(f"[{datetime.now()}] 📥 RECEIVED REQUEST:")
-        print(f"[{datetime.now()}]    Topics: {req.topics}")
-        print(f"[{datetime.now()}]    Source Type: {req.source_type}")
-        print(f"[{datetime.now()}]    Language: {req.language}")
-        
-        results = {}
-        total_start_time = datetime.now()
-
-        # News Scraping
-        if req.source_type in {"news", "both", "all"}:
-            print(f"[{datetime.now()}] 📰 STARTING NEWS SCRAPING...")
-            news_start = datetime.now()
-            news_scraper = NewsScraper()
-            results["news"] = await news_scraper.scrape_news(req.topics)
-            news_duration = (datetime.now() - news_start).total_seconds()
-            print(f"[{datetime.now()}] 📰 NEWS SCRAPING COMPLETED in {news_duration:.2f}s")
-            print(f"[{datetime.now()}]    News topics processed: {len(results['news']['news_analysis'])}")
-
-        # Reddit Scraping
-        if req.source_type in {"reddit", "both", "all"}:
-            print(f"[{datetime.now()}] 🔴 STARTING REDDIT SCRAPING...")
-            reddit_start = datetime.now()
-            try:
-                results["reddit"] = await scrape_reddit_topics(req.topics)
-                reddit_duration = (datetime.now() - reddit_start).total_seconds()
-                print(f"[{datetime.now()}] 🔴 REDDIT SCRAPING COMPLETED in {reddit_duration:.2f}s")
-                print(f"[{datetime.now()}]    Reddit topics processed: {len(results['reddit']['reddit_analysis'])}")
-            except Exception as e:
-                print(f"[{datetime.now()}] 🔴 REDDIT SCRAPING FAILED: {str(e)}")
-                results["reddit"] = {"reddit_analysis": {t: "Reddit unavailable" for t in req.topics}}
+        logger.info("Received request", extra={
+            "topics": req.topics, "source_type": req.source_type, "languages": req.target_languages(),
+        })
+
+        total_start_time = time.perf_counter()
+        deadline.start(req.deadline_seconds)
+        computed, queued = False, 0.0
+
+        async def compute() -> dict:
+            nonlocal computed, queued
+            computed = True
+            # Only the computation is admitted: coalesced duplicates just wait for it
+            async with admission.admit(brief_cost(req), INTERACTIVE) as queued:
+                seen = seen_index_for(req)
+                results = await scrape_sources(req.topics, SOURCES_BY_TYPE.get(req.source_type, set()), seen)
+                return await build_brief(req, results, total_start_time, seen, user_feed=False)
+
+        # Identical requests already in flight (on any worker) share one computation
+        # (waiters get the audio by digest rather than as a base64 copy in shared state)
+        response = await single_flight(f"brief:{req.canonical_key()}", compute, ttl=COALESCE_LOCK_TTL_SECONDS,
+                                       share=without_inline_audio)
+        if not computed and req.inline_audio and response.get("audio_url"):
+            response = await with_inline_audio(response)
+        response = {**response, "metadata": {**response["metadata"], "queued_seconds": round(queued, 3)}}
+        if not computed:
+            response["metadata"]["coalesced"] = True
+        # The shared brief is in no user's feed yet: each requester adds it to their own
+        if response["metadata"].get("feeds"):
+            response["metadata"]["feeds"] = await publish_user_feed(req, response["metadata"]["feeds"])
+
+        logger.info("Request completed", extra={
+            "seconds": response["metadata"]["processing_time"], "coalesced": not computed,
+        })
+        return JSONResponse(response)
+
+    except (Overloaded, TooLarge, HTTPException):
+        raise
+    except FlightError as e:
+        # The computation we waited for failed: fail the same way it did
+        if e.retry_after is not None:
+            raise Overloaded(str(e), e.retry_after)
+        raise HTTPException(status_code=e.status_code or 500, detail=str(e))
+    except Exception as e:
+        logger.exception("Request failed: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/generate-news-audio/jobs")
+async def create_news_audio_job(req: NewsRequest, request: Request):
+    """
+    Queue a brief for any worker and return its job id right away.
+    Progress is available as Server-Sent Events from /jobs/{job_id}/events.
+    """
+    # Refuse up front rather than accept a job that would sit in the queue
+    admission.check(brief_cost(req), INTERACTIVE)
+    job_id = progress.new_job_id()
+    # Job clients fetch audio by URL, so skip the base64 copy
+    req = with_client_audio_profile(req, request).model_copy(update={"inline_audio": False})
+    logger.info("Received job", extra={"topics": req.topics, "source_type": req.source_type, "job_id": job_id})
+    await progress.mark_queued(job_id)
+    await job_queue.put({"job_id": job_id, "request_id": request_id_var.get(), "request": req.model_dump(mode="json")})
+    return JSONResponse({"job_id": job_id, "events_url": f"/jobs/{job_id}/events"}, status_code=202)
+
+async def run_job(item: dict) -> None:
+    """Generate one queued brief, emitting its progress into the job."""
+    request_id_var.set(item.get("request_id") or uuid.uuid4().hex)
+    req = NewsRequest.model_validate(item["request"])
+    job = progress.create_job(item["job_id"])
+    try:
+        total_start_time = time.perf_counter()
+        deadline.start(req.deadline_seconds)
+        async with admission.admit(brief_cost(req), INTERACTIVE):
+            seen = seen_index_for(req)
+            results = await scrape_sources(req.topics, SOURCES_BY_TYPE.get(req.source_type, set()), seen)
+            response = await build_brief(req, results, total_start_time, seen)
+        job.result = response
+        progress.emit("completed", result=job.result)
+        logger.info("Job completed", extra={"seconds": response["metadata"]["processing_time"]})
+    except Exception as e:
+        logger.exception("Job failed: %s", e)
+        progress.emit("failed", error=str(e))
+
+async def job_worker() -> None:
+    """Take jobs off the shared queue one at a time until cancelled."""
+    while True:
+        try:
+            item = await job_queue.get(timeout=5)
+        except Exception as e:
+            # Shared state outage: keep the worker alive and retry
+            logger.warning("Job queue unavailable: %s", e)
+            await asyncio.sleep(5)
+            continue
+        if item is not None:
+            # Own task, so each job gets a fresh copy of the context for its request id, job and deadline
+            await progress.spawn(run_job(item))
+
+@app.get("/jobs/{job_id}")
+async def get_news_audio_job(job_id: str):
+    job = progress.get_job(job_id)
+    if job is not None:
+        return JSONResponse({"job_id": job.id, "status": job.status, "stage": job.stage, "result": job.result})
+    # The job may be queued, or running on another worker
+    remote = await progress.get_remote_status(job_id)
+    if remote is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JSONResponse({"job_id": job_id, **remote})
+
+@app.get("/jobs/{job_id}/events")
+async def stream_news_audio_job(job_id: str):
+    """Server-Sent Events stream of a job's progress, replayed from the start."""
+    if progress.get_job(job_id) is None and await progress.get_remote_status(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    events = progress.follow_any(job_id)
+
+    async def event_stream():
+        async for event in events:
+            yield progress.format_sse(event)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@app.get("/requests/{request_id}/artifacts")
+async def list_request_artifacts(request_id: str):
+    """List what was stored for a request (by its X-Request-ID), without payloads."""
+    artifacts = await asyncio.to_thread(artifact_store.load, request_id)
+    if not artifacts:
+        raise HTTPException(status_code=404, detail="No artifacts for this request")
+    return JSONResponse({"request_id": request_id, "artifacts": [
+        {k: v for k, v in doc.items() if k != "data"} for doc in artifacts
+    ]})
 
-        # Twitter Scraping
-        if req.source_type in {"twitter", "all"}:
-            print(f"[{datetime.now()}] 🐦 STARTING TWITTER SCRAPING...")
-            twitter_start = datetime.now()
+@app.get("/requests/{request_id}/brief")
+async def get_request_brief(request_id: str):
+    """
+    The brief a past request produced (script and audio URLs per language),
+    read back from the artifact store instead of generating it again.
+    """
+    stored = await asyncio.to_thread(artifact_store.load, request_id, "brief")
+    if not stored:
+        raise HTTPException(status_code=404, detail="No brief stored for this request")
+    return JSONResponse({"request_id": request_id, "created": stored[-1]["ts"], **stored[-1]["data"]})
+
+@app.get("/requests/{request_id}/profile")
+async def get_request_profile(request_id: str, format: str = "speedscope"):
+    """
+    Profile of a profiled request: a speedscope document (open it at
+    https://www.speedscope.app) or, with ?format=folded, folded stacks for
+    flamegraph.pl / inferno.
+    """
+    stored = await asyncio.to_thread(artifact_store.load, request_id, "profile")
+    if not stored:
+        raise HTTPException(status_code=404, detail="No profile for this request")
+    doc = stored[-1]["data"]
+    if format == "folded":
+        return Response(profiling.folded(doc), media_type="text/plain")
+    return JSONResponse(doc, headers={
+        "Content-Disposition": f'attachment; filename="{request_id}.speedscope.json"',
+    })
+
+@app.post("/requests/{request_id}/replay")
+async def replay_news_audio(request_id: str, req: NewsRequest, request: Request):
+    """
+    Rebuild a brief from a past request's stored source results, without
+    scraping again. Useful to try another broadcast prompt, provider, language
+    or voice on the exact same inputs.
+    """
+    stored = await asyncio.to_thread(artifact_store.load, request_id, "source_results")
+    if not stored:
+        raise HTTPException(status_code=404, detail="No stored source results for this request")
+    # Batches store one result set per scraped chunk; merge them, later ones winning
+    results: Dict[str, dict] = {}
+    for doc in stored:
+        for source, data in doc["data"].items():
+            for field, value in data.items():
+                if isinstance(value, dict):
+                    results.setdefault(source, {}).setdefault(field, {}).update(value)
+                else:
+                    results.setdefault(source, {})[field] = value
+    missing = [t for t in req.topics if not any(t in src.get(f"{name}_analysis", {}) for name, src in results.items())]
+    if missing:
+        raise HTTPException(status_code=422, detail=f"Topics not in the stored results: {missing}")
+    req = with_client_audio_profile(req, request)
+    try:
+        deadline.start(req.deadline_seconds)
+        async with admission.admit(brief_cost(req, scraped=False), INTERACTIVE):
+            response = await build_brief(req, results, time.perf_counter(), publish=False)
+        response["metadata"]["replayed_from"] = request_id
+        return JSONResponse(response)
+    except (Overloaded, TooLarge):
+        raise
+    except Exception as e:
+        logger.exception("Replay failed: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/generate-news-audio/batch")
+async def generate_news_audio_batch(batch: BatchNewsRequest):
+    """
+    Generate briefs for many requests, scraping each (source, topic) pair once.
+    Briefs are returned in request order; a failed brief carries an "error" key
+    instead of failing the whole batch.
+    """
+    try:
+        total_start_time = time.perf_counter()
+        # Scraping is shared, so the whole batch runs under its most generous deadline
+        deadline.start(max((req.deadline_seconds or deadline.DEFAULT_DEADLINE_SECONDS for req in batch.requests),
+                           default=None))
+
+        # Union of (source, topic) pairs across all requests, in first-seen order.
+        # "since" requests depend on the user's history, so they scrape on their own.
+        topics_by_source: Dict[str, Dict[str, None]] = {}
+        for req in batch.requests:
+            if req.since:
+                continue
+            for source in SOURCES_BY_TYPE.get(req.source_type, set()):
+                topics_by_source.setdefault(source, {}).update(dict.fromkeys(req.topics))
+
+        unique_pairs = sum(len(topics) for topics in topics_by_source.values())
+        requested_pairs = sum(len(req.topics) * len(SOURCES_BY_TYPE.get(req.source_type, ()))
+                              for req in batch.requests)
+        logger.info("Received batch", extra={
+            "requests": len(batch.requests), "unique_pairs": unique_pairs, "requested_pairs": requested_pairs,
+        })
+
+        # Each scrape chunk and each brief is admitted on its own, queued behind interactive
+        # work, so a batch of any size fits the batch share; shed it whole if even one unit
+        # would queue too long
+        admission.check(BRIEF_COST, BATCH)
+        # Scrape every pair exactly once, in chunks with bounded concurrency
+        scrape_semaphore = asyncio.Semaphore(BATCH_SCRAPE_CONCURRENCY)
+        # Per-topic fields of each source's results, e.g. {"reddit": {"reddit_analysis": {...}, "reddit_signals": {...}}}
+        shared: Dict[str, Dict[str, dict]] = {source: {} for source in topics_by_source}
+        # Non-per-topic fields of a source's results, e.g. news "content" in fused mode
+        shared_extra: Dict[str, dict] = {source: {} for source in topics_by_source}
+
+        async def scrape_chunk(source: str, chunk: List[str]):
             try:
-                results["twitter"] = await scrape_twitter_topics(req.topics)
-                twitter_duration = (datetime.now() - twitter_start).total_seconds()
-                print(f"[{datetime.now()}] 🐦 TWITTER SCRAPING COMPLETED in {twitter_duration:.2f}s")
-                print(f"[{datetime.now()}]    Twitter topics processed: {len(results['twitter']['twitter_analysis'])}")
+                async with scrape_semaphore:
+                    async with admission.admit(SOURCE_COSTS.get(source, 1.0) * len(chunk), BATCH):
+                        chunk_results = await scrape_sources(chunk, {source})
+                for field, value in chunk_results[source].items():
+                    if isinstance(value, dict):
+                        shared[source].setdefault(field, {}).update(value)
+                    else:
+                        shared_extra[source][field] = value
             except Exception as e:
-                print(f"[{datetime.now()}] 🐦 TWITTER SCRAPING FAILED: {str(e)}")
-                results["twitter"] = {"twitter_analysis": {t: "Twitter unavailable" for t in req.topics}}
+                # Keep the rest of the batch alive; affected briefs mention the gap
+                logger.warning("Batch scrape failed: %s", e, extra={"source": source, "topics": chunk})
+                shared[source].setdefault(f"{source}_analysis", {}).update(
+                    {t: sources.SOURCES[source].unavailable(t) for t in chunk})
 
-        # Summary Generation
-        print(f"[{datetime.now()}] ✨ GENERATING BROADCAST SUMMARY...")
-        summary_start = datetime.now()
-        summary_en = generate_broadcast_news(
-            api_key=os.getenv("GEMINI_API_KEY"),
-            news_data=results.get("news"),
-            reddit_data=results.get("reddit"),
-            twitter_data=results.get("twitter"),
-            topics=req.topics,
-        )
-        summary_duration = (datetime.now() - summary_start).total_seconds()
-        print(f"[{datetime.now()}] ✨ SUMMARY GENERATED in {summary_duration:.2f}s")
-        print(f"[{datetime.now()}]    Summary length: {len(summary_en)} characters")
-
-        # Translation
-        if req.language != "en-US":
-            print(f"[{datetime.now()}] 🌐 TRANSLATING TO {req.language}...")
-            translate_start = datetime.now()
-            final_summary = translate_for_language(os.getenv("GEMINI_API_KEY"), summary_en, req.language)
-            translate_duration = (datetime.now() - translate_start).total_seconds()
-            print(f"[{datetime.now()}] 🌐 TRANSLATION COMPLETED in {translate_duration:.2f}s")
-        else:
-            final_summary = summary_en
-            print(f"[{datetime.now()}] 🌐 NO TRANSLATION NEEDED (English)")
-
-        # Audio Generation
-        print(f"[{datetime.now()}] 🔊 GENERATING AUDIO...")
-        audio_start = datetime.now()
-        voice_id = get_voice_for_language(req.language)
-        audio_path = text_to_audio_murf(
-            text=final_summary,
-            voice_id=voice_id,
-            language=req.language,
-            output_dir="audio",
-        )
-        audio_duration = (datetime.now() - audio_start).total_seconds()
-        print(f"[{datetime.now()}] 🔊 AUDIO GENERATED in {audio_duration:.2f}s")
-        print(f"[{datetime.now()}]    Audio file: {audio_path}")
+        chunks = []
+        for source, topics in topics_by_source.items():
+            topic_list = list(topics)
+            # Small enough for a chunk to be admitted within the batch share
+            per_chunk = max(1, min(BATCH_TOPICS_PER_CALL,
+                                   int(admission.limits[BATCH] // SOURCE_COSTS.get(source, 1.0))))
+            for i in range(0, len(topic_list), per_chunk):
+                chunks.append(scrape_chunk(source, topic_list[i:i + per_chunk]))
+        await asyncio.gather(*chunks)
 
-        if not (audio_path and Path(audio_path).exists()):
-            raise RuntimeError("Audio generation failed")
+        logger.info("Batch scraping completed", extra={"seconds": elapsed(total_start_time)})
 
-        # Encoding
-        print(f"[{datetime.now()}] 📊 ENCODING AUDIO FOR RESPONSE...")
-        audio_b64 = base64.b64encode(Path(audio_path).read_bytes()).decode()
-        audio_size_mb = len(audio_b64) * 0.75 / 1024 / 1024  # Approximate size
-        print(f"[{datetime.now()}] 📊 AUDIO ENCODED: {audio_size_mb:.2f} MB")
+        # Assemble each user's brief from the shared per-topic results
+        brief_semaphore = asyncio.Semaphore(BATCH_BRIEF_CONCURRENCY)
+
+        async def run_brief(req: NewsRequest) -> dict:
+            try:
+                # "since" briefs scrape on their own; the others only pay for their languages
+                cost = brief_cost(req) if req.since else len(req.target_languages()) * BRIEF_COST
+                async with brief_semaphore, admission.admit(cost, BATCH):
+                    if req.since:
+                        seen = seen_index_for(req)
+                        results = await scrape_sources(req.topics, SOURCES_BY_TYPE.get(req.source_type, set()), seen)
+                        return await build_brief(req, results, total_start_time, seen)
+                    results = {
+                        source: {**shared_extra[source], **{
+                            field: {t: values[t] for t in req.topics if t in values}
+                            for field, values in shared[source].items()
+                        }}
+                        for source in SOURCES_BY_TYPE.get(req.source_type, set())
+                    }
+                    return await build_brief(req, results, total_start_time)
+            except Exception as e:
+                logger.warning("Batch brief failed: %s", e, extra={"topics": req.topics})
+                return {"error": str(e), "metadata": {"topics": req.topics, "sources": req.source_type.value}}
+
+        briefs = await asyncio.gather(*(run_brief(req) for req in batch.requests))
 
-        total_duration = (datetime.now() - total_start_time).total_seconds()
-        print(f"[{datetime.now()}] ✅ REQUEST COMPLETED in {total_duration:.2f}s")
+        total_duration = elapsed(total_start_time)
+        logger.info("Batch completed", extra={"seconds": total_duration})
 
         return JSONResponse({
-            "summary_text": final_summary,
-            "audio_content": audio_b64,
+            "briefs": briefs,
             "metadata": {
-                "topics": req.topics,
-                "sources": req.source_type,
-                "language": req.language,
+                "requests": len(batch.requests),
+                "unique_pairs": unique_pairs,
+                "requested_pairs": requested_pairs,
                 "processing_time": total_duration
             }
         })
 
+    except (Overloaded, TooLarge):
+        raise
     except Exception as e:
-        print(f"[{datetime.now()}] ❌ ERROR: {str(e)}")
-        traceback.print_exc()
+        logger.exception("Batch failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("backend:app", host="0.0.0.0", port=1234, reload=True)
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    # Several workers need a distributed SHARED_STATE_URL; reload only works with one
+    uvicorn.run("backend:app", host="0.0.0.0", port=1234, reload=workers == 1, workers=workers)
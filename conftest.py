@@ -0,0 +1,14 @@
+import os
+
+import pytest
+
+# Keep test runs from writing artifacts into the working tree
+os.environ.setdefault("ARTIFACTS_ENABLED", "false")
+
+import shared_state  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def fresh_shared_state(monkeypatch):
+    """Each test starts from empty in-process shared state (caches, locks, queues)."""
+    monkeypatch.setattr(shared_state, "_state", shared_state.InProcessState())
@@ -0,0 +1,108 @@
+import contextvars
+import os
+import time
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from tenacity import RetryCallState
+from tenacity.stop import stop_base
+
+load_dotenv()
+
+# Budget for a brief when the client doesn't send `deadline_seconds`, and the most it may ask for
+DEFAULT_DEADLINE_SECONDS = float(os.getenv("DEFAULT_DEADLINE_SECONDS", "180"))
+MAX_DEADLINE_SECONDS = float(os.getenv("MAX_DEADLINE_SECONDS", "600"))
+# Time kept back during scraping for the broadcast script, translation and TTS
+BRIEF_RESERVE_SECONDS = float(os.getenv("BRIEF_RESERVE_SECONDS", "45"))
+# Below this remaining budget the broadcast script is shortened
+SHORT_SCRIPT_BELOW_SECONDS = float(os.getenv("SHORT_SCRIPT_BELOW_SECONDS", "60"))
+# Essential stages (broadcast, TTS) always get at least this long, even past the deadline
+ESSENTIAL_MIN_SECONDS = float(os.getenv("ESSENTIAL_MIN_SECONDS", "15"))
+
+# Absolute time.monotonic() deadline of the current request
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("deadline", default=None)
+# What was cut to stay within the deadline; the list is shared with child tasks and threads
+_degraded: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar("degraded", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage has no budget left to run in"""
+    pass
+
+
+def start(seconds: Optional[float] = None) -> float:
+    """
+    Set the deadline of the current context (request or job).
+    Args:
+        seconds: Requested budget; defaults to DEFAULT_DEADLINE_SECONDS, capped at MAX_DEADLINE_SECONDS
+    Returns:
+        float: The budget actually granted, in seconds
+    """
+    budget_seconds = min(seconds or DEFAULT_DEADLINE_SECONDS, MAX_DEADLINE_SECONDS)
+    _deadline.set(time.monotonic() + budget_seconds)
+    _degraded.set([])
+    return budget_seconds
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the deadline (negative once past it), or None without a deadline."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def budget(cap: float, reserve: float = 0.0, floor: float = 0.0) -> float:
+    """
+    Timeout for a stage: at most `cap`, and no more than what is left after
+    keeping `reserve` seconds for later stages, but never below `floor`.
+    Without a deadline this is just `cap`.
+    """
+    left = remaining()
+    if left is None:
+        return cap
+    return max(min(cap, left - reserve), floor)
+
+
+def timeout(reserve: float = 0.0, floor: float = 0.0) -> Optional[float]:
+    """Like budget() without a cap: None (no timeout) when there is no deadline."""
+    left = remaining()
+    return None if left is None else max(left - reserve, floor)
+
+
+def check(stage: str, reserve: float = 0.0) -> None:
+    """
+    Raises:
+        DeadlineExceeded: If less than `reserve` seconds are left for `stage`
+    """
+    left = remaining()
+    if left is not None and left <= reserve:
+        raise DeadlineExceeded(f"No time budget left for {stage}")
+
+
+def note(degradation: str) -> None:
+    """Record that something was cut short or skipped to meet the deadline."""
+    degraded = _degraded.get()
+    if degraded is not None and degradation not in degraded:
+        degraded.append(degradation)
+
+
+def report() -> Optional[dict]:
+    """Deadline summary for response metadata, or None without a deadline."""
+    left = remaining()
+    if left is None:
+        return None
+    return {"remaining_seconds": round(left, 3), "degraded": list(_degraded.get() or [])}
+
+
+class stop_before_deadline(stop_base):
+    """
+    Tenacity stop condition: give up when the next wait plus `reserve`
+    seconds would no longer fit in the remaining budget.
+    Combine with an attempt limit, e.g. stop_after_attempt(3) | stop_before_deadline(30).
+    """
+
+    def __init__(self, reserve: float = 0.0):
+        self.reserve = reserve
+
+    def __call__(self, retry_state: RetryCallState) -> bool:
+        left = remaining()
+        return left is not None and left - (retry_state.upcoming_sleep or 0) <= self.reserve
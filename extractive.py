@@ -0,0 +1,144 @@
+import os
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Items kept per topic before the LLM sees them (0 disables the stage)
+EXTRACTIVE_HEADLINES_K = int(os.getenv("EXTRACTIVE_HEADLINES_K", "12"))
+EXTRACTIVE_SENTENCES_K = int(os.getenv("EXTRACTIVE_SENTENCES_K", "8"))
+# Character budget of a condensed text (0 = no limit)
+EXTRACTIVE_MAX_CHARS = int(os.getenv("EXTRACTIVE_MAX_CHARS", "0"))
+
+_WORD = re.compile(r"[^\W\d_]{2,}", re.UNICODE)
+_SENTENCE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Function words carry no signal about what an item is about
+_STOPWORDS = frozenset("""
+a an and are as at be been but by for from has have he her his in is it its of on or
+our said says she that the their they this to was were will with you your after over
+about into more than new not who what when where which how why all also can could
+""".split())
+
+
+def _terms(text: str) -> List[str]:
+    return [w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS]
+
+
+def tfidf_matrix(items: List[str]) -> np.ndarray:
+    """
+    L2-normalized TF-IDF vectors, one row per item.
+    Returns:
+        np.ndarray: Shape (len(items), vocabulary size)
+    """
+    docs = [_terms(item) for item in items]
+    vocab: Dict[str, int] = {}
+    for doc in docs:
+        for term in doc:
+            vocab.setdefault(term, len(vocab))
+    tf = np.zeros((len(docs), max(len(vocab), 1)))
+    for row, doc in enumerate(docs):
+        for term in doc:
+            tf[row, vocab[term]] += 1
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log((1 + len(docs)) / (1 + df)) + 1
+    weights = np.log1p(tf) * idf
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    return weights / np.where(norms == 0, 1, norms)
+
+
+def textrank_scores(items: List[str], damping: float = 0.85, iterations: int = 50) -> np.ndarray:
+    """
+    Centrality of each item: PageRank over the cosine-similarity graph of
+    their TF-IDF vectors. Items that share vocabulary with many others score
+    highest, so one-off noise ranks last.
+    """
+    vectors = tfidf_matrix(items)
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0)
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    # Items similar to nothing spread their rank evenly
+    transition = np.where(out_weight > 0, similarity / np.where(out_weight == 0, 1, out_weight), 1 / len(items))
+    scores = np.full(len(items), 1 / len(items))
+    for _ in range(iterations):
+        updated = (1 - damping) / len(items) + damping * transition.T @ scores
+        if np.abs(updated - scores).sum() < 1e-6:
+            return updated
+        scores = updated
+    return scores
+
+
+def top_k(items: List[str], k: int) -> List[str]:
+    """Return the `k` most central items, in their original order."""
+    if k <= 0 or len(items) <= k:
+        return items
+    keep = np.sort(np.argsort(-textrank_scores(items), kind="stable")[:k])
+    return [items[i] for i in keep]
+
+
+def top_headlines(headlines: str, k: int = EXTRACTIVE_HEADLINES_K) -> str:
+    """
+    Keep the most central of a newline-separated headline list.
+    Args:
+        headlines: Output of extract_headlines()
+        k: Headlines to keep (0 keeps all)
+    Returns:
+        str: Selected headlines, newline-separated
+    """
+    items = list(dict.fromkeys(h.strip() for h in headlines.split("\n") if h.strip()))
+    return "\n".join(top_k(items, k))
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    """Cut text to at most `max_chars`, at a word boundary when there is one."""
+    if len(text) <= max_chars:
+        return text
+    head = text[:max_chars + 1]
+    return head.rsplit(" ", 1)[0] if " " in head else text[:max_chars]
+
+
+def condense_text(text: str, k: int = EXTRACTIVE_SENTENCES_K, max_chars: int = 0) -> str:
+    """
+    Keep the `k` most central sentences of a longer text (e.g. a Reddit
+    analysis), in their original order.
+    Args:
+        k: Sentences to keep (0 keeps none)
+        max_chars: Character budget (0 = none); less central sentences are
+            dropped to fit it, and a most central sentence longer than the
+            budget on its own is cut at a word boundary
+    Returns:
+        str: The condensed text ("" for k <= 0)
+    """
+    if k <= 0:
+        return ""
+    sentences = [s.strip() for s in _SENTENCE.split(text) if s.strip()]
+    if len(sentences) <= k and (not max_chars or len(text) <= max_chars):
+        return text
+    if not sentences:
+        return ""
+    ranked = np.argsort(-textrank_scores(sentences), kind="stable")[:k]
+    kept, used = [], 0
+    for i in ranked:
+        length = len(sentences[i]) + (1 if kept else 0)
+        if max_chars and used + length > max_chars:
+            continue
+        kept.append(i)
+        used += length
+    if not kept:
+        return _truncate(sentences[ranked[0]], max_chars)
+    return " ".join(sentences[i] for i in sorted(kept))
+
+
+def condense_analysis(data: Optional[dict], field: str, k: int = EXTRACTIVE_SENTENCES_K,
+                      max_chars: int = EXTRACTIVE_MAX_CHARS) -> Optional[dict]:
+    """
+    Condense every per-topic text of a scraper result, e.g.
+    condense_analysis(results["reddit"], "reddit_analysis"). k=0 leaves
+    the texts as they are (stage disabled).
+    """
+    if not data or field not in data or k <= 0:
+        return data
+    return {**data, field: {topic: condense_text(text, k, max_chars) for topic, text in data[field].items()}}
@@ -0,0 +1,195 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+import xml.etree.ElementTree as ET
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from log import get_logger
+from audio_store import audio_store
+import audio_profiles
+from http_caching import http_date
+from shared_state import get_shared_state, key
+
+load_dotenv()
+
+logger = get_logger("feeds")
+
+FEEDS_ENABLED = os.getenv("FEEDS_ENABLED", "true").lower() == "true"
+# Episodes listed per feed (older ones are dropped)
+FEED_MAX_EPISODES = int(os.getenv("FEED_MAX_EPISODES", "50"))
+# A feed nobody publishes to disappears after this long
+FEED_TTL_DAYS = float(os.getenv("FEED_TTL_DAYS", "30"))
+# How long podcast clients and CDNs may reuse a feed document
+FEED_MAX_AGE_SECONDS = int(os.getenv("FEED_MAX_AGE_SECONDS", "300"))
+# Keeps per-user feed ids unguessable from the user id; set it in production
+FEED_SECRET = os.getenv("FEED_SECRET", "")
+# Absolute base for enclosure URLs, e.g. "https://news.example.com" (defaults to the request URL)
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "")
+# Enclosure format; podcast apps reliably play MP3 only
+FEED_AUDIO_PROFILE = os.getenv("FEED_AUDIO_PROFILE", audio_profiles.profile_for_client("podcast"))
+
+ITUNES_NS = "http://www.itunes.com/dtds/podcast-1.0.dtd"
+ET.register_namespace("itunes", ITUNES_NS)
+
+
+def topic_feed_id(topics: List[str], source_type: str, language: str) -> str:
+    """Feed id shared by every brief on the same topic set, sources and language."""
+    doc = json.dumps([sorted(t.casefold() for t in topics), source_type, language])
+    return "t-" + hashlib.sha256(doc.encode()).hexdigest()[:20]
+
+
+def user_feed_id(user_id: str) -> str:
+    """Private feed id of one subscriber (derived with FEED_SECRET)."""
+    return "u-" + hashlib.sha256(f"{FEED_SECRET}:{user_id}".encode()).hexdigest()[:24]
+
+
+async def publish(feed_id: str, title: str, episode: dict) -> None:
+    """
+    Append an episode to a feed.
+    Args:
+        feed_id: topic_feed_id() or user_feed_id()
+        title: Feed title (the latest publish wins)
+        episode: guid, title, description, audio_digest, size, media_type, duration, language, published
+    """
+    state = get_shared_state()
+    ttl = FEED_TTL_DAYS * 86400
+    episodes_key = key("feed", feed_id, "episodes")
+    await state.rpush(episodes_key, json.dumps(episode), ttl)
+    await state.ltrim(episodes_key, -FEED_MAX_EPISODES, -1)
+    await state.set_json(key("feed", feed_id, "meta"), {"title": title, "updated": episode["published"]}, ttl)
+
+
+async def load(feed_id: str) -> Optional[dict]:
+    """
+    Returns:
+        Optional[dict]: {"title", "updated", "episodes"} with the newest episode first, or None
+    """
+    state = get_shared_state()
+    meta = await state.get_json(key("feed", feed_id, "meta"))
+    if meta is None:
+        return None
+    raw = await state.lrange(key("feed", feed_id, "episodes"), -FEED_MAX_EPISODES, -1)
+    return {**meta, "episodes": [json.loads(item) for item in reversed(raw)]}
+
+
+def _duration(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def render_rss(feed_id: str, feed: dict, base_url: str) -> bytes:
+    """RSS 2.0 podcast document (with iTunes tags) for a loaded feed."""
+    base_url = (PUBLIC_BASE_URL or base_url).rstrip("/")
+    rss = ET.Element("rss", {"version": "2.0"})
+    channel = ET.SubElement(rss, "channel")
+    ET.SubElement(channel, "title").text = feed["title"]
+    ET.SubElement(channel, "link").text = f"{base_url}/feeds/{feed_id}.xml"
+    ET.SubElement(channel, "description").text = f"NewsNinja audio briefs: {feed['title']}"
+    ET.SubElement(channel, "lastBuildDate").text = http_date(feed["updated"])
+    ET.SubElement(channel, "ttl").text = str(max(FEED_MAX_AGE_SECONDS // 60, 1))
+    ET.SubElement(channel, f"{{{ITUNES_NS}}}author").text = "NewsNinja"
+    ET.SubElement(channel, f"{{{ITUNES_NS}}}explicit").text = "false"
+    if feed["episodes"]:
+        ET.SubElement(channel, "language").text = feed["episodes"][0]["language"]
+    for episode in feed["episodes"]:
+        item = ET.SubElement(channel, "item")
+        ET.SubElement(item, "title").text = episode["title"]
+        ET.SubElement(item, "description").text = episode["description"]
+        ET.SubElement(item, "guid", {"isPermaLink": "false"}).text = episode["guid"]
+        ET.SubElement(item, "pubDate").text = http_date(episode["published"])
+        ET.SubElement(item, "enclosure", {
+            "url": f"{base_url}/audio/{episode['audio_digest']}",
+            "length": str(episode["size"]),
+            "type": episode.get("media_type", "audio/mpeg"),
+        })
+        if episode.get("duration"):
+            ET.SubElement(item, f"{{{ITUNES_NS}}}duration").text = _duration(episode["duration"])
+    return ET.tostring(rss, encoding="utf-8", xml_declaration=True)
+
+
+def episode_audio_exists(episode: dict) -> bool:
+    """Whether an episode's audio file is still stored (retention may have removed it)."""
+    ext = {v: k for k, v in audio_profiles.MEDIA_TYPES.items()}.get(episode.get("media_type"), "mp3")
+    return audio_store.path_for(episode["audio_digest"], ext).exists()
+
+
+def _episode(topics: List[str], localized: dict, digest: str, audio_entry: dict) -> dict:
+    """
+    Build a feed episode from one localized brief.
+    Args:
+        topics: Topics of the brief
+        localized: localize_brief() output
+        digest: Digest of the enclosure audio
+        audio_entry: Audio store index entry of the enclosure audio
+    """
+    now = time.time()
+    return {
+        "guid": f"{digest}:{localized['language']}",
+        "title": f"{', '.join(topics)} - {time.strftime('%Y-%m-%d %H:%M UTC', time.gmtime(now))}",
+        "description": localized["summary_text"][:4000],
+        "audio_digest": digest,
+        "size": audio_entry.get("size", 0),
+        "media_type": audio_profiles.media_type_for(audio_entry) if audio_entry else "audio/mpeg",
+        "duration": localized.get("audio_duration"),
+        "language": localized["language"],
+        "published": now,
+    }
+
+
+async def publish_brief(topics: List[str], source_type: str, localized: dict,
+                        user_id: Optional[str] = None, topic_feeds: bool = True) -> dict:
+    """
+    Publish a finished brief: each language to its topic-set feed, and the
+    first language to the user's feed. Enclosures use FEED_AUDIO_PROFILE,
+    whatever profile the requesting client got.
+    Args:
+        localized: localize_brief() outputs keyed by language, primary first
+        user_id: Leave unset for a brief shared by several users; each then calls publish_to_user()
+        topic_feeds: False for a brief only meant for `user_id`, e.g. one of just their unheard headlines
+    Returns:
+        dict: {"topics": {language: feed path}, "episode": guid of the first language's episode,
+               "user": feed path (with user_id)}
+    """
+    paths = {"topics": {}}
+    for n, (language, loc) in enumerate(localized.items()):
+        if not topic_feeds and n > 0:
+            break
+        digest = await asyncio.to_thread(audio_profiles.ensure_variant,
+                                         loc["audio_url"].rsplit("/", 1)[-1], FEED_AUDIO_PROFILE)
+        episode = _episode(topics, loc, digest, audio_store.get(digest) or {})
+        if topic_feeds:
+            feed_id = topic_feed_id(topics, source_type, language)
+            await publish(feed_id, f"{', '.join(topics)} ({language})", episode)
+            paths["topics"][language] = f"/feeds/{feed_id}.xml"
+        if n == 0:
+            paths["episode"] = episode["guid"]
+            if user_id:
+                paths["user"] = await _publish_to_user_feed(user_id, episode)
+    return paths
+
+
+async def _publish_to_user_feed(user_id: str, episode: dict) -> str:
+    feed_id = user_feed_id(user_id)
+    feed = await load(feed_id)
+    # Duplicate requests of one user share a brief; list it once
+    if feed is None or all(e["guid"] != episode["guid"] for e in feed["episodes"]):
+        await publish(feed_id, "My NewsNinja briefs", episode)
+    return f"/feeds/{feed_id}.xml"
+
+
+async def publish_to_user(user_id: str, topics: List[str], source_type: str, language: str,
+                          guid: str) -> Optional[str]:
+    """
+    Add an episode publish_brief() put in a topic-set feed to the user's feed.
+    Returns:
+        Optional[str]: The user's feed path, or None if the episode has left the topic feed
+    """
+    feed = await load(topic_feed_id(topics, source_type, language))
+    episode = next((e for e in (feed or {}).get("episodes", []) if e["guid"] == guid), None)
+    if episode is None:
+        return None
+    return await _publish_to_user_feed(user_id, episode)
@@ -1,12 +1,31 @@
 import streamlit as st
 import requests
-from typing import Literal
-import base64 # Import base64 for encoding/decoding binary data (audio content)
+from typing import Literal, Tuple
+import html
 import os
+import time
+import uuid
 
 # Constants
 SOURCE_TYPES = Literal["news", "reddit", "twitter", "both", "all"]
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:1234")  # Define the URL of the FastAPI backend server
+PUBLIC_BACKEND_URL = os.getenv("PUBLIC_BACKEND_URL", BACKEND_URL)  # Backend URL as the browser sees it (audio links)
+REQUEST_TIMEOUT = (5, 30)  # (connect, read) seconds for every backend call
+BRIEF_CACHE_TTL_SECONDS = int(os.getenv("BRIEF_CACHE_TTL_SECONDS", "1800"))  # Reuse identical briefs this long
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))  # How often a pending brief is polled
+HISTORY_SIZE = 10  # Past briefs kept per session
+# What the user sees for each backend progress stage
+STAGE_LABELS = {
+    "scrape_start": "🔍 Scraping sources...",
+    "topic_start": "🔍 Scraping sources...",
+    "topic_done": "🔍 Scraping sources...",
+    "scrape_done": "🔍 Sources scraped...",
+    "scrape_failed": "🔍 A source failed, carrying on with the others...",
+    "summary_start": "✍️ Writing the broadcast script...",
+    "summary_done": "🌍 Translating and recording audio...",
+    "translation_done": "🎙️ Recording audio...",
+    "audio_ready": "🎙️ Audio ready, finishing up...",
+}
 LANGS = { 
     "English - US & Canada 🇺🇸": "en-US", 
     "Hindi - India 🇮🇳": "hi-IN", 
@@ -29,8 +48,12 @@ def main():
         st.session_state.topics = [] # List to store topics entered by the user
     if 'input_key' not in st.session_state:
         st.session_state.input_key = 0 # Key to manage unique text input widgets for topics
-    if 'news_summary_text' not in st.session_state:
-        st.session_state.news_summary_text = "" # Stores the generated text summary
+    if 'pending_job' not in st.session_state:
+        st.session_state.pending_job = None # Job of the brief being generated: key, job_id, request_id
+    if 'current_brief' not in st.session_state:
+        st.session_state.current_brief = None # Brief on display: summary_text, audio_url, media_type
+    if 'history' not in st.session_state:
+        st.session_state.history = [] # Past briefs (ids and labels only, no audio)
 
     # Sidebar for application settings and instructions
     with st.sidebar:
@@ -112,73 +135,162 @@ def main():
     # Analysis controls and output sections
     st.markdown("---") # Horizontal rule for visual separation
     st.subheader("🔊 Audio Generation") # Subheader for audio output
-    st.subheader("📄 Text Summary") # Subheader for text summary output
 
-    # "Generate Summary" button. Disabled if no topics are selected.
-    if st.button("🚀 Generate Summary", disabled=len(st.session_state.topics) == 0):
+    # "Generate Summary" button. Disabled if no topics are selected or a brief is already on its way.
+    generating = st.session_state.pending_job is not None
+    if st.button("🚀 Generate Summary", disabled=len(st.session_state.topics) == 0 or generating):
         if not st.session_state.topics: # Check if topics list is empty
             st.error("Please add at least one topic") # Display error if no topics
         else:
-            # Display a spinner while processing
-            with st.spinner("🔍 Analyzing topics and generating audio..."):
+            brief_key = (tuple(st.session_state.topics), source_type, lang_code)
+            try:
+                # Returns right away with a job id; identical briefs within the cache TTL reuse the same job
+                st.session_state.pending_job = {"key": brief_key, **submit_brief(*brief_key)}
+                st.rerun()
+            except requests.exceptions.HTTPError as e:
+                # Call error handler if the backend refused the job
+                handle_api_error(e.response)
+            except requests.exceptions.ConnectionError:
+                # Handle connection errors (e.g., backend not running)
+                st.error("🔌 Connection Error: Could not reach the backend server")
+            except requests.exceptions.RequestException as e:
+                # Timeouts and any other transport error
+                st.error(f"⚠️ Request Error: {str(e)}")
+
+    # Progress of the brief being generated, polled in the background
+    job_progress()
+
+    # The current brief: audio streamed from the backend by URL, and its text
+    brief = st.session_state.current_brief
+    if brief:
+        show_brief(brief)
+
+    # Past briefs of this session, replayed from the backend's store without regenerating
+    if st.session_state.history:
+        st.markdown("---")
+        st.subheader("🕘 Recent Briefs")
+        for entry in reversed(st.session_state.history):
+            cols = st.columns([4, 1])
+            cols[0].write(f"{', '.join(entry['topics'])} · {entry['source_type']} · {entry['language']} · "
+                          f"{time.strftime('%H:%M', time.localtime(entry['created']))}")
+            if cols[1].button("Replay ▶️", key=f"replay_{entry['request_id']}"):
                 try:
-                    # Make a POST request to the backend API
-                    response = requests.post(
-                        f"{BACKEND_URL}/generate-news-audio",
-                        json={ # Send topics and source type as JSON payload
-                            "topics": st.session_state.topics,
-                            "source_type": source_type,
-                            "language": lang_code
-                        }
-                    )
-
-                    if response.status_code == 200: # Check if the request was successful
-                        st.session_state.news_summary_text = "" # Clear previous summary text
-                        
-                        # Parse the JSON response from the backend
-                        response_data = response.json()
-                        
-                        # Decode the base64 encoded audio content
-                        audio_bytes = base64.b64decode(response_data['audio_content'])
-                        st.audio(audio_bytes, format="audio/mpeg") # Play the audio in Streamlit
-                        
-                        # Provide a download button for the audio file
-                        st.download_button(
-                            "Download Audio Summary",
-                            data=audio_bytes, # Use decoded bytes for download
-                            file_name="news-summary.mp3",
-                            type="primary"
-                        )
-                        
-                        # Store and display the text summary
-                        st.session_state.news_summary_text = response_data['summary_text']
-
-                    else:
-                        # Call error handler if API request was not successful
-                        handle_api_error(response)
-
-                except requests.exceptions.ConnectionError:
-                    # Handle connection errors (e.g., backend not running)
-                    st.error("🔌 Connection Error: Could not reach the backend server")
-                    st.session_state.news_summary_text = "Error: Could not connect to the backend server."
-                except Exception as e:
-                    # Catch any other unexpected errors
-                    st.error(f"⚠️ Unexpected Error: {str(e)}")
-                    st.session_state.news_summary_text = f"Error: {str(e)}"
-    
-    # Display the text summary section only if there is summary text available
-    if st.session_state.news_summary_text:
-        st.markdown("---") # Horizontal rule before the summary
-        st.subheader("📄 Text Summary") # Subheader for the text summary
-        # Display the text summary within a styled HTML div for better presentation
-        st.markdown(
-            f'<div style="background-color: #26272e; padding: 20px; border-radius: 10px; border: 1px solid #e0e2e6;">'
-            f'<p style="font-family: \'Inter\', sans-serif; font-size: 16px; line-height: 1.6; color: #FAFAFA;">'
-            f'{st.session_state.news_summary_text}'
-            f'</p>'
-            f'</div>',
-            unsafe_allow_html=True # Allow rendering of custom HTML
-        )
+                    st.session_state.current_brief = load_brief(entry["request_id"], entry["language"])
+                    st.rerun()
+                except requests.exceptions.HTTPError as e:
+                    handle_api_error(e.response)
+                except requests.exceptions.RequestException as e:
+                    st.error(f"⚠️ Request Error: {str(e)}")
+
+@st.cache_data(ttl=BRIEF_CACHE_TTL_SECONDS, show_spinner=False)
+def submit_brief(topics: Tuple[str, ...], source_type: str, language: str) -> dict:
+    """
+    Start a brief as a background job on the backend.
+    Cached per (topics, source_type, language): within the TTL the same job,
+    and so its finished result, is reused instead of generating again.
+    Failed submissions raise and are therefore not cached.
+    Returns:
+        dict: {"job_id", "request_id"}
+    """
+    request_id = uuid.uuid4().hex
+    response = requests.post(
+        f"{BACKEND_URL}/generate-news-audio/jobs",
+        json={"topics": list(topics), "source_type": source_type, "language": language},
+        headers={"X-Request-ID": request_id, "X-Client-Type": "web"},
+        timeout=REQUEST_TIMEOUT,
+    )
+    response.raise_for_status()
+    return {"job_id": response.json()["job_id"], "request_id": request_id}
+
+@st.cache_data(ttl=BRIEF_CACHE_TTL_SECONDS, show_spinner=False)
+def load_brief(request_id: str, language: str) -> dict:
+    """
+    Fetch a past brief from the backend's artifact store.
+    Returns:
+        dict: The brief's text, audio URL and media type in `language`
+    """
+    response = requests.get(f"{BACKEND_URL}/requests/{request_id}/brief", timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    localized = response.json()["localized"]
+    brief = localized.get(language) or next(iter(localized.values()))
+    return {
+        "summary_text": brief["summary_text"],
+        "audio_url": brief["audio_url"],
+        "media_type": brief.get("audio_media_type", "audio/mpeg"),
+    }
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def job_progress():
+    """
+    Poll the pending job and show its stage. Runs as a fragment on a timer,
+    so the rest of the page stays usable while the brief is generated.
+    """
+    pending = st.session_state.pending_job
+    if pending is None:
+        return
+    try:
+        response = requests.get(f"{BACKEND_URL}/jobs/{pending['job_id']}", timeout=REQUEST_TIMEOUT)
+        if response.status_code == 404:
+            # The backend restarted or the job expired: forget it so the next click starts afresh
+            submit_brief.clear(*pending["key"])
+            st.session_state.pending_job = None
+            st.error("The brief was lost on the server, please generate it again")
+            return
+        response.raise_for_status()
+        job = response.json()
+    except requests.exceptions.RequestException as e:
+        # Transient: the next poll tries again
+        st.warning(f"⏳ Waiting for the backend... ({str(e)})")
+        return
+
+    if job["status"] == "running":
+        st.info(f"⏳ {STAGE_LABELS.get(job.get('stage'), 'Analyzing topics and generating audio...')}")
+        return
+
+    st.session_state.pending_job = None
+    if job["status"] == "failed":
+        # Don't keep serving a failed job from the cache
+        submit_brief.clear(*pending["key"])
+        st.error("⚠️ The brief could not be generated, please try again")
+        return
+
+    result = job["result"]
+    topics, source_type, language = pending["key"]
+    st.session_state.current_brief = {
+        "summary_text": result["summary_text"],
+        "audio_url": result["audio_url"],
+        "media_type": result["metadata"].get("audio_media_type", "audio/mpeg"),
+    }
+    # History keeps ids and labels only; replays fetch the brief from the backend
+    if not any(e["request_id"] == pending["request_id"] for e in st.session_state.history):
+        st.session_state.history.append({
+            "request_id": pending["request_id"],
+            "topics": list(topics),
+            "source_type": source_type,
+            "language": language,
+            "created": time.time(),
+        })
+        del st.session_state.history[:-HISTORY_SIZE]
+    # Redraw the whole page with the new brief
+    st.rerun()
+
+def show_brief(brief: dict):
+    """Play a brief's audio from the backend by URL and display its text."""
+    audio_url = f"{PUBLIC_BACKEND_URL}{brief['audio_url']}"
+    st.audio(audio_url, format=brief["media_type"]) # The browser streams it straight from the backend
+    st.link_button("Download Audio Summary", audio_url, type="primary")
+
+    st.markdown("---") # Horizontal rule before the summary
+    st.subheader("📄 Text Summary") # Subheader for the text summary
+    # Display the text summary within a styled HTML div for better presentation
+    st.markdown(
+        f'<div style="background-color: #26272e; padding: 20px; border-radius: 10px; border: 1px solid #e0e2e6;">'
+        f'<p style="font-family: \'Inter\', sans-serif; font-size: 16px; line-height: 1.6; color: #FAFAFA;">'
+        f'{html.escape(brief["summary_text"])}'
+        f'</p>'
+        f'</div>',
+        unsafe_allow_html=True # Allow rendering of custom HTML
+    )
 
 def handle_api_error(response):
     """
@@ -188,12 +300,13 @@ def handle_api_error(response):
     try:
         # Attempt to get error detail from JSON response, default to "Unknown error"
         error_detail = response.json().get("detail", "Unknown error")
+        if response.status_code == 503 and response.headers.get("Retry-After"):
+            # Backend is shedding load; tell the user when to try again
+            error_detail = f"{error_detail} (try again in {response.headers['Retry-After']}s)"
         st.error(f"API Error ({response.status_code}): {error_detail}") # Display error message
-        st.session_state.news_summary_text = f"API Error ({response.status_code}): {error_detail}" # Store error in session state
     except ValueError:
         # If response is not valid JSON, display raw response text
         st.error(f"Unexpected API Response: {response.text}")
-        st.session_state.news_summary_text = f"Unexpected API Response: {response.text}"
 
 if __name__ == "__main__":
     main() # Run the main function when the script is executed
\ No newline at end of file
@@ -0,0 +1,133 @@
+import asyncio
+import gzip
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+
+from dotenv import load_dotenv
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+load_dotenv()
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+# Larger bodies are compressed in a worker thread so the event loop keeps serving
+COMPRESSION_THREAD_MIN_BYTES = int(os.getenv("COMPRESSION_THREAD_MIN_BYTES", "65536"))
+
+# Audio is already compressed and must keep its byte offsets for Range requests
+COMPRESSIBLE_TYPES = ("application/json", "application/rss+xml", "application/xml", "text/")
+NOT_COMPRESSIBLE_TYPES = ("text/event-stream",)
+
+
+def http_date(timestamp: float) -> str:
+    return formatdate(timestamp, usegmt=True)
+
+
+def is_not_modified(headers: Headers, etag: str, last_modified: Optional[float] = None) -> bool:
+    """
+    Whether a conditional GET can be answered with 304 Not Modified.
+    If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2).
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag.removeprefix("W/") in tags
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """
+    Brotli (when the package is installed) or gzip compression of complete
+    JSON, XML and text responses. Streaming bodies (SSE), files and
+    responses that are already encoded pass through untouched. Bodies of
+    COMPRESSION_THREAD_MIN_BYTES or more are compressed off the event loop.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # Held back until the body shows whether compression applies
+                start = message
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+            pending, start = start, None
+            headers = MutableHeaders(raw=pending["headers"])
+            content_type = headers.get("content-type", "")
+            body = message.get("body", b"")
+            compressible = (content_type.startswith(COMPRESSIBLE_TYPES)
+                            and not content_type.startswith(NOT_COMPRESSIBLE_TYPES)
+                            and "content-encoding" not in headers)
+            if compressible:
+                headers.add_vary_header("Accept-Encoding")
+            if not compressible or message.get("more_body") or len(body) < self.minimum_size:
+                await send(pending)
+                await send(message)
+                return
+            if len(body) >= COMPRESSION_THREAD_MIN_BYTES:
+                body = await asyncio.to_thread(_compress, body, encoding)
+            else:
+                body = _compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            if "etag" in headers and not headers["etag"].startswith("W/"):
+                # The encoded bytes differ from the identity representation
+                headers["ETag"] = "W/" + headers["etag"]
+            await send(pending)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
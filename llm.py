@@ -0,0 +1,235 @@
+import asyncio
+import concurrent.futures
+import json
+import os
+import threading
+from typing import Any, Callable, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+from log import get_logger
+import deadline
+
+load_dotenv()
+
+logger = get_logger("llm")
+
+# "gemini" (cloud) or "ollama" (any Ollama-compatible local server)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini").lower()
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")
+
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2")
+# How long the server keeps the model in memory after a call (Ollama duration string)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# Pooled HTTP connections to the server, reused across calls
+OLLAMA_MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "8"))
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "300"))
+# Per-call cap; calls inside a request are further limited by its remaining deadline
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+
+
+def _call_timeout() -> float:
+    return deadline.budget(LLM_TIMEOUT_SECONDS, floor=deadline.ESSENTIAL_MIN_SECONDS)
+
+
+class LLMProvider:
+    """
+    Text generation backend used by the summary, broadcast and translation
+    stages. Those stages run in worker threads, so `generate` is blocking.
+    Every call is bounded by LLM_TIMEOUT_SECONDS and the request's deadline.
+    """
+
+    name = "llm"
+
+    def generate(self, prompt: str, temperature: float = 0.4, max_tokens: int = 1000,
+                 on_chunk: Optional[Callable[[str], None]] = None) -> str:
+        """
+        Complete a prompt.
+        Args:
+            prompt: Full prompt text
+            temperature: Sampling temperature
+            max_tokens: Upper bound on generated tokens
+            on_chunk: If given, the response is streamed and each text chunk is passed to it
+        Returns:
+            str: The generated text
+        """
+        raise NotImplementedError
+
+    def generate_json(self, prompt: str, schema: dict, temperature: float = 0.4,
+                      max_tokens: int = 4000) -> Any:
+        """
+        Complete a prompt with output constrained to a JSON schema.
+        Args:
+            prompt: Full prompt text
+            schema: JSON schema (OpenAPI subset: object/array/string/... with properties/items/required)
+        Returns:
+            Any: The parsed JSON response
+        """
+        raise NotImplementedError
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(self, api_key: Optional[str] = None, model: str = GEMINI_MODEL):
+        self.api_key = api_key or os.getenv("GEMINI_API_KEY")
+        self.model = model
+
+    def generate(self, prompt, temperature=0.4, max_tokens=1000, on_chunk=None):
+        import google.generativeai as genai
+        genai.configure(api_key=self.api_key)
+        model = genai.GenerativeModel(self.model)
+        response = model.generate_content(
+            prompt,
+            generation_config=genai.types.GenerationConfig(
+                temperature=temperature,
+                max_output_tokens=max_tokens,
+            ),
+            stream=on_chunk is not None,
+            request_options={"timeout": _call_timeout()},
+        )
+        if on_chunk is None:
+            return response.text
+        parts = []
+        for chunk in response:
+            parts.append(chunk.text)
+            on_chunk(chunk.text)
+        return "".join(parts)
+
+    def generate_json(self, prompt, schema, temperature=0.4, max_tokens=4000):
+        import google.generativeai as genai
+        genai.configure(api_key=self.api_key)
+        model = genai.GenerativeModel(self.model)
+        response = model.generate_content(
+            prompt,
+            generation_config=genai.types.GenerationConfig(
+                temperature=temperature,
+                max_output_tokens=max_tokens,
+                response_mime_type="application/json",
+                response_schema=schema,
+            ),
+            request_options={"timeout": _call_timeout()},
+        )
+        return json.loads(response.text)
+
+
+class OllamaProvider(LLMProvider):
+    """
+    Ollama-compatible server behind one pooled async client.
+
+    The client and its keep-alive connection pool live on a private event
+    loop thread, so blocking callers in worker threads and coroutines on the
+    server loop share the same connections. Every call asks the server to
+    keep the model loaded for OLLAMA_KEEP_ALIVE; preload() loads it up front.
+    """
+
+    name = "ollama"
+
+    def __init__(self, host: str = OLLAMA_HOST, model: str = OLLAMA_MODEL,
+                 keep_alive: str = OLLAMA_KEEP_ALIVE, max_connections: int = OLLAMA_MAX_CONNECTIONS):
+        self.host = host
+        self.model = model
+        self.keep_alive = keep_alive
+        self.max_connections = max_connections
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                import ollama
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="ollama-client", daemon=True).start()
+
+                async def make_client():
+                    return ollama.AsyncClient(
+                        host=self.host,
+                        timeout=OLLAMA_TIMEOUT,
+                        limits=httpx.Limits(max_connections=self.max_connections,
+                                            max_keepalive_connections=self.max_connections),
+                    )
+
+                self._client = asyncio.run_coroutine_threadsafe(make_client(), loop).result()
+                self._loop = loop
+        return self._loop
+
+    async def _generate(self, prompt, temperature, max_tokens, on_chunk):
+        options = {"temperature": temperature, "num_predict": max_tokens}
+        if on_chunk is None:
+            response = await self._client.generate(model=self.model, prompt=prompt, options=options,
+                                                   keep_alive=self.keep_alive)
+            return response["response"]
+        parts = []
+        async for chunk in await self._client.generate(model=self.model, prompt=prompt, options=options,
+                                                       keep_alive=self.keep_alive, stream=True):
+            if chunk["response"]:
+                parts.append(chunk["response"])
+                on_chunk(chunk["response"])
+        return "".join(parts)
+
+    def _wait(self, coro) -> Any:
+        """Run a coroutine on the client loop and wait for it within the call timeout."""
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_started())
+        try:
+            return future.result(timeout=_call_timeout())
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def generate(self, prompt, temperature=0.4, max_tokens=1000, on_chunk=None):
+        return self._wait(self._generate(prompt, temperature, max_tokens, on_chunk))
+
+    def generate_json(self, prompt, schema, temperature=0.4, max_tokens=4000):
+        async def call():
+            # Ollama takes the JSON schema itself as the output format
+            return await self._client.generate(
+                model=self.model, prompt=prompt, format=schema, keep_alive=self.keep_alive,
+                options={"temperature": temperature, "num_predict": max_tokens},
+            )
+
+        response = self._wait(call())
+        return json.loads(response["response"])
+
+    async def preload(self) -> None:
+        """Load the model into server memory (an empty prompt only loads it)."""
+        loop = self._ensure_started()
+        await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(
+            self._client.generate(model=self.model, prompt="", keep_alive=self.keep_alive), loop
+        ))
+
+
+_ollama: Optional[OllamaProvider] = None
+
+
+def get_ollama() -> OllamaProvider:
+    """Return the process-wide Ollama provider (one connection pool per process)."""
+    global _ollama
+    if _ollama is None:
+        _ollama = OllamaProvider()
+    return _ollama
+
+
+def get_llm(api_key: Optional[str] = None) -> LLMProvider:
+    """
+    Return the provider selected by LLM_PROVIDER.
+    Args:
+        api_key: Gemini API key (ignored by the local provider)
+    """
+    if LLM_PROVIDER == "ollama":
+        return get_ollama()
+    return GeminiProvider(api_key)
+
+
+async def warm_up() -> None:
+    """Preload the local model at startup so the first brief doesn't pay for loading it."""
+    if LLM_PROVIDER != "ollama":
+        return
+    try:
+        await get_ollama().preload()
+        logger.info("Local model preloaded", extra={"model": OLLAMA_MODEL, "keep_alive": OLLAMA_KEEP_ALIVE})
+    except Exception as e:
+        # The server may come up later; calls load the model on demand
+        logger.warning("Local model preload failed: %s", e, extra={"model": OLLAMA_MODEL})
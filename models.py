@@ -1,7 +1,96 @@
-from pydantic import BaseModel
-from typing import List
+import hashlib
+import json
+import os
+from enum import Enum
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import Dict, List, Optional
+
+from audio_profiles import PROFILE_NAMES
+
+# Alternate spellings mapped to one canonical topic (matched case-insensitively).
+# Extend with a JSON object file via TOPIC_ALIASES_FILE.
+TOPIC_ALIASES: Dict[str, str] = {
+    "ai": "AI",
+    "artificial intelligence": "AI",
+    "a.i.": "AI",
+    "ml": "Machine Learning",
+    "machine learning": "Machine Learning",
+    "us politics": "US Politics",
+    "u.s. politics": "US Politics",
+    "crypto": "Cryptocurrency",
+    "cryptocurrency": "Cryptocurrency",
+}
+if os.getenv("TOPIC_ALIASES_FILE"):
+    with open(os.getenv("TOPIC_ALIASES_FILE")) as fh:
+        TOPIC_ALIASES.update({k.casefold(): v for k, v in json.load(fh).items()})
+
+def canonical_topic(topic: str) -> str:
+    """Collapse whitespace and map known aliases, e.g. " artificial  intelligence" -> "AI"."""
+    collapsed = " ".join(topic.split())
+    return TOPIC_ALIASES.get(collapsed.casefold(), collapsed)
+
+class SourceType(str, Enum):
+    NEWS = "news"
+    REDDIT = "reddit"
+    TWITTER = "twitter"
+    BOTH = "both"                  # news + reddit
+    ALL = "all"                    # news + reddit + twitter
 
 class NewsRequest(BaseModel):
     topics: List[str]
-    source_type: str               # "news" | "reddit" | "both"
+    source_type: SourceType
     language: str = "en-US"        # Murf locale code, e.g. "en-US", "es-ES"
+    languages: Optional[List[str]] = None  # Fan-out locales; overrides `language` when set
+    inline_audio: bool = True      # False = fetch audio via `audio_url` instead of base64
+    user_id: Optional[str] = None  # Subscriber id, required for `since`
+    since: bool = False            # Only brief headlines this user hasn't heard yet
+    deadline_seconds: Optional[float] = Field(None, gt=0)  # Latency budget; server default when unset
+    audio_profile: Optional[str] = None  # Output format (audio_profiles.PROFILE_NAMES); by client type when unset
+
+    @field_validator("topics")
+    @classmethod
+    def canonicalize_topics(cls, topics: List[str]) -> List[str]:
+        """Canonical topics in request order, dropping blanks and case-insensitive duplicates."""
+        canonical: Dict[str, str] = {}
+        for topic in map(canonical_topic, topics):
+            if topic:
+                canonical.setdefault(topic.casefold(), topic)
+        if not canonical:
+            raise ValueError("at least one non-empty topic is required")
+        return list(canonical.values())
+
+    @field_validator("audio_profile")
+    @classmethod
+    def check_audio_profile(cls, profile: Optional[str]) -> Optional[str]:
+        if profile is not None and profile not in PROFILE_NAMES:
+            raise ValueError(f"unknown audio profile {profile!r}, expected one of {', '.join(PROFILE_NAMES)}")
+        return profile
+
+    @model_validator(mode="after")
+    def check_since(self):
+        if self.since and not self.user_id:
+            raise ValueError("`since` mode needs a `user_id`")
+        return self
+
+    def target_languages(self) -> List[str]:
+        """Return the requested locales in order, without duplicates."""
+        return list(dict.fromkeys(self.languages or [self.language]))
+
+    def canonical_key(self) -> str:
+        """
+        Hash identifying requests that produce the same brief: topic order and
+        case don't matter, and user_id only matters in `since` mode.
+        """
+        doc = {
+            "topics": sorted(t.casefold() for t in self.topics),
+            "source_type": self.source_type.value,
+            "languages": self.target_languages(),
+            "inline_audio": self.inline_audio,
+            "user_id": self.user_id if self.since else None,
+            "since": self.since,
+            "audio_profile": self.audio_profile,
+        }
+        return hashlib.sha256(json.dumps(doc, sort_keys=True).encode()).hexdigest()
+
+class BatchNewsRequest(BaseModel):
+    requests: List[NewsRequest]    # One entry per subscriber brief
@@ -2,15 +2,17 @@
 import asyncio
 # Import os for environment variable access
 import os
-# Import Dict and List for type hinting
-from typing import Dict, List
-# Import datetime for logging timestamps
-from datetime import datetime
+# Import typing helpers for type hinting
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+# Import dataclass for the per-topic task record
+from dataclasses import dataclass, field
+# Import time for stage timings
+import time
 
-# Import AsyncLimiter for rate limiting API calls
-from aiolimiter import AsyncLimiter
+# Import SharedRateLimiter so the limit holds across all backend workers
+from shared_state import SharedRateLimiter
 # Import retry decorators for handling failures
-from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+from tenacity import AsyncRetrying, stop_after_attempt, wait_exponential
 # Import load_dotenv for environment variable loading
 from dotenv import load_dotenv
 
@@ -18,135 +20,458 @@ from dotenv import load_dotenv
 from utils import (
     generate_news_urls_to_scrape,    # Creates Google News search URLs
     scrape_with_brightdata,          # Scrapes using BrightData proxy
+    fetch_direct,                    # Fetches without the proxy (fallback)
     clean_html_to_text,              # Removes HTML tags and cleans text
     extract_headlines,               # Extracts news headlines from text
     summarize_with_gemini_news_script, # Summarizes headlines using Gemini AI
+    summarize_topics_structured,     # Summarizes all topics in one structured call
 )
+# Import progress events for streaming clients
+import progress
+# Import structured logging helpers
+from log import get_logger, elapsed
+# Import circuit breakers and hedging for upstream calls
+from resilience import get_breaker, hedged
+# Import request deadline helpers to size timeouts and retries from the remaining budget
+import deadline
+from deadline import DeadlineExceeded, stop_before_deadline, BRIEF_RESERVE_SECONDS
+# Import the per-user seen-headline index for "since last brief" mode
+from seen_index import SeenIndex, no_updates_script
+# Import the local extractive ranker that trims headlines before the LLM
+from extractive import top_headlines
+# Import the artifact store that keeps raw inputs for replay and debugging
+from artifacts import artifact_store, topic_var
+# Import the shared semantic cache that also matches differently phrased topics
+from topic_cache import SemanticCache
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Module logger
+logger = get_logger("news_scraper")
+
+# Per-call timeouts for the two ways of fetching a Google News page
+BRIGHTDATA_TIMEOUT = float(os.getenv("BRIGHTDATA_TIMEOUT", "30"))
+DIRECT_FETCH_TIMEOUT = float(os.getenv("DIRECT_FETCH_TIMEOUT", "15"))
+# Start the direct fetch if BrightData hasn't answered after this many seconds (0 = only on failure)
+HEDGE_DELAY_SECONDS = float(os.getenv("HEDGE_DELAY_SECONDS", "0"))
+
+# One breaker per upstream, shared by every request in this process
+brightdata_breaker = get_breaker("brightdata", slow_call_seconds=BRIGHTDATA_TIMEOUT / 2)
+direct_fetch_breaker = get_breaker("google_news_direct", slow_call_seconds=DIRECT_FETCH_TIMEOUT / 2)
+
+# "per_topic": one summary call per topic; "batched": one structured call for all
+# topics; "fused": no summary call, headlines go straight into the broadcast prompt
+NEWS_SUMMARY_MODE = os.getenv("NEWS_SUMMARY_MODE", "per_topic")
+
+# Attempts per stage; deterministic local stages are never retried
+STAGE_ATTEMPTS = {"fetch": 3, "clean": 1, "headlines": 1, "summarize": 2}
+# Stages whose output only feeds the next stage: once that one is checkpointed they are
+# skipped, and their (large) outputs are left out of the shared checkpoint
+INTERMEDIATE_STAGES = {"fetch": "clean", "clean": "headlines"}
+# How long successful stage outputs are kept for reuse by a later run of the same topic
+CHECKPOINT_TTL_SECONDS = float(os.getenv("CHECKPOINT_TTL_SECONDS", "300"))
+
+
+# Define TopicTask to track one run of one topic through the scraping stages
+@dataclass
+class TopicTask:
+    topic: str
+    # Stage outputs of this run, starting from the topic's checkpoint
+    outputs: Dict[str, Any] = field(default_factory=dict)
+    # Per-stage status, attempts and timing
+    stages: Dict[str, dict] = field(default_factory=dict)
+    status: str = "pending"
+    error: Optional[str] = None
+    seconds: float = 0.0
+    # Differently phrased topic whose checkpoint seeded this run, if any
+    reused_from: Optional[str] = None
+
+    def report(self) -> dict:
+        """Return the JSON-friendly status of this topic."""
+        report = {"status": self.status, "seconds": self.seconds, "error": self.error, "stages": self.stages}
+        if self.reused_from:
+            report["reused_from"] = self.reused_from
+        return report
+
+
 # Define NewsScraper class for handling news scraping operations
 class NewsScraper:
-    # Create rate limiter to prevent API abuse (5 requests per second)
-    _rate_limiter = AsyncLimiter(5, 1)
-
-    # Apply retry decorator with exponential backoff
-    @retry(
-        stop=stop_after_attempt(3),                    # Maximum 3 retry attempts
-        wait=wait_exponential(multiplier=1, min=2, max=10)  # Exponential wait between retries
-    )
-    async def scrape_news(self, topics: List[str]) -> Dict[str, str]:
-        """
-        Main method to scrape and analyze news articles.
-        
+    # Create rate limiter to prevent API abuse (5 requests per second, across workers)
+    _rate_limiter = SharedRateLimiter("news", 5, 1)
+    # Checkpointed stage outputs per topic, shared by every run on every worker
+    _checkpoints = SemanticCache("news_checkpoints", CHECKPOINT_TTL_SECONDS)
+
+    async def fetch_search_html(self, url: str) -> str:
+        """
+        Fetch a Google News search page through BrightData, falling back to
+        (or, with HEDGE_DELAY_SECONDS, racing against) a direct request.
+        Open circuits fail fast, so a degraded upstream costs no waiting.
+        Timeouts shrink to what the request's deadline leaves before the brief reserve.
+        """
+        deadline.check("news fetch", BRIEF_RESERVE_SECONDS)
+
+        async def via_brightdata():
+            timeout = deadline.budget(BRIGHTDATA_TIMEOUT, BRIEF_RESERVE_SECONDS)
+            return await brightdata_breaker.call(scrape_with_brightdata, url, timeout, timeout=timeout)
+
+        async def via_direct():
+            timeout = deadline.budget(DIRECT_FETCH_TIMEOUT, BRIEF_RESERVE_SECONDS)
+            if timeout <= 0:
+                raise DeadlineExceeded("No time budget left for news fetch")
+            return await direct_fetch_breaker.call(fetch_direct, url, timeout, timeout=timeout)
+
+        return await hedged(via_brightdata, via_direct, HEDGE_DELAY_SECONDS or None)
+
+    async def _task_for(self, topic: str) -> TopicTask:
+        """
+        Return a fresh task for one run of a topic, starting from the topic's
+        recent checkpoint if any, else from the scraped stages of a recent
+        sibling topic phrased differently ("OpenAI news" / "latest on OpenAI").
+        Each run gets its own task, so concurrent runs never share status.
+        """
+        task = TopicTask(topic, status="running")
+        hit = await self._checkpoints.get(topic)
+        if hit is None:
+            return task
+        outputs, matched, similarity = hit
+        if matched == topic:
+            task.outputs = outputs
+        elif "headlines" in outputs:
+            task.outputs = outputs
+            task.reused_from = matched
+            logger.info("Reusing sibling topic checkpoint", extra={
+                "topic": topic, "sibling": matched, "similarity": round(similarity, 3),
+            })
+        return task
+
+    async def _checkpoint(self, task: TopicTask, stage: str, output: Any) -> None:
+        """Add a successful stage output to the run and to the topic's shared checkpoint."""
+        task.outputs[stage] = output
+        await self._checkpoints.put(task.topic, {
+            name: value for name, value in task.outputs.items()
+            if INTERMEDIATE_STAGES.get(name) not in task.outputs
+        })
+
+    @staticmethod
+    def _checkpointed(task: TopicTask, stage: str) -> bool:
+        """Whether a stage can be skipped: its output, or that of a stage it feeds, is checkpointed."""
+        while stage is not None:
+            if stage in task.outputs:
+                return True
+            stage = INTERMEDIATE_STAGES.get(stage)
+        return False
+
+    async def _run_stage(self, task: TopicTask, stage: str, fn: Callable[[], Awaitable[Any]],
+                         checkpoint: bool = True) -> Any:
+        """
+        Run one stage of a topic, retrying only that stage on failure.
+        A stage whose output is already checkpointed is skipped. With
+        checkpoint=False (per-user output) nothing is reused or stored.
+        """
+        if checkpoint and self._checkpointed(task, stage):
+            task.stages[stage] = {"status": "ok", "attempts": 0, "seconds": 0.0, "checkpointed": True}
+            if task.reused_from:
+                task.stages[stage]["reused_from"] = task.reused_from
+            return task.outputs.get(stage)
+
+        stage_start = time.perf_counter()
+        attempts = 0
+        try:
+            async for attempt in AsyncRetrying(
+                # Stop retrying once another back-off would eat into the brief reserve
+                stop=stop_after_attempt(STAGE_ATTEMPTS[stage]) | stop_before_deadline(BRIEF_RESERVE_SECONDS),
+                wait=wait_exponential(multiplier=1, min=1, max=4),
+                reraise=True,
+            ):
+                with attempt:
+                    attempts = attempt.retry_state.attempt_number
+                    result = await fn()
+        except Exception:
+            task.stages[stage] = {"status": "failed", "attempts": attempts, "seconds": elapsed(stage_start)}
+            raise
+
+        task.stages[stage] = {"status": "ok", "attempts": attempts, "seconds": elapsed(stage_start)}
+        if checkpoint:
+            await self._checkpoint(task, stage, result)
+        return result
+
+    async def process_topic(self, topic: str, seen: Optional[SeenIndex] = None,
+                            summarize: bool = True) -> Tuple[TopicTask, Optional[str]]:
+        """
+        Run fetch -> clean -> headlines -> summarize for one topic.
+        With `seen`, only headlines the user has not heard yet are summarized
+        (uncheckpointed, as the result is per user). With summarize=False the
+        summary is left to the caller and the selected headlines are returned.
+        Returns:
+            Tuple[TopicTask, Optional[str]]: The task and the news summary
+                (or headlines), None on failure
+        """
+        task = await self._task_for(topic)
+        topic_start = time.perf_counter()
+        text = None
+        # Artifacts recorded below (including the LLM call) belong to this topic
+        topic_token = topic_var.set(topic)
+        try:
+            # Generate Google News search URLs for topic
+            url = generate_news_urls_to_scrape([topic])[topic]
+            # Fetch the Google News page (breakers and hedging inside)
+            search_html = await self._run_stage(task, "fetch", lambda: self.fetch_search_html(url))
+            if search_html is not None:
+                artifact_store.record("raw_html", search_html, url=url, checkpointed="checkpointed" in task.stages["fetch"])
+            # Clean HTML content to extract readable text
+            clean_text = await self._run_stage(
+                task, "clean", lambda: asyncio.to_thread(clean_html_to_text, search_html)
+            )
+            # Extract news headlines from cleaned text
+            headlines = await self._run_stage(
+                task, "headlines", lambda: asyncio.to_thread(extract_headlines, clean_text)
+            )
+            extracted = headlines
+
+            # In since mode, drop headlines this user has already heard
+            if seen is not None:
+                headlines = await seen.filter_new(topic, headlines or "")
+                if not headlines:
+                    # Nothing new: skip the summary entirely
+                    task.status, task.seconds = "ok", elapsed(topic_start)
+                    return task, no_updates_script([topic])
+
+            # Handle case where no headlines were found
+            if not headlines or headlines.strip() == "":
+                logger.warning("No headlines found, using fallback", extra={"topic": topic})
+                # Create fallback headline
+                headlines = f"Latest news about {topic}"
+            else:
+                # Keep only the most central headlines so the prompt stays short
+                headlines = await asyncio.to_thread(top_headlines, headlines)
+                if seen is not None:
+                    # Headlines ranked out stay unheard and can make the next brief
+                    seen.retain(topic, headlines)
+            artifact_store.record("headlines", {
+                "extracted": (extracted or "").split("\n"),
+                "selected": headlines.split("\n"),
+                "since": seen.stats.get(topic) if seen is not None else None,
+            })
+
+            if summarize:
+                # Use Gemini AI to summarize headlines into news script
+                text = await self._summarize_topic(task, headlines, checkpoint=seen is None)
+            else:
+                text = headlines
+            task.status = "ok"
+        except Exception as e:
+            # Earlier stages stay checkpointed; a rerun resumes at the failed stage
+            task.status, task.error = "failed", str(e)
+            logger.error("Failed to process topic: %s", e, extra={"topic": topic})
+            if isinstance(e, DeadlineExceeded):
+                deadline.note(f"news topic '{topic}' skipped")
+        finally:
+            topic_var.reset(topic_token)
+        task.seconds = elapsed(topic_start)
+        return task, text
+
+    async def _summarize_topic(self, task: TopicTask, headlines: str, checkpoint: bool = True) -> str:
+        """Run the summarize stage for one topic with its own LLM call."""
+        async def summarize():
+            deadline.check("news summary", BRIEF_RESERVE_SECONDS)
+            return await asyncio.to_thread(
+                summarize_with_gemini_news_script,
+                api_key=os.getenv("GEMINI_API_KEY"),
+                headlines=headlines,
+            )
+
+        return await self._run_stage(task, "summarize", summarize, checkpoint=checkpoint)
+
+    async def _summarize_batch(self, tasks: Dict[str, TopicTask], headlines: Dict[str, str],
+                               checkpoint: bool = True) -> Dict[str, str]:
+        """
+        Summarize every topic in one structured LLM call. Topics the call
+        fails on or leaves out fall back to their own summarize call.
+        Returns:
+            Dict[str, str]: Topic -> news script, for the topics that succeeded
+        """
+        scripts: Dict[str, str] = {}
+        batch_start = time.perf_counter()
+        attempts = 0
+        try:
+            async for attempt in AsyncRetrying(
+                stop=stop_after_attempt(STAGE_ATTEMPTS["summarize"]) | stop_before_deadline(BRIEF_RESERVE_SECONDS),
+                wait=wait_exponential(multiplier=1, min=1, max=4),
+                reraise=True,
+            ):
+                with attempt:
+                    attempts = attempt.retry_state.attempt_number
+                    deadline.check("news summary", BRIEF_RESERVE_SECONDS)
+                    scripts = await asyncio.to_thread(
+                        summarize_topics_structured,
+                        api_key=os.getenv("GEMINI_API_KEY"),
+                        headlines_by_topic=headlines,
+                    )
+        except Exception as e:
+            logger.warning("Batched summary failed, summarizing per topic: %s", e,
+                           extra={"topics": list(headlines)})
+
+        for topic, script in scripts.items():
+            task = tasks[topic]
+            task.stages["summarize"] = {"status": "ok", "attempts": attempts,
+                                        "seconds": elapsed(batch_start), "batched": True}
+            if checkpoint:
+                await self._checkpoint(task, "summarize", script)
+
+        for topic in [t for t in headlines if t not in scripts]:
+            task = tasks[topic]
+            topic_token = topic_var.set(topic)
+            try:
+                scripts[topic] = await self._summarize_topic(task, headlines[topic], checkpoint)
+            except Exception as e:
+                task.status, task.error = "failed", str(e)
+                logger.error("Failed to summarize topic: %s", e, extra={"topic": topic})
+                if isinstance(e, DeadlineExceeded):
+                    deadline.note(f"news topic '{topic}' skipped")
+            finally:
+                topic_var.reset(topic_token)
+        return scripts
+
+    async def summarize_fetched(self, task: TopicTask, headlines: Optional[str], seen: Optional[SeenIndex] = None,
+                                mode: str = NEWS_SUMMARY_MODE) -> Optional[str]:
+        """
+        Summarize stage of a topic fetched with process_topic(summarize=False).
+        Only "per_topic" mode summarizes here; topics that failed or have
+        nothing new for the user pass through unchanged.
+        Returns:
+            Optional[str]: The news summary (or headlines), None on failure
+        """
+        nothing_new = seen is not None and task.topic in seen.unchanged_topics()
+        if mode != "per_topic" or task.status != "ok" or nothing_new:
+            return headlines
+        topic_token = topic_var.set(task.topic)
+        try:
+            return await self._summarize_topic(task, headlines, checkpoint=seen is None)
+        except Exception as e:
+            task.status, task.error = "failed", str(e)
+            logger.error("Failed to summarize topic: %s", e, extra={"topic": task.topic})
+            if isinstance(e, DeadlineExceeded):
+                deadline.note(f"news topic '{task.topic}' skipped")
+            return None
+        finally:
+            topic_var.reset(topic_token)
+
+    async def collect(self, topics: List[str], processed: Dict[str, Tuple[TopicTask, Optional[str]]],
+                      seen: Optional[SeenIndex] = None, mode: str = NEWS_SUMMARY_MODE) -> Dict[str, Any]:
+        """
+        Assemble the news result from every topic's (task, text), first
+        summarizing what "batched" mode left for one structured call.
+        Returns:
+            Dictionary with "news_analysis" (topic -> news summary, or headlines
+            in fused mode), "topic_status" (topic -> status, error, per-stage
+            attempts and timings) and, in fused mode, "content": "headlines"
+        """
+        # Initialize empty dictionaries for results and statuses
+        results = {}
+        statuses = {}
+        tasks = {topic: task for topic, (task, _) in processed.items()}
+        # Headlines waiting for the single batched summary call
+        pending: Dict[str, str] = {}
+
+        def finish(topic: str, task: TopicTask, text: Optional[str]) -> None:
+            if text is not None and task.status == "ok":
+                results[topic] = text
+            else:
+                # Provide fallback message for failed topic
+                results[topic] = f"We couldn't retrieve the latest news about {topic} at this time."
+            statuses[topic] = task.report()
+            if seen is not None and topic in seen.stats:
+                statuses[topic]["since"] = seen.stats[topic]
+
+            logger.info("Topic completed", extra={
+                "source": "news", "topic": topic, "status": task.status, "seconds": task.seconds,
+                "chars": len(results[topic]),
+                **{f"{stage}_seconds": info["seconds"] for stage, info in task.stages.items()},
+            })
+            # Emit per-topic completion for progress subscribers
+            progress.emit("topic_done", source="news", topic=topic, status=task.status, seconds=task.seconds)
+
+        for topic, (task, text) in processed.items():
+            nothing_new = seen is not None and topic in seen.unchanged_topics()
+            if mode == "batched" and task.status == "ok" and not nothing_new:
+                if seen is None and "summarize" in task.outputs:
+                    # A recent summary of the same headlines is checkpointed
+                    finish(topic, task, task.outputs["summarize"])
+                else:
+                    pending[topic] = text
+            else:
+                finish(topic, task, text)
+
+        if pending:
+            scripts = await self._summarize_batch(tasks, pending, checkpoint=seen is None)
+            for topic in pending:
+                finish(topic, tasks[topic], scripts.get(topic))
+
+        # Log completion of all topics
+        logger.info("All news topics processed", extra={
+            "source": "news", "topics": len(topics),
+            "failed": sum(1 for st in statuses.values() if st["status"] != "ok"),
+        })
+        # Return results in expected format, in topic order
+        news = {"news_analysis": {t: results[t] for t in topics}, "topic_status": {t: statuses[t] for t in topics}}
+        if mode == "fused":
+            news["content"] = "headlines"
+        return news
+
+    async def scrape_news(self, topics: List[str], seen: Optional[SeenIndex] = None,
+                          mode: str = NEWS_SUMMARY_MODE) -> Dict[str, Any]:
+        """
+        Main method to scrape and analyze news articles. Topics run
+        concurrently; the shared news rate limit paces their fetches.
+
         Args:
             topics: List of topics to search for news
-            
+            seen: The user's seen-headline index, to summarize only what is new
+            mode: "per_topic" (one summary call per topic), "batched" (one
+                structured call for all topics) or "fused" (no summary call;
+                the selected headlines go straight to the broadcast step)
+
         Returns:
-            Dictionary with topic as key and news summary as value
+            The collect() result
         """
         # Log scraping initiation with topic count
-        print(f"[{datetime.now()}] 📰 NewsScraper: Starting news scraping for {len(topics)} topics")
-        # Initialize empty dictionary for results
-        results = {}
-        
-        # Iterate through topics with index for progress tracking
-        for idx, topic in enumerate(topics, 1):
-            # Record start time for this topic
-            topic_start = datetime.now()
-            # Log current topic being processed
-            print(f"[{datetime.now()}] 📰 NewsScraper: Processing topic {idx}/{len(topics)}: '{topic}'")
-            
+        logger.info("Starting news scraping", extra={"source": "news", "topics": len(topics), "mode": mode})
+
+        async def run(topic: str) -> Tuple[TopicTask, Optional[str]]:
+            progress.emit("topic_start", source="news", topic=topic)
             # Use rate limiter to prevent API abuse
             async with self._rate_limiter:
-                try:
-                    # Log URL generation for current topic
-                    print(f"[{datetime.now()}] 📰 NewsScraper: Generating search URLs for '{topic}'")
-                    # Generate Google News search URLs for topic
-                    urls = generate_news_urls_to_scrape([topic])
-                    # Log number of URLs generated
-                    print(f"[{datetime.now()}] 📰 NewsScraper: Generated {len(urls)} URLs for '{topic}'")
-                    
-                    # Initialize variable for HTML content
-                    search_html = None
-                    try:
-                        # Attempt to scrape using BrightData proxy
-                        print(f"[{datetime.now()}] 📰 NewsScraper: Attempting BrightData scrape for '{topic}'")
-                        print(f"[{datetime.now()}] 📰 NewsScraper: URL: {urls[topic]}")
-                        # Scrape Google News page
-                        search_html = scrape_with_brightdata(urls[topic])
-                        # Log successful scraping
-                        print(f"[{datetime.now()}] ✅ BrightData: Successfully scraped '{topic}'")
-                    except Exception as bright_error:
-                        # Handle BrightData scraping failures
-                        print(f"[{datetime.now()}] ❌ BrightData: Failed for '{topic}' - {str(bright_error)}")
-                        print(f"[{datetime.now()}] 🔄 NewsScraper: Using fallback method with direct requests for '{topic}'...")
-                        # Import requests for direct HTTP requests
-                        import requests
-                        # Make direct HTTP request as fallback
-                        search_html = requests.get(urls[topic], headers={
-                            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                        }).text
-                        # Log successful fallback scraping
-                        print(f"[{datetime.now()}] ✅ NewsScraper: Fallback scraping completed for '{topic}'.")
-                    
-                    # Record start time for HTML cleaning
-                    clean_start = datetime.now()
-                    # Clean HTML content to extract readable text
-                    clean_text = clean_html_to_text(search_html)
-                    # Calculate cleaning duration
-                    clean_duration = (datetime.now() - clean_start).total_seconds()
-                    # Log cleaning results
-                    print(f"[{datetime.now()}] 📄 NewsScraper: HTML cleaned for '{topic}'. Text length: {len(clean_text)} chars in {clean_duration:.3f}s")
-                    
-                    # Record start time for headline extraction
-                    headlines_start = datetime.now()
-                    # Extract news headlines from cleaned text
-                    headlines = extract_headlines(clean_text)
-                    # Calculate extraction duration
-                    headlines_duration = (datetime.now() - headlines_start).total_seconds()
-                    # Log extraction results
-                    print(f"[{datetime.now()}] 📰 NewsScraper: Headlines extracted for '{topic}'. Headlines snippet: {headlines[:150]}...")
-                    print(f"[{datetime.now()}] 📰 NewsScraper: Extraction took {headlines_duration:.3f}s")
-                    
-                    # Handle case where no headlines were found
-                    if not headlines or headlines.strip() == "":
-                        print(f"[{datetime.now()}] ⚠️ NewsScraper: No headlines found for '{topic}', using fallback")
-                        # Create fallback headline
-                        headlines = f"Latest news about {topic}"
-                    
-                    # Log AI summarization initiation
-                    print(f"[{datetime.now()}] 🤖 NewsScraper: Summarizing news script for '{topic}' with Gemini...")
-                    # Record start time for summarization
-                    summarize_start = datetime.now()
-                    # Use Gemini AI to summarize headlines into news script
-                    summary = summarize_with_gemini_news_script(
-                        api_key=os.getenv("GEMINI_API_KEY"),
-                        headlines=headlines
-                    )
-                    # Calculate summarization duration
-                    summarize_duration = (datetime.now() - summarize_start).total_seconds()
-                    # Log summarization completion
-                    print(f"[{datetime.now()}] 🤖 Gemini (News Script): News script summarized.")
-                    print(f"[{datetime.now()}] ✅ NewsScraper: News script summarized for '{topic}'. Summary length: {len(summary)} chars in {summarize_duration:.3f}s")
-                    # Store summary in results dictionary
-                    results[topic] = summary
-                    
-                except Exception as e:
-                    # Handle any errors during topic processing
-                    print(f"[{datetime.now()}] ❌ NewsScraper: Failed to process '{topic}' - {str(e)}")
-                    # Provide fallback message for failed topic
-                    results[topic] = f"We couldn't retrieve the latest news about {topic} at this time."
-                
-                # Calculate and log total time for this topic
-                topic_duration = (datetime.now() - topic_start).total_seconds()
-                print(f"[{datetime.now()}] 📰 NewsScraper: Topic '{topic}' completed in {topic_duration:.3f}s")
-                # Add delay between topics to be respectful to APIs
-                await asyncio.sleep(1)
-        
-        # Log completion of all topics
-        total_duration = (datetime.now() - datetime.now()).total_seconds()
-        print(f"[{datetime.now()}] 📰 NewsScraper: All topics processed. Returning news analysis results. Processed {len(topics)} topics")
-        # Return results in expected format
-        return {"news_analysis": results}
\ No newline at end of file
+                task, text = await self.process_topic(topic, seen, summarize=False)
+            return task, await self.summarize_fetched(task, text, seen, mode)
+
+        processed = await asyncio.gather(*(run(topic) for topic in topics))
+        return await self.collect(topics, dict(zip(topics, processed)), seen, mode)
+
+
+# Import the source registry so the brief pipeline can schedule news like any other source
+from sources import Source, Stage, PER_SOURCE, register
+
+
+async def _fetch_news_stage(ctx, topic, inputs) -> Tuple[TopicTask, Optional[str]]:
+    progress.emit("topic_start", source="news", topic=topic)
+    return await NewsScraper().process_topic(topic, ctx.params.get("seen"), summarize=False)
+
+
+async def _summarize_news_stage(ctx, topic, inputs) -> Tuple[TopicTask, Optional[str]]:
+    task, headlines = inputs["fetch"]
+    return task, await NewsScraper().summarize_fetched(task, headlines, ctx.params.get("seen"))
+
+
+async def _collect_news_stage(ctx, topic, inputs) -> Dict[str, Any]:
+    return await NewsScraper().collect(ctx.topics, inputs["summarize"], ctx.params.get("seen"))
+
+
+# News is essential: it runs on the full deadline and its failures fail the brief.
+# Topics are fetched and summarized as nodes of their own, their fetches paced by
+# the shared news rate limit; batching and the result are assembled source-wide.
+register(Source("news", "News", [
+    Stage("fetch", _fetch_news_stage, limiter=NewsScraper._rate_limiter),
+    Stage("summarize", _summarize_news_stage, after=("fetch",)),
+    Stage("collect", _collect_news_stage, after=("summarize",), scope=PER_SOURCE),
+], cost=1.0, optional=False, heading="NEWS CONTENT"))
@@ -0,0 +1,292 @@
+import asyncio
+import inspect
+import os
+import random
+import sys
+import threading
+import time
+import traceback
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from starlette.requests import Request
+
+from log import get_logger, request_id_var
+import artifacts
+from artifacts import artifact_store
+
+load_dotenv()
+
+logger = get_logger("profiling")
+
+# Allow profiling a request on demand with "X-Profile: 1" or "?profile=1". Off by
+# default: any client could otherwise make the server pay for a profile.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+# Fraction of briefs profiled without being asked (0 = only on demand)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+# The event loop counts as blocked when a heartbeat is this late (0 = monitor off)
+LOOP_LAG_THRESHOLD_MS = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "100"))
+LOOP_LAG_INTERVAL_MS = float(os.getenv("LOOP_LAG_INTERVAL_MS", "50"))
+
+# Frames of the blocking coroutine's stack included in the lag log
+LOOP_LAG_STACK_DEPTH = 12
+# Stacks whose innermost frame is in these files are idle threads (pool workers
+# waiting for work, the log listener), not time spent on anything
+_IDLE_FILES = (os.sep + "threading.py", os.sep + "queue.py")
+_TRUTHY = {"1", "true", "yes", "on"}
+
+# One profiler at a time: samples cover the whole process, so two would only
+# slow each other down and record the same stacks
+_profile_slot = threading.Lock()
+
+Frame = Tuple[str, str, int]
+
+
+class SamplingProfiler:
+    """
+    Statistical wall-clock profiler for every thread of the process.
+
+    A background thread snapshots all stacks with sys._current_frames()
+    every `interval` seconds and weights each stack by the time since the
+    previous snapshot. That covers the event loop and the worker threads of
+    asyncio.to_thread alike (HTML parsing, TTS, ...) at a cost independent
+    of how much Python code runs, unlike a tracing profiler. Samples are
+    process-wide, so work of concurrent requests shows up too.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL_MS / 1000):
+        self.interval = interval
+        self.frames: List[Frame] = []
+        self._frame_ids: Dict[Frame, int] = {}
+        self._stacks: Dict[Tuple[str, Tuple[int, ...]], float] = defaultdict(float)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.samples = 0
+        self.started = self.duration = 0.0
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self.started
+
+    def _frame_id(self, frame) -> int:
+        code = frame.f_code
+        key = (code.co_qualname, code.co_filename, code.co_firstlineno)
+        index = self._frame_ids.get(key)
+        if index is None:
+            index = self._frame_ids[key] = len(self.frames)
+            self.frames.append(key)
+        return index
+
+    def _stack(self, frame) -> Optional[Tuple[int, ...]]:
+        if frame.f_code.co_filename.endswith(_IDLE_FILES):
+            return None
+        stack = []
+        while frame is not None:
+            stack.append(self._frame_id(frame))
+            frame = frame.f_back
+        return tuple(reversed(stack))
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight, last = now - last, now
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = self._stack(frame)
+                if stack is not None:
+                    self._stacks[(names.get(ident, str(ident)), stack)] += weight
+            self.samples += 1
+
+    def speedscope(self, name: str) -> dict:
+        """
+        The profile as a speedscope document (https://www.speedscope.app),
+        with one sampled profile per thread.
+        """
+        threads: Dict[str, dict] = {}
+        for (thread, stack), weight in sorted(self._stacks.items(), key=lambda item: -item[1]):
+            profile = threads.setdefault(thread, {
+                "type": "sampled", "name": thread, "unit": "seconds",
+                "startValue": 0, "endValue": 0.0, "samples": [], "weights": [],
+            })
+            profile["samples"].append(list(stack))
+            profile["weights"].append(round(weight, 6))
+            profile["endValue"] = round(profile["endValue"] + weight, 6)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "newsninja",
+            "activeProfileIndex": 0,
+            "shared": {"frames": [{"name": n, "file": f, "line": line} for n, f, line in self.frames]},
+            "profiles": list(threads.values()),
+        }
+
+
+def folded(doc: dict) -> str:
+    """
+    Convert a speedscope document to folded stacks ("thread;outer;inner
+    microseconds" per line), the input of flamegraph.pl and inferno.
+    """
+    names = [f"{f['name']} ({os.path.basename(f['file'])}:{f['line']})" for f in doc["shared"]["frames"]]
+    lines = []
+    for profile in doc["profiles"]:
+        for stack, weight in zip(profile["samples"], profile["weights"]):
+            path = ";".join([profile["name"]] + [names[i] for i in stack])
+            lines.append(f"{path} {max(int(weight * 1_000_000), 1)}")
+    return "\n".join(lines) + "\n"
+
+
+def should_profile(request: Request) -> bool:
+    """Whether to profile this request: asked for by header or query, or sampled."""
+    if PROFILING_ENABLED and (request.headers.get("X-Profile", "").lower() in _TRUTHY
+                              or request.query_params.get("profile", "").lower() in _TRUTHY):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+@contextmanager
+def maybe_profile(request: Request) -> Iterator[Optional[str]]:
+    """
+    Profile the block if should_profile(request) and store the result as the
+    request's "profile" artifact. Without an artifact store (ARTIFACTS_ENABLED
+    off) there is nowhere to keep it, so nothing is profiled.
+    Yields:
+        Optional[str]: URL path of the profile, or None when not profiling
+    """
+    if not artifacts.ARTIFACTS_ENABLED or not should_profile(request):
+        yield None
+        return
+    if not _profile_slot.acquire(blocking=False):
+        logger.info("Profiler busy with another request, not profiling this one")
+        yield None
+        return
+    request_id = request_id_var.get()
+    profiler = SamplingProfiler()
+    profiler.start()
+    try:
+        yield f"/requests/{request_id}/profile"
+    finally:
+        profiler.stop()
+        _profile_slot.release()
+        artifact_store.record("profile", profiler.speedscope(f"{request.method} {request.url.path} {request_id}"),
+                              samples=profiler.samples, seconds=round(profiler.duration, 3))
+        logger.info("Profile recorded", extra={
+            "samples": profiler.samples, "seconds": round(profiler.duration, 3),
+        })
+
+
+class EventLoopMonitor:
+    """
+    Always-on detector of a blocked event loop.
+
+    A heartbeat coroutine stamps the time every `interval`; a watchdog thread
+    notices when the stamp gets older than `threshold` and, while the loop is
+    still stuck, captures the stack of the loop's thread and the task that
+    is running. Once the loop moves again, one warning reports how long it
+    was blocked and by what, e.g. a synchronous parse or HTTP call made
+    straight from a coroutine.
+    """
+
+    def __init__(self, threshold: float = LOOP_LAG_THRESHOLD_MS / 1000,
+                 interval: float = LOOP_LAG_INTERVAL_MS / 1000):
+        self.threshold = threshold
+        self.interval = interval
+        self._tick = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self.blocks = 0
+        self.max_blocked = 0.0
+        self.last_block: Optional[dict] = None
+
+    def start(self) -> None:
+        """Start monitoring the running loop (call from it, e.g. in the app lifespan)."""
+        if self.threshold <= 0:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._tick = time.monotonic()
+        self._heartbeat = asyncio.create_task(self._beat())
+        threading.Thread(target=self._watch, name="loop-monitor", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+
+    async def _beat(self) -> None:
+        while True:
+            self._tick = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def _capture(self) -> dict:
+        """What the loop thread is doing right now (called from the watchdog thread)."""
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = traceback.format_stack(frame)[-LOOP_LAG_STACK_DEPTH:] if frame is not None else []
+        culprit = {"stack": "".join(stack).rstrip()}
+        # The innermost coroutine on the stack is the one that stopped yielding
+        while frame is not None and not frame.f_code.co_flags & inspect.CO_COROUTINE:
+            frame = frame.f_back
+        if frame is not None:
+            code = frame.f_code
+            culprit["coroutine"] = f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        if task is not None:
+            culprit["task"] = task.get_name()
+            # Task contexts are readable from 3.12 on
+            get_context = getattr(task, "get_context", None)
+            if get_context is not None:
+                culprit["blocked_request_id"] = get_context().get(request_id_var)
+        return culprit
+
+    def _watch(self) -> None:
+        blocked_tick, culprit = None, None
+        while not self._stop.wait(self.interval):
+            tick = self._tick
+            if blocked_tick is not None and tick != blocked_tick:
+                blocked = tick - blocked_tick - self.interval
+                self._report(blocked, culprit)
+                blocked_tick, culprit = None, None
+            elif blocked_tick is None and time.monotonic() - tick - self.interval > self.threshold:
+                blocked_tick, culprit = tick, self._capture()
+
+    def _report(self, blocked: float, culprit: dict) -> None:
+        self.blocks += 1
+        self.max_blocked = max(self.max_blocked, blocked)
+        self.last_block = {"seconds": round(blocked, 3), "at": time.time(),
+                           **{k: v for k, v in culprit.items() if k != "stack"}}
+        logger.warning("Event loop blocked for %.0f ms by %s", blocked * 1000,
+                       culprit.get("coroutine", "unknown code"),
+                       extra={"blocked_seconds": round(blocked, 3), **culprit})
+
+    def stats(self) -> dict:
+        """Blocking episodes seen so far, for monitoring."""
+        return {
+            "enabled": self._loop is not None,
+            "threshold_ms": self.threshold * 1000,
+            "current_lag_ms": round(max(time.monotonic() - self._tick - self.interval, 0) * 1000, 1)
+            if self._loop is not None else None,
+            "blocks": self.blocks,
+            "max_blocked_seconds": round(self.max_blocked, 3),
+            "last_block": self.last_block,
+        }
+
+
+loop_monitor = EventLoopMonitor()
@@ -0,0 +1,191 @@
+import asyncio
+import contextvars
+import json
+import os
+import time
+import uuid
+from typing import AsyncIterator, Coroutine, Dict, List, Optional, Set
+
+from dotenv import load_dotenv
+
+from log import job_id_var
+from shared_state import get_shared_state, key
+
+load_dotenv()
+
+# How long finished jobs (and their event history) are kept around
+JOB_TTL_SECONDS = float(os.getenv("JOB_TTL_SECONDS", "3600"))
+
+TERMINAL_EVENTS = {"completed", "failed"}
+
+_current_job: contextvars.ContextVar[Optional["Job"]] = contextvars.ContextVar("progress_job", default=None)
+
+# Strong references to background tasks: the loop only keeps weak ones, so an
+# unreferenced task can be garbage-collected before it finishes
+_tasks: Set[asyncio.Task] = set()
+
+
+def spawn(coro: Coroutine, loop: Optional[asyncio.AbstractEventLoop] = None) -> asyncio.Task:
+    """Run a coroutine in the background, keeping it referenced until done."""
+    task = (loop or asyncio.get_running_loop()).create_task(coro)
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return task
+
+
+class Job:
+    """
+    Event history of one brief generation.
+
+    Events are appended in order and never dropped, so a subscriber that
+    connects late replays everything from the start before following live.
+    The status is mirrored to the shared state, and with a distributed one
+    the events too, so any worker can answer for the job.
+    """
+
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.status = "running"
+        self.result: Optional[dict] = None
+        self.events: List[dict] = []
+        self._loop = asyncio.get_running_loop()
+        self._changed = asyncio.Event()
+        self._state = get_shared_state()
+        # FIFO lock keeps mirrored events in emit order
+        self._mirror_lock = asyncio.Lock()
+        spawn(self._mirror_status(), self._loop)
+
+    async def _mirror_status(self) -> None:
+        await self._state.set_json(key("job", self.id), {"status": self.status, "result": self.result},
+                                   JOB_TTL_SECONDS)
+
+    async def _mirror(self, event: dict) -> None:
+        async with self._mirror_lock:
+            if self._state.distributed:
+                await self._state.rpush(key("job", self.id, "events"), json.dumps(event, default=str),
+                                        JOB_TTL_SECONDS)
+            if event["type"] in TERMINAL_EVENTS:
+                await self._mirror_status()
+
+    def _append(self, event: dict) -> None:
+        self.events.append(event)
+        if event["type"] in TERMINAL_EVENTS:
+            self.status = event["type"]
+            self.finished = time.time()
+        self._changed.set()
+        if self._state.distributed or event["type"] in TERMINAL_EVENTS:
+            spawn(self._mirror(event), self._loop)
+
+    @property
+    def stage(self) -> Optional[str]:
+        """Type of the latest event (streamed summary tokens aside), for status polling."""
+        return next((e["type"] for e in reversed(self.events) if e["type"] != "summary_token"), None)
+
+    def emit(self, event_type: str, **data) -> None:
+        """Record an event. Safe to call from worker threads."""
+        event = {"type": event_type, "ts": time.time(), **data}
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._append(event)
+        else:
+            self._loop.call_soon_threadsafe(self._append, event)
+
+    async def follow(self) -> AsyncIterator[dict]:
+        """Yield all past events, then live ones until the job finishes."""
+        idx = 0
+        while True:
+            while idx < len(self.events):
+                event = self.events[idx]
+                idx += 1
+                yield event
+                if event["type"] in TERMINAL_EVENTS:
+                    return
+            self._changed.clear()
+            await self._changed.wait()
+
+
+_jobs: Dict[str, Job] = {}
+
+
+def _purge_finished() -> None:
+    cutoff = time.time() - JOB_TTL_SECONDS
+    for job_id in [j.id for j in _jobs.values() if j.finished and j.finished < cutoff]:
+        del _jobs[job_id]
+
+
+def new_job_id() -> str:
+    return uuid.uuid4().hex
+
+
+async def mark_queued(job_id: str) -> None:
+    """Record a job as waiting in the job queue, so any worker can report it before it starts."""
+    await get_shared_state().set_json(key("job", job_id), {"status": "queued", "result": None}, JOB_TTL_SECONDS)
+
+
+def create_job(job_id: Optional[str] = None) -> Job:
+    """Register a new (or dequeued) job and make it the current one for this context."""
+    _purge_finished()
+    job = Job(job_id or new_job_id())
+    _jobs[job.id] = job
+    _current_job.set(job)
+    job_id_var.set(job.id)
+    return job
+
+
+def get_job(job_id: str) -> Optional[Job]:
+    return _jobs.get(job_id)
+
+
+def current_job() -> Optional[Job]:
+    return _current_job.get()
+
+
+def emit(event_type: str, **data) -> None:
+    """Emit a progress event for the current job; no-op outside a job."""
+    job = _current_job.get()
+    if job is not None:
+        job.emit(event_type, **data)
+
+
+async def get_remote_status(job_id: str) -> Optional[dict]:
+    """Return {"status", "result"} for a job still queued or run by another worker, if known."""
+    return await get_shared_state().get_json(key("job", job_id))
+
+
+async def follow_remote(job_id: str, poll_interval: float = 0.5) -> AsyncIterator[dict]:
+    """Like Job.follow(), for a job running on another worker."""
+    state = get_shared_state()
+    idx = 0
+    while True:
+        for raw in await state.lrange(key("job", job_id, "events"), idx):
+            idx += 1
+            event = json.loads(raw)
+            yield event
+            if event["type"] in TERMINAL_EVENTS:
+                return
+        await asyncio.sleep(poll_interval)
+
+
+async def follow_any(job_id: str, poll_interval: float = 0.5) -> AsyncIterator[dict]:
+    """Events of a job wherever it runs, waiting while it is still queued."""
+    state = get_shared_state()
+    job = get_job(job_id)
+    # An in-process queue is only consumed by this process, so the job starts here
+    while job is None and not state.distributed:
+        if await state.get_json(key("job", job_id)) is None:
+            return
+        await asyncio.sleep(poll_interval)
+        job = get_job(job_id)
+    events = job.follow() if job is not None else follow_remote(job_id, poll_interval)
+    async for event in events:
+        yield event
+
+
+def format_sse(event: dict) -> str:
+    """Serialize one event in Server-Sent Events wire format."""
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
@@ -0,0 +1,177 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from dotenv import load_dotenv
+
+from log import get_logger
+
+load_dotenv()
+
+logger = get_logger("resilience")
+
+T = TypeVar("T")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the upstream's circuit is open"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Per-upstream circuit breaker over a sliding window of recent calls.
+
+    The circuit opens when, over at least `min_calls` calls in the window,
+    the failure rate or the slow-call rate crosses its threshold. While open
+    every call is rejected immediately. After `open_seconds` one probe call
+    is let through (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name: str, window_size: int = 20, min_calls: int = 5,
+                 failure_rate: float = 0.5, slow_call_seconds: float = 10.0,
+                 slow_call_rate: float = 0.8, open_seconds: float = 30.0):
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self._window: Deque[Tuple[bool, float]] = deque(maxlen=window_size)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        # Outcomes are recorded from worker threads as well as the event loop
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def _trip(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._window.clear()
+        logger.warning("Circuit opened", extra={"upstream": self.name})
+
+    def allow_request(self) -> bool:
+        """Return True if a call may proceed (reserves the probe slot when half-open)."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def release(self) -> None:
+        """Give back a call that allow_request() let through without an outcome (e.g. cancelled)."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+
+    def record(self, ok: bool, latency: float) -> None:
+        """Record the outcome of a call that allow_request() let through."""
+        slow = latency >= self.slow_call_seconds
+        with self._lock:
+            if self._current_state() == HALF_OPEN:
+                self._probe_in_flight = False
+                if ok and not slow:
+                    self._state = CLOSED
+                    self._window.clear()
+                    logger.info("Circuit closed", extra={"upstream": self.name})
+                else:
+                    self._trip()
+                return
+
+            self._window.append((ok, latency))
+            calls = len(self._window)
+            if calls < self.min_calls:
+                return
+            failures = sum(1 for call_ok, _ in self._window if not call_ok)
+            slow_calls = sum(1 for _, call_latency in self._window if call_latency >= self.slow_call_seconds)
+            if failures / calls >= self.failure_rate or slow_calls / calls >= self.slow_call_rate:
+                self._trip()
+
+    async def call(self, fn: Callable[..., T], *args, timeout: Optional[float] = None, **kwargs) -> T:
+        """
+        Run a blocking function in a worker thread under this breaker.
+        Raises:
+            CircuitOpenError: If the circuit rejects the call
+            asyncio.TimeoutError: If the call exceeds `timeout` (counted as a failure)
+        A cancelled call (e.g. the losing side of a hedge) is not counted at all.
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(asyncio.to_thread(fn, *args, **kwargs), timeout)
+        except asyncio.CancelledError:
+            # Says nothing about the upstream's health
+            self.release()
+            raise
+        except BaseException:
+            self.record(False, time.perf_counter() - start)
+            raise
+        self.record(True, time.perf_counter() - start)
+        return result
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str, **settings) -> CircuitBreaker:
+    """Return the process-wide breaker for an upstream, creating it on first use."""
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name, **settings)
+    return _breakers[name]
+
+
+async def hedged(primary: Callable[[], Awaitable[T]], fallback: Callable[[], Awaitable[T]],
+                 delay: Optional[float]) -> T:
+    """
+    Run `primary`; start `fallback` if primary fails, or if it is still running
+    after `delay` seconds. Returns the first successful result and cancels the
+    other attempt; cancelling the caller cancels both. With `delay=None` this
+    is a plain sequential fallback.
+    Raises:
+        The last error if both attempts fail
+    """
+    first = asyncio.ensure_future(primary())
+    tasks = {first}
+    try:
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if first in done and first.exception() is None:
+            return first.result()
+
+        errors = []
+        pending = {asyncio.ensure_future(fallback())}
+        tasks |= pending
+        if first in done:
+            errors.append(first.exception())
+        else:
+            pending.add(first)
+
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                errors.append(task.exception())
+        raise errors[-1]
+    finally:
+        # The losing attempt, or both if the caller was cancelled
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+import os
+import re
+import time
+from typing import Dict, List
+
+from dotenv import load_dotenv
+
+from log import get_logger
+from shared_state import get_shared_state, key
+
+load_dotenv()
+
+logger = get_logger("seen_index")
+
+# How long a headline counts as already heard
+SEEN_ITEM_TTL_HOURS = float(os.getenv("SEEN_ITEM_TTL_HOURS", "72"))
+# Concurrent commits of one user's topic take turns; a holder that dies frees it after the TTL
+SEEN_LOCK_TTL_SECONDS = float(os.getenv("SEEN_LOCK_TTL_SECONDS", "10"))
+SEEN_LOCK_WAIT_SECONDS = float(os.getenv("SEEN_LOCK_WAIT_SECONDS", "10"))
+SEEN_LOCK_POLL_SECONDS = 0.05
+
+_WORD = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def normalize_headline(headline: str) -> str:
+    """Lowercase a headline and reduce it to its words, dropping punctuation."""
+    return " ".join(_WORD.findall(headline.lower()))
+
+
+def headline_fingerprint(headline: str) -> str:
+    """Fingerprint of the exact wording (ignoring case and punctuation)."""
+    return hashlib.sha1(normalize_headline(headline).encode("utf-8")).hexdigest()[:16]
+
+
+def story_fingerprint(headline: str) -> str:
+    """
+    Fingerprint of the story a headline is about: its distinct non-numeric
+    words, order-insensitive. "Death toll rises to 12" and "Death toll rises
+    to 20" share a story but not a headline fingerprint, so the second one is
+    reported as an update.
+    """
+    words = sorted({w for w in normalize_headline(headline).split() if not w.isdigit()})
+    return hashlib.sha1(" ".join(words).encode("utf-8")).hexdigest()[:16]
+
+
+def no_updates_script(topics: List[str]) -> str:
+    """Short broadcast line for topics with nothing new since the last brief."""
+    if len(topics) == 1:
+        return f"No major updates on {topics[0]} since your last brief."
+    return f"No major updates on {', '.join(topics[:-1])} or {topics[-1]} since your last brief."
+
+
+class SeenIndex:
+    """
+    Headlines a user has already been briefed on, per topic.
+
+    Entries map a headline fingerprint to its story fingerprint and the time
+    it was heard, and live in the shared state so every worker sees them.
+    Headlines picked by filter_new() are only recorded by commit(), i.e. once
+    the brief that contains them has actually been produced.
+    """
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        # Per-topic counts of "new", "updated" and "seen" headlines from filter_new()
+        self.stats: Dict[str, dict] = {}
+        self._pending: Dict[str, Dict[str, dict]] = {}
+
+    def _key(self, topic: str) -> str:
+        return key("seen", self.user_id, normalize_headline(topic))
+
+    async def _load(self, topic: str) -> Dict[str, dict]:
+        items = await get_shared_state().get_json(self._key(topic)) or {}
+        cutoff = time.time() - SEEN_ITEM_TTL_HOURS * 3600
+        return {fp: item for fp, item in items.items() if item["ts"] >= cutoff}
+
+    async def filter_new(self, topic: str, headlines: str) -> str:
+        """
+        Keep only headlines the user has not heard: new stories, and known
+        stories whose wording changed materially (e.g. updated figures).
+        Args:
+            topic: Topic the headlines belong to
+            headlines: Newline-separated headlines from extract_headlines()
+        Returns:
+            str: Remaining headlines, newline-separated (empty if nothing is new)
+        """
+        seen = await self._load(topic)
+        seen_stories = {item["story"] for item in seen.values()}
+        now = time.time()
+        pending = self._pending.setdefault(topic, {})
+        fresh, stats = [], {"new": 0, "updated": 0, "seen": 0}
+
+        for headline in dict.fromkeys(h.strip() for h in headlines.split("\n") if h.strip()):
+            fingerprint = headline_fingerprint(headline)
+            if fingerprint in seen:
+                stats["seen"] += 1
+                continue
+            story = story_fingerprint(headline)
+            stats["updated" if story in seen_stories else "new"] += 1
+            pending[fingerprint] = {"story": story, "ts": now}
+            fresh.append(headline)
+
+        self.stats[topic] = stats
+        logger.debug("Filtered seen headlines", extra={"topic": topic, **stats})
+        return "\n".join(fresh)
+
+    def retain(self, topic: str, headlines: str) -> None:
+        """Narrow a topic's pending headlines to those actually briefed (e.g. after ranking)."""
+        kept = {headline_fingerprint(h) for h in headlines.split("\n") if h.strip()}
+        pending = self._pending.get(topic, {})
+        for fingerprint in [fp for fp in pending if fp not in kept]:
+            del pending[fingerprint]
+
+    def unchanged_topics(self) -> List[str]:
+        """Topics filtered so far that had no new or updated headlines."""
+        return [t for t, s in self.stats.items() if not s["new"] and not s["updated"]]
+
+    async def commit(self) -> None:
+        """
+        Record every headline passed on by filter_new() as heard. Each topic's
+        read-modify-write holds a per-topic lock, so concurrent briefs of the
+        same user (on any worker) add to the entry instead of overwriting it.
+        """
+        for topic, pending in self._pending.items():
+            if pending:
+                await self._commit_topic(topic, pending)
+        self._pending.clear()
+
+    async def _commit_topic(self, topic: str, pending: Dict[str, dict]) -> None:
+        state = get_shared_state()
+        lock_key = key("seen", self.user_id, normalize_headline(topic), "lock")
+        give_up = time.monotonic() + SEEN_LOCK_WAIT_SECONDS
+        while (token := await state.acquire_lock(lock_key, SEEN_LOCK_TTL_SECONDS)) is None:
+            if time.monotonic() >= give_up:
+                # Better a possibly lost update than a brief that never counts as heard
+                logger.warning("Seen index lock busy, committing without it", extra={"topic": topic})
+                break
+            await asyncio.sleep(SEEN_LOCK_POLL_SECONDS)
+        try:
+            items = await self._load(topic)
+            items.update(pending)
+            await state.set_json(self._key(topic), items, SEEN_ITEM_TTL_HOURS * 3600)
+        finally:
+            if token is not None:
+                await state.release_lock(lock_key, token)
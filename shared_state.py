@@ -0,0 +1,361 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from log import get_logger
+
+load_dotenv()
+
+logger = get_logger("shared_state")
+
+# "memory://" keeps state in this process; "redis://host:6379/0" shares it across workers
+SHARED_STATE_URL = os.getenv("SHARED_STATE_URL", "memory://")
+# Prefix for every key, so several deployments can share one Redis
+SHARED_STATE_PREFIX = os.getenv("SHARED_STATE_PREFIX", "newsninja:")
+
+
+class SharedState:
+    """
+    Key/value, counter, lock and list primitives that every worker can see.
+
+    `InProcessState` is the default and behaves like a single worker.
+    `RedisState` talks to any Redis-compatible server, so state such as rate
+    limits, caches, locks and job data is shared by all workers on all nodes.
+    """
+
+    # True when the state is visible to other processes
+    distributed = False
+
+    async def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    async def incr(self, key: str, ttl: float) -> int:
+        """Increment a counter, starting its `ttl` expiry when it is created."""
+        raise NotImplementedError
+
+    async def acquire_lock(self, key: str, ttl: float) -> Optional[str]:
+        """Take a lock with automatic expiry. Returns a release token, or None if held."""
+        raise NotImplementedError
+
+    async def release_lock(self, key: str, token: str) -> None:
+        """Release a lock, but only if `token` still owns it."""
+        raise NotImplementedError
+
+    async def rpush(self, key: str, value: str, ttl: Optional[float] = None) -> int:
+        """Append to a list (queue tail). Returns the new length."""
+        raise NotImplementedError
+
+    async def lrange(self, key: str, start: int = 0, end: int = -1) -> List[str]:
+        raise NotImplementedError
+
+    async def ltrim(self, key: str, start: int, end: int) -> None:
+        """Keep only items start..end (inclusive, negative from the end) of a list."""
+        raise NotImplementedError
+
+    async def blpop(self, key: str, timeout: float) -> Optional[str]:
+        """Pop the head of a list, waiting up to `timeout` seconds for an item."""
+        raise NotImplementedError
+
+    # JSON helpers
+    async def get_json(self, key: str) -> Any:
+        raw = await self.get(key)
+        return None if raw is None else json.loads(raw)
+
+    async def set_json(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        await self.set(key, json.dumps(value, default=str), ttl)
+
+
+class InProcessState(SharedState):
+    """Single-process implementation backed by dicts with expiry timestamps."""
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[Any, Optional[float]]] = {}
+
+    def _live(self, key: str) -> Optional[Any]:
+        item = self._values.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires is not None and time.monotonic() >= expires:
+            del self._values[key]
+            return None
+        return value
+
+    def _expiry(self, ttl: Optional[float]) -> Optional[float]:
+        return time.monotonic() + ttl if ttl else None
+
+    async def get(self, key):
+        value = self._live(key)
+        # Counters read back as strings, like Redis
+        return str(value) if isinstance(value, int) else value if isinstance(value, str) else None
+
+    async def set(self, key, value, ttl=None):
+        self._values[key] = (value, self._expiry(ttl))
+
+    async def delete(self, key):
+        self._values.pop(key, None)
+
+    async def incr(self, key, ttl):
+        value = self._live(key)
+        if value is None:
+            self._values[key] = (1, self._expiry(ttl))
+            return 1
+        self._values[key] = (value + 1, self._values[key][1])
+        return value + 1
+
+    async def acquire_lock(self, key, ttl):
+        if self._live(key) is not None:
+            return None
+        token = uuid.uuid4().hex
+        self._values[key] = (token, self._expiry(ttl))
+        return token
+
+    async def release_lock(self, key, token):
+        if self._live(key) == token:
+            del self._values[key]
+
+    async def rpush(self, key, value, ttl=None):
+        items = self._live(key)
+        if items is None:
+            items = []
+            self._values[key] = (items, self._expiry(ttl))
+        elif ttl:
+            self._values[key] = (items, self._expiry(ttl))
+        items.append(value)
+        return len(items)
+
+    async def lrange(self, key, start=0, end=-1):
+        items = self._live(key) or []
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    async def ltrim(self, key, start, end):
+        items = self._live(key)
+        if items is not None:
+            items[:] = items[start:] if end == -1 else items[start:end + 1]
+
+    async def blpop(self, key, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            items = self._live(key)
+            if items:
+                return items.pop(0)
+            if time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(0.05)
+
+
+class RedisState(SharedState):
+    """Redis-compatible implementation (redis-py asyncio client)."""
+
+    distributed = True
+
+    _RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+    def __init__(self, client):
+        # Any client exposing the redis.asyncio API works, e.g. a local stand-in in tests
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisState":
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("SHARED_STATE_URL points at Redis but the 'redis' package is not installed") from e
+        return cls(redis.from_url(url, decode_responses=True))
+
+    async def get(self, key):
+        return await self.client.get(key)
+
+    async def set(self, key, value, ttl=None):
+        await self.client.set(key, value, px=int(ttl * 1000) if ttl else None)
+
+    async def delete(self, key):
+        await self.client.delete(key)
+
+    async def incr(self, key, ttl):
+        value = await self.client.incr(key)
+        if value == 1:
+            await self.client.pexpire(key, int(ttl * 1000))
+        return value
+
+    async def acquire_lock(self, key, ttl):
+        token = uuid.uuid4().hex
+        ok = await self.client.set(key, token, nx=True, px=int(ttl * 1000))
+        return token if ok else None
+
+    async def release_lock(self, key, token):
+        try:
+            await self.client.eval(self._RELEASE_SCRIPT, 1, key, token)
+        except Exception:
+            # Stand-ins without Lua support: compare-then-delete (not atomic, but the
+            # lock TTL is far longer than this gap)
+            if await self.client.get(key) == token:
+                await self.client.delete(key)
+
+    async def rpush(self, key, value, ttl=None):
+        length = await self.client.rpush(key, value)
+        if ttl:
+            await self.client.pexpire(key, int(ttl * 1000))
+        return length
+
+    async def lrange(self, key, start=0, end=-1):
+        return await self.client.lrange(key, start, end)
+
+    async def ltrim(self, key, start, end):
+        await self.client.ltrim(key, start, end)
+
+    async def blpop(self, key, timeout):
+        item = await self.client.blpop([key], timeout=timeout)
+        return item[1] if item else None
+
+
+_state: Optional[SharedState] = None
+
+
+def get_shared_state() -> SharedState:
+    """Return the process-wide shared state selected by SHARED_STATE_URL."""
+    global _state
+    if _state is None:
+        if SHARED_STATE_URL.startswith(("redis://", "rediss://", "unix://")):
+            _state = RedisState.from_url(SHARED_STATE_URL)
+        else:
+            _state = InProcessState()
+        logger.info("Shared state backend selected", extra={"backend": type(_state).__name__})
+    return _state
+
+
+def set_shared_state(state: SharedState) -> None:
+    """Swap the shared state backend (e.g. a local Redis stand-in in tests)."""
+    global _state
+    _state = state
+
+
+def key(*parts: str) -> str:
+    """Build a namespaced shared-state key."""
+    return SHARED_STATE_PREFIX + ":".join(parts)
+
+
+class SharedRateLimiter:
+    """
+    Rate limiter shared by every worker using the same shared state.
+    Allows `max_rate` acquisitions per `time_period` seconds (fixed window).
+    Drop-in for aiolimiter.AsyncLimiter: use as `async with limiter:`.
+    """
+
+    def __init__(self, name: str, max_rate: float, time_period: float = 60):
+        self.name = name
+        self.max_rate = max_rate
+        self.time_period = time_period
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.time()
+            window = int(now // self.time_period)
+            count = await get_shared_state().incr(key("rate", self.name, str(window)), self.time_period * 2)
+            if count <= self.max_rate:
+                return
+            # Window is full on some worker; wait for the next one
+            await asyncio.sleep((window + 1) * self.time_period - now)
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+class SharedQueue:
+    """FIFO job queue of JSON items, consumable by any worker."""
+
+    def __init__(self, name: str, ttl: Optional[float] = None):
+        self.key = key("queue", name)
+        self.ttl = ttl
+
+    async def put(self, item: Any) -> int:
+        return await get_shared_state().rpush(self.key, json.dumps(item, default=str), self.ttl)
+
+    async def get(self, timeout: float) -> Any:
+        """Return the next item, or None if none arrived within `timeout` seconds."""
+        raw = await get_shared_state().blpop(self.key, timeout)
+        return None if raw is None else json.loads(raw)
+
+
+class FlightError(RuntimeError):
+    """
+    A single_flight leader's failure, as seen by the waiters. Carries the
+    leader's HTTP status code and Retry-After (if its error had them), so
+    waiters can fail the same way.
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+async def single_flight(name: str, fn: Callable[[], Awaitable[Any]], ttl: float = 300,
+                        result_ttl: float = 30, poll_interval: float = 0.25,
+                        share: Optional[Callable[[Any], Any]] = None) -> Any:
+    """
+    Run `fn` at most once at a time across all workers for the same `name`.
+    The lock holder computes the JSON-serializable result and, only if
+    anyone is waiting, publishes it (passed through `share`, e.g. to leave
+    out bulky fields the waiters can rebuild); the waiters return that. If
+    the holder dies, its lock expires after `ttl` and a waiter takes over.
+    Raises:
+        FlightError: In waiters, when the holder failed
+    """
+    state = get_shared_state()
+    lock_key, result_key = key("flight", name, "lock"), key("flight", name, "result")
+    waiters_key = key("flight", name, "waiters")
+    while True:
+        token = await state.acquire_lock(lock_key, ttl)
+        if token is not None:
+            # Waiters must only ever see this flight's result, not an older one
+            await state.delete(result_key)
+            try:
+                result = await fn()
+                if await state.get(waiters_key) is not None:
+                    await state.set_json(result_key, {"ok": True, "value": share(result) if share else result},
+                                         result_ttl)
+                return result
+            except Exception as e:
+                if await state.get(waiters_key) is not None:
+                    await state.set_json(result_key, {
+                        "ok": False, "error": str(getattr(e, "detail", None) or e),
+                        "status_code": getattr(e, "status_code", None), "retry_after": getattr(e, "retry_after", None),
+                    }, result_ttl)
+                raise
+            finally:
+                await state.delete(waiters_key)
+                await state.release_lock(lock_key, token)
+
+        # Tell the holder to publish; one that already finished left no result, so we take over below
+        await state.incr(waiters_key, ttl)
+        while await state.get(lock_key) is not None:
+            published = await state.get_json(result_key)
+            if published is not None:
+                break
+            await asyncio.sleep(poll_interval)
+        published = await state.get_json(result_key)
+        if published is not None:
+            if published["ok"]:
+                return published["value"]
+            raise FlightError(published["error"], published.get("status_code"), published.get("retry_after"))
+        # Lock vanished without a result (expired or finished holder): try to take over
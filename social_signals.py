@@ -0,0 +1,284 @@
+import asyncio
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from dotenv import load_dotenv
+
+from log import get_logger
+from artifacts import artifact_store
+import deadline
+
+load_dotenv()
+
+logger = get_logger("social_signals")
+
+# Posts fetched as structured records per topic (0 disables fetching)
+SOCIAL_POSTS_PER_TOPIC = int(os.getenv("SOCIAL_POSTS_PER_TOPIC", "3"))
+SOCIAL_FETCH_TIMEOUT_SECONDS = float(os.getenv("SOCIAL_FETCH_TIMEOUT_SECONDS", "60"))
+# How long a topic's analysis is reused, also for similarly phrased topics
+SOCIAL_CACHE_TTL_SECONDS = float(os.getenv("SOCIAL_CACHE_TTL_SECONDS", "900"))
+
+# Word valences on a -3..3 scale (VADER-style). Extend or override with a
+# JSON object file via SENTIMENT_LEXICON_FILE.
+LEXICON: Dict[str, float] = {
+    # positive
+    "good": 1.9, "great": 3.0, "excellent": 3.0, "amazing": 2.8, "awesome": 3.0, "love": 3.0,
+    "loved": 2.9, "like": 1.5, "liked": 1.8, "best": 3.0, "better": 1.9, "nice": 1.8, "happy": 2.7,
+    "glad": 2.0, "excited": 2.2, "exciting": 2.2, "impressive": 2.3, "impressed": 2.1, "win": 2.8,
+    "wins": 2.7, "winning": 2.4, "success": 2.7, "successful": 2.8, "hope": 1.9, "hopeful": 2.0,
+    "promising": 1.7, "support": 1.7, "supportive": 1.9, "agree": 1.5, "thanks": 1.9, "thank": 1.5,
+    "helpful": 1.8, "useful": 1.9, "beautiful": 2.9, "brilliant": 2.8, "fantastic": 2.6, "fun": 2.3,
+    "interesting": 1.7, "strong": 1.6, "growth": 1.4, "gain": 1.6, "gains": 1.6, "improve": 1.9,
+    "improved": 2.1, "improvement": 2.0, "breakthrough": 2.2, "innovative": 1.9, "safe": 1.9,
+    "secure": 1.4, "fair": 1.3, "wow": 2.8, "cool": 1.3, "bullish": 1.8, "optimistic": 2.1,
+    "celebrate": 2.7, "recovery": 1.3, "benefit": 2.0, "benefits": 1.9, "positive": 2.6,
+    # negative
+    "bad": -2.5, "terrible": -2.1, "awful": -2.0, "horrible": -2.5, "worst": -3.1, "worse": -2.1,
+    "hate": -2.7, "hated": -3.2, "angry": -2.3, "sad": -2.1, "fear": -2.2, "afraid": -2.2,
+    "scared": -1.9, "worried": -1.2, "worry": -1.9, "concern": -1.0, "concerned": -1.2,
+    "concerns": -1.1, "problem": -1.7, "problems": -1.7, "issue": -1.0, "issues": -1.0,
+    "fail": -2.5, "failed": -2.3, "failure": -2.3, "loss": -1.3, "losses": -1.7, "lose": -1.7,
+    "lost": -1.3, "crisis": -3.1, "disaster": -3.1, "scam": -2.6, "fraud": -2.5, "corrupt": -3.0,
+    "lie": -1.6, "lies": -1.8, "wrong": -2.1, "stupid": -2.4, "useless": -1.8, "broken": -1.7,
+    "dangerous": -2.1, "danger": -2.4, "risk": -1.1, "risky": -0.8, "threat": -2.4, "attack": -2.1,
+    "war": -2.9, "killed": -3.5, "dead": -3.3, "crash": -1.7, "collapse": -2.2, "decline": -1.1,
+    "layoffs": -1.9, "ban": -2.6, "banned": -2.0, "outrage": -2.3, "disappointed": -1.9,
+    "disappointing": -2.2, "annoying": -1.7, "ridiculous": -2.1, "bearish": -1.6, "weak": -1.9,
+    "negative": -2.7, "pessimistic": -1.5, "sucks": -1.5, "unfair": -2.1, "shame": -2.1,
+}
+if os.getenv("SENTIMENT_LEXICON_FILE"):
+    with open(os.getenv("SENTIMENT_LEXICON_FILE")) as fh:
+        LEXICON.update({k.lower(): float(v) for k, v in json.load(fh).items()})
+
+# Negators flip (and damp) the valence of the next few words; boosters scale the next one
+NEGATORS = frozenset("not no never nor neither cannot can't don't doesn't didn't isn't aren't "
+                     "wasn't weren't won't wouldn't shouldn't couldn't hardly without".split())
+NEGATION_SCOPE = 3
+NEGATION_SCALAR = -0.74
+BOOSTERS = {"very": 1.3, "really": 1.3, "extremely": 1.5, "incredibly": 1.5, "so": 1.2, "super": 1.3,
+            "totally": 1.3, "absolutely": 1.4, "slightly": 0.7, "somewhat": 0.8, "barely": 0.6}
+# Normalization constant mapping summed valences into (-1, 1)
+NORMALIZATION_ALPHA = 15.0
+# Compound scores within this margin of zero count as neutral
+NEUTRAL_MARGIN = 0.05
+
+# Where the structured records keep each engagement metric, across Reddit and X datasets
+METRIC_FIELDS = {
+    "likes": ("likes", "num_likes", "like_count", "favorite_count", "upvotes", "num_upvotes", "score"),
+    "shares": ("reposts", "num_reposts", "retweets", "retweet_count", "shares", "num_shares"),
+    "replies": ("replies", "num_replies", "reply_count", "num_comments", "comments_count"),
+    "views": ("views", "num_views", "view_count", "impressions"),
+}
+# Interaction weights: a reply says more about engagement than a like
+INTERACTION_WEIGHTS = np.array([1.0, 2.0, 3.0])  # likes, shares, replies
+TEXT_FIELDS = ("description", "text", "content", "body", "comment", "title", "post")
+
+_TOKEN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+_COUNT = re.compile(r"^([\d.,]+)\s*([kmb]?)$")
+_MULTIPLIERS = {"": 1, "k": 1e3, "m": 1e6, "b": 1e9}
+
+
+def sentiment_scores(texts: List[str]) -> np.ndarray:
+    """
+    Lexicon sentiment of each text, vectorized over the whole batch.
+    Returns:
+        np.ndarray: Compound scores in (-1, 1), one per text
+    """
+    tokens = [_TOKEN.findall(text.lower()) for text in texts]
+    lengths = np.fromiter((len(t) for t in tokens), dtype=np.int64, count=len(tokens))
+    flat = [token for doc in tokens for token in doc]
+    if not flat:
+        return np.zeros(len(texts))
+    doc_ids = np.repeat(np.arange(len(texts)), lengths)
+    # Look up each distinct word once
+    vocab, inverse = np.unique(np.array(flat), return_inverse=True)
+    valence = np.array([LEXICON.get(w, 0.0) for w in vocab])[inverse]
+    negator = np.array([w in NEGATORS for w in vocab])[inverse]
+    booster = np.array([BOOSTERS.get(w, 1.0) for w in vocab])[inverse]
+
+    # A word is negated if a negator precedes it within the scope, in the same text
+    negated = np.zeros(len(flat), dtype=bool)
+    for offset in range(1, NEGATION_SCOPE + 1):
+        negated[offset:] |= negator[:-offset] & (doc_ids[offset:] == doc_ids[:-offset])
+    valence = np.where(negated, valence * NEGATION_SCALAR, valence)
+    boosted = np.ones(len(flat))
+    boosted[1:] = np.where(doc_ids[1:] == doc_ids[:-1], booster[:-1], 1.0)
+    valence = valence * boosted
+
+    totals = np.bincount(doc_ids, weights=valence, minlength=len(texts))
+    return totals / np.sqrt(totals ** 2 + NORMALIZATION_ALPHA)
+
+
+def parse_count(value: Any) -> float:
+    """Numeric value of a count such as 1234, "1,234" or "1.2K"; NaN if unparseable."""
+    if isinstance(value, bool) or value is None:
+        return np.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _COUNT.match(str(value).strip().lower())
+    if not match:
+        return np.nan
+    try:
+        return float(match.group(1).replace(",", "")) * _MULTIPLIERS[match.group(2)]
+    except ValueError:
+        return np.nan
+
+
+def _text_of(record: dict) -> str:
+    return next((str(record[f]) for f in TEXT_FIELDS if record.get(f)), "")
+
+
+def flatten_records(records: List[dict]) -> List[dict]:
+    """Posts plus their embedded comments, each as a record with its own text and metrics."""
+    items = []
+    for record in records:
+        if not isinstance(record, dict):
+            continue
+        if _text_of(record):
+            items.append(record)
+        for comment in record.get("comments") or []:
+            if isinstance(comment, dict) and _text_of(comment):
+                items.append(comment)
+    return items
+
+
+def post_texts(records: List[dict], limit: int = 10, chars: int = 300) -> List[str]:
+    """First `limit` post and comment texts, truncated, for a summary prompt."""
+    return [_text_of(item)[:chars] for item in flatten_records(records)[:limit]]
+
+
+def engagement_matrix(items: List[dict]) -> np.ndarray:
+    """
+    Engagement metrics of each item.
+    Returns:
+        np.ndarray: Shape (len(items), 4) for likes, shares, replies, views; NaN where missing
+    """
+    matrix = np.full((len(items), len(METRIC_FIELDS)), np.nan)
+    for row, item in enumerate(items):
+        for col, fields in enumerate(METRIC_FIELDS.values()):
+            value = next((item[f] for f in fields if item.get(f) is not None), None)
+            matrix[row, col] = parse_count(value)
+    return matrix
+
+
+def score_posts(records: List[dict], quotes: int = 2) -> Optional[dict]:
+    """
+    Compact numeric summary of structured social posts.
+    Args:
+        records: Post records as returned by the scraping tools (comments included)
+        quotes: Most engaging texts to keep as quote candidates
+    Returns:
+        Optional[dict]: {"items", "sentiment": {...}, "engagement": {...}, "top"}, or None without any text
+    """
+    items = flatten_records(records)
+    if not items:
+        return None
+    texts = [_text_of(item) for item in items]
+    scores = sentiment_scores(texts)
+    metrics = engagement_matrix(items)
+    interactions = np.nan_to_num(metrics[:, :3]) @ INTERACTION_WEIGHTS
+    # Engaging posts speak for more people, but log-damped so one viral post can't dominate
+    weights = np.log1p(interactions) + 1
+
+    mean = float(scores.mean())
+    weighted = float(np.average(scores, weights=weights))
+    summary = {
+        "items": len(items),
+        "sentiment": {
+            "mean": round(mean, 3),
+            "weighted": round(weighted, 3),
+            "positive": round(float((scores > NEUTRAL_MARGIN).mean()), 3),
+            "negative": round(float((scores < -NEUTRAL_MARGIN).mean()), 3),
+            "label": sentiment_label(weighted),
+        },
+        "engagement": {},
+        "top": [texts[i][:280] for i in np.argsort(-interactions, kind="stable")[:quotes]],
+    }
+    for col, name in enumerate(METRIC_FIELDS):
+        if not np.isnan(metrics[:, col]).all():
+            summary["engagement"][name] = int(np.nansum(metrics[:, col]))
+    if interactions.any():
+        summary["engagement"]["median_interactions"] = float(np.median(interactions))
+        summary["engagement"]["max_interactions"] = float(interactions.max())
+    return summary
+
+
+def sentiment_label(score: float) -> str:
+    if score > NEUTRAL_MARGIN:
+        return "positive"
+    if score < -NEUTRAL_MARGIN:
+        return "negative"
+    return "neutral"
+
+
+def _human(count: float) -> str:
+    for threshold, suffix in ((1e6, "M"), (1e3, "K")):
+        if count >= threshold:
+            return f"{count / threshold:.1f}{suffix}"
+    return f"{count:.0f}"
+
+
+def format_signals(summary: Optional[dict]) -> str:
+    """
+    One-line rendering of score_posts() output for the broadcast prompt, e.g.
+    "MEASURED SIGNALS (14 posts and comments): sentiment mostly positive (+0.31; 57% positive, 14% negative); engagement 4.1K likes, 320 replies"
+    """
+    if not summary:
+        return ""
+    sentiment = summary["sentiment"]
+    line = (f"MEASURED SIGNALS ({summary['items']} posts and comments): sentiment mostly {sentiment['label']} "
+            f"({sentiment['weighted']:+.2f}; {sentiment['positive']:.0%} positive, {sentiment['negative']:.0%} negative)")
+    counts = [f"{_human(summary['engagement'][m])} {m}" for m in METRIC_FIELDS if m in summary["engagement"]]
+    if counts:
+        line += "; engagement " + ", ".join(counts)
+    return line
+
+
+def _parse_tool_output(output: Any) -> List[dict]:
+    """Records from a data tool's output (JSON text, a record or a list of records)."""
+    if isinstance(output, str):
+        try:
+            output = json.loads(output)
+        except ValueError:
+            return []
+    if isinstance(output, dict):
+        output = output.get("data") or output.get("results") or [output]
+    return [r for r in output if isinstance(r, dict)] if isinstance(output, list) else []
+
+
+async def collect_posts(tool_map: Dict[str, Any], query: str, url_pattern: "re.Pattern[str]",
+                        data_tool: str, limit: int = SOCIAL_POSTS_PER_TOPIC,
+                        topic: Optional[str] = None) -> List[dict]:
+    """
+    Fetch structured post records through the MCP tools: search for post
+    URLs, then read each with the dataset tool. Returns an empty list when
+    the tools are missing, nothing was found or the deadline leaves no time.
+    Args:
+        tool_map: MCP tools by name
+        query: Search engine query, e.g. "site:reddit.com AI"
+        url_pattern: Matches post URLs in the search results
+        data_tool: Tool returning the structured record of one post URL
+        limit: Posts to fetch
+        topic: Topic the records are stored under
+    """
+    timeout = deadline.budget(SOCIAL_FETCH_TIMEOUT_SECONDS, deadline.BRIEF_RESERVE_SECONDS)
+    if limit <= 0 or timeout <= 0 or "search_engine" not in tool_map or data_tool not in tool_map:
+        return []
+
+    async def fetch() -> List[dict]:
+        results = await tool_map["search_engine"].ainvoke({"query": query, "engine": "google"})
+        urls = list(dict.fromkeys(url_pattern.findall(str(results))))[:limit]
+        outputs = await asyncio.gather(*(tool_map[data_tool].ainvoke({"url": url}) for url in urls),
+                                       return_exceptions=True)
+        return [r for out in outputs if not isinstance(out, BaseException) for r in _parse_tool_output(out)]
+
+    try:
+        records = await asyncio.wait_for(fetch(), timeout)
+    except Exception as e:
+        logger.warning("Structured post fetch failed: %s", e, extra={"tool": data_tool, "query": query})
+        return []
+    artifact_store.record("social_posts", records, topic=topic, tool=data_tool, query=query)
+    return records
@@ -0,0 +1,223 @@
+import asyncio
+import os
+import re
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from langchain_mcp_adapters.tools import load_mcp_tools
+
+from log import get_logger
+from llm import get_llm, LLM_TIMEOUT_SECONDS
+from resilience import get_breaker
+from shared_state import SharedRateLimiter
+from artifacts import artifact_store
+from social_signals import collect_posts, score_posts, post_texts, SOCIAL_CACHE_TTL_SECONDS
+from topic_cache import SemanticCache
+from sources import Source, SourceRun, Stage, register
+import deadline
+
+load_dotenv()
+
+logger = get_logger("social_sources")
+
+# Topics of one source fetched / analyzed at once per worker (rate limits still apply)
+SOCIAL_FETCH_CONCURRENCY = int(os.getenv("SOCIAL_FETCH_CONCURRENCY", "2"))
+SOCIAL_ANALYZE_CONCURRENCY = int(os.getenv("SOCIAL_ANALYZE_CONCURRENCY", "4"))
+
+# Summaries are best effort: an LLM that keeps failing or stalling is skipped for a while
+llm_breaker = get_breaker("social_llm", slow_call_seconds=LLM_TIMEOUT_SECONDS / 2)
+
+
+def server_params() -> StdioServerParameters:
+    """The BrightData MCP server, built per session so importing needs no credentials."""
+    return StdioServerParameters(
+        command="npx",
+        env={
+            "API_TOKEN": os.getenv("API_TOKEN", ""),
+            "WEB_UNLOCKER_ZONE": os.getenv("WEB_UNLOCKER_ZONE", ""),
+        },
+        args=["@brightdata/mcp"],
+    )
+
+
+class MCPOverloadedError(Exception):
+    pass
+
+
+class SocialSource(Source):
+    """
+    A social network searched through the BrightData MCP server.
+
+    Per topic: fetch structured posts (rate limited), score their sentiment
+    and engagement locally, and have the LLM summarize what was said. Without
+    posts, the LLM gets the source's open-ended fallback prompt instead.
+    Prompts are format strings over {topic}, {posts} and {since}.
+    """
+
+    def __init__(self, name: str, title: str, site: str, url_pattern: str, data_tool: str,
+                 limiter: SharedRateLimiter, summary_prompt: Tuple[str, str], fallback_prompt: Tuple[str, str],
+                 max_tokens: Tuple[int, int], cue: str, since_days: int = 14, cost: float = 2.0):
+        """
+        Args:
+            site: Domain searched for posts, e.g. "reddit.com"
+            url_pattern: Matches post URLs in search results
+            data_tool: MCP tool reading one post URL as a structured record
+            limiter: Rate limit of the source's MCP calls
+            summary_prompt: (system, user) prompt over fetched posts
+            fallback_prompt: (system, user) prompt when no posts were fetched
+            max_tokens: Output limits of the summary and fallback prompts
+            since_days: How far back {since} lies
+        """
+        self.site = site
+        self.url_pattern = re.compile(url_pattern)
+        self.data_tool = data_tool
+        self.summary_prompt = summary_prompt
+        self.fallback_prompt = fallback_prompt
+        self.max_tokens = max_tokens
+        self.since_days = since_days
+        super().__init__(
+            name, title,
+            stages=[
+                Stage("fetch", self.fetch, limiter=limiter, concurrency=SOCIAL_FETCH_CONCURRENCY),
+                Stage("score", self.score, after=("fetch",)),
+                # Long overload back-offs only while the request's deadline can absorb them
+                Stage("analyze", self.analyze, after=("fetch", "score"), concurrency=SOCIAL_ANALYZE_CONCURRENCY,
+                      retry_on=(MCPOverloadedError,), attempts=3, retry_wait=(15, 60)),
+            ],
+            cost=cost,
+            cache=SemanticCache(name, SOCIAL_CACHE_TTL_SECONDS),
+            heading=f"{title.upper()} DISCUSSION CONTENT",
+            cue=cue,
+        )
+
+    @asynccontextmanager
+    async def session(self, ctx: SourceRun) -> AsyncIterator[Dict[str, Any]]:
+        """One MCP server per run, shared by all its topics; yields the tools by name."""
+        async with stdio_client(server_params()) as (read, write):
+            async with ClientSession(read, write) as session:
+                logger.debug("Initializing MCP session", extra={"source": self.name})
+                await session.initialize()
+                tools = await load_mcp_tools(session)
+                yield {tool.name: tool for tool in tools}
+
+    def unavailable_message(self, topic: str) -> str:
+        return f"{self.title} discussions about {topic} are currently unavailable."
+
+    async def fetch(self, ctx: SourceRun, topic: str, inputs: dict) -> list:
+        return await collect_posts(ctx.session, f"site:{self.site} {topic}", self.url_pattern,
+                                   self.data_tool, topic=topic)
+
+    async def score(self, ctx: SourceRun, topic: str, inputs: dict) -> Optional[dict]:
+        posts = inputs["fetch"]
+        return await asyncio.to_thread(score_posts, posts) if posts else None
+
+    async def analyze(self, ctx: SourceRun, topic: str, inputs: dict) -> str:
+        """
+        Summarize the topic's posts; sentiment and engagement are measured,
+        so the LLM only says what was discussed.
+        """
+        posts, signals = inputs["fetch"], inputs["score"]
+        if signals:
+            (system, user), max_tokens = self.summary_prompt, self.max_tokens[0]
+        else:
+            (system, user), max_tokens = self.fallback_prompt, self.max_tokens[1]
+        since = (datetime.today() - timedelta(days=self.since_days)).strftime('%Y-%m-%d')
+        posts_text = "\n".join(f"- {text}" for text in post_texts(posts))
+        messages = [
+            {"role": "system", "content": system.format(topic=topic, posts=posts_text, since=since)},
+            {"role": "user", "content": user.format(topic=topic, posts=posts_text, since=since)},
+        ]
+        try:
+            # The configured provider, within what the deadline leaves before the brief reserve
+            llm = get_llm(os.getenv("GEMINI_API_KEY"))
+            timeout = deadline.budget(LLM_TIMEOUT_SECONDS, deadline.BRIEF_RESERVE_SECONDS)
+            if timeout <= 0:
+                raise deadline.DeadlineExceeded(f"No time budget left for {self.title} analysis")
+            content = await llm_breaker.call(llm.generate, f"{messages[0]['content']}\n\n{messages[1]['content']}",
+                                             temperature=0.7, max_tokens=max_tokens, timeout=timeout)
+        except Exception as e:
+            if "Overloaded" in str(e):
+                raise MCPOverloadedError("Service overloaded")
+            logger.warning("AI analysis failed: %s", e, extra={"source": self.name, "topic": topic})
+            content = self.unavailable_message(topic)
+        artifact_store.record(f"{self.name}_analysis", {"messages": messages, "output": content, "signals": signals},
+                              topic=topic)
+        return content
+
+    def result(self, topic: str, outputs: Dict[str, Any]) -> Dict[str, Any]:
+        return {"analysis": outputs["analyze"], "signals": outputs["score"]}
+
+    def cacheable(self, topic: str, fields: Dict[str, Any]) -> bool:
+        return fields["analysis"] != self.unavailable_message(topic)
+
+
+reddit = register(SocialSource(
+    "reddit", "Reddit", site="reddit.com",
+    # Reddit post URLs in search results, read back as structured records by web_data_reddit_posts
+    url_pattern=r"https://(?:www\.)?reddit\.com/r/\w+/comments/\w+[^\s)\]\"'<>]*",
+    data_tool="web_data_reddit_posts",
+    limiter=SharedRateLimiter("reddit_mcp", 1, 15),
+    summary_prompt=(
+        "You are a Reddit analysis expert. Summarize discussions from the given posts and comments.",
+        """Reddit posts and comments about '{topic}':
+                {posts}
+
+                In at most 120 words give the main discussion points and key opinions, and quote
+                one or two interesting comments without mentioning names. Do not estimate
+                sentiment or engagement; they are measured separately.""",
+    ),
+    fallback_prompt=(
+        """You are a Reddit analysis expert. Use available tools to:
+                    1. Find top 2 posts about the given topic BUT only after {since}, NOTHING before this date strictly!
+                    2. Analyze their content and sentiment
+                    3. Create a summary of discussions and overall sentiment""",
+        """Analyze Reddit posts about '{topic}'.
+                    Provide a comprehensive summary including:
+                    - Main discussion points
+                    - Key opinions expressed
+                    - Any notable trends or patterns
+                    - Summarize the overall narrative, discussion points and also quote interesting comments without mentioning names
+                    - Overall sentiment (positive/neutral/negative)""",
+    ),
+    max_tokens=(600, 2000),
+    cue="Online discussions on Reddit reveal...",
+))
+
+twitter = register(SocialSource(
+    "twitter", "Twitter", site="x.com",
+    # Twitter post URLs in search results, read back as structured records by web_data_x_posts
+    url_pattern=r"https://(?:x|twitter)\.com/\w+/status/\d+",
+    data_tool="web_data_x_posts",
+    limiter=SharedRateLimiter("twitter_mcp", 2, 15),
+    summary_prompt=(
+        "You are a Twitter analysis expert. Summarize conversations from the given tweets.",
+        """Tweets about '{topic}':
+                {posts}
+
+                In at most 100 words give the key messages, perspectives and notable hashtags,
+                and quote one or two interesting tweets without mentioning usernames. Do not
+                estimate sentiment or engagement; they are measured separately.""",
+    ),
+    fallback_prompt=(
+        """You are a Twitter analysis expert. Use available tools to:
+                    1. Find trending tweets about the given topic from the last 24-48 hours
+                    2. Analyze tweet content, engagement metrics, and sentiment
+                    3. Identify key influencers and viral discussions
+                    4. Create a summary of Twitter conversations and overall sentiment""",
+        """Analyze Twitter/X posts about '{topic}'.
+                    Provide a comprehensive summary including:
+                    - Top trending tweets and their key messages
+                    - Engagement levels (likes, retweets, replies)
+                    - Sentiment analysis (positive/negative/neutral)
+                    - Key influencers and their perspectives
+                    - Notable hashtags and trends
+                    - Quote interesting tweets without mentioning usernames
+                    - Overall Twitter narrative and discussion points""",
+    ),
+    max_tokens=(500, 1500),
+    cue="On Twitter, trending conversations show...",
+))
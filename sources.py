@@ -0,0 +1,341 @@
+import asyncio
+import importlib
+import os
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Any, AsyncContextManager, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+from log import get_logger, elapsed
+from shared_state import SharedRateLimiter
+from topic_cache import SemanticCache
+import admission
+import deadline
+import progress
+
+load_dotenv()
+
+logger = get_logger("sources")
+
+# Modules that register sources when imported; SOURCE_PLUGINS adds more (comma-separated)
+BUILTIN_PLUGINS = ("news_scraper", "social_sources")
+SOURCE_PLUGINS = [m.strip() for m in os.getenv("SOURCE_PLUGINS", "").split(",") if m.strip()]
+
+# Stage scopes: one node per topic, or one node for all topics of the source
+PER_TOPIC, PER_SOURCE = "topic", "source"
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One step of a source's pipeline, run as a node per (source, topic) or
+    per source. `run(ctx, topic, inputs)` receives the source run, the topic
+    (None for PER_SOURCE stages) and the outputs of the stages it comes
+    `after`, keyed by stage name; a PER_SOURCE stage after a PER_TOPIC one
+    gets those outputs keyed by topic.
+    """
+    name: str
+    run: Callable[["SourceRun", Optional[str], Dict[str, Any]], Awaitable[Any]]
+    after: Tuple[str, ...] = ()
+    scope: str = PER_TOPIC
+    # Cross-worker rate limit, e.g. SharedRateLimiter("reddit_mcp", 1, 15)
+    limiter: Optional[SharedRateLimiter] = None
+    # Nodes of this stage running at once per worker, across requests (0 = unbounded)
+    concurrency: int = 0
+    # Retried exceptions, attempt limit and exponential wait bounds in seconds
+    retry_on: Tuple[type, ...] = ()
+    attempts: int = 1
+    retry_wait: Tuple[float, float] = (1, 30)
+
+
+class Source:
+    """
+    A source plugin: how to fetch and analyze topics from one place.
+
+    Per-topic pipelines end in result(), which maps a topic's stage outputs
+    to its result fields ({"analysis": text, ...} becomes
+    results[name]["<name>_analysis"][topic]); those fields are what the
+    source's cache keeps. Pipelines ending in a PER_SOURCE stage return the
+    source's whole result dict from that stage instead.
+    """
+
+    def __init__(self, name: str, title: str, stages: Sequence[Stage], cost: float = 1.0,
+                 optional: bool = True, cache: Optional[SemanticCache] = None,
+                 heading: str = "", cue: str = ""):
+        """
+        Args:
+            name: Source id used in results and NewsRequest source types, e.g. "reddit"
+            title: Display name, e.g. "Reddit"
+            stages: Pipeline stages, in an order where each comes after its dependencies
+            cost: Admission cost of one topic, in units
+            optional: Best effort: limited to what the deadline's brief reserve leaves
+                      over, and failures degrade to "unavailable" instead of failing the brief
+            cache: Reuses per-topic result fields (also for similarly phrased topics)
+            heading: Heading of this source's content in the broadcast prompt
+            cue: How the broadcast introduces this source's content
+        """
+        self.name = name
+        self.title = title
+        self.stages = tuple(stages)
+        self.cost = cost
+        self.optional = optional
+        self.cache = cache
+        self.heading = heading or f"{title.upper()} CONTENT"
+        self.cue = cue
+        # Whether results are assembled per topic (and cached) or come from one source-wide stage
+        self.per_topic = self.stages[-1].scope == PER_TOPIC
+
+    def session(self, ctx: "SourceRun") -> AsyncContextManager[Any]:
+        """Resources shared by the nodes of one run, e.g. an MCP connection (ctx.session)."""
+        return nullcontext()
+
+    def result(self, topic: str, outputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Result fields of a topic from its stage outputs (default: the last stage's output)."""
+        return {"analysis": outputs[self.stages[-1].name]}
+
+    def cacheable(self, topic: str, fields: Dict[str, Any]) -> bool:
+        return True
+
+    def unavailable(self, topic: str) -> str:
+        """Stand-in analysis for a topic the source could not cover."""
+        return f"{self.title} unavailable"
+
+    def describe(self) -> dict:
+        """Declared pipeline, limits and cache policy, for monitoring."""
+        return {
+            "name": self.name,
+            "title": self.title,
+            "cost": self.cost,
+            "optional": self.optional,
+            "stages": [{
+                "name": s.name,
+                "after": list(s.after),
+                "scope": s.scope,
+                "rate_limit": f"{s.limiter.max_rate}/{s.limiter.time_period}s" if s.limiter else None,
+                "concurrency": s.concurrency or None,
+                "attempts": s.attempts,
+            } for s in self.stages],
+            "cache": {"ttl_seconds": self.cache.ttl, **self.cache.stats} if self.cache else None,
+            "metrics": {stage: dict(_stats[(self.name, stage)]) for stage in (s.name for s in self.stages)},
+        }
+
+
+class SourceRun:
+    """State of one source over one scrape: its topics, request params and node outputs."""
+
+    def __init__(self, source: Source, topics: List[str], params: Dict[str, Any]):
+        self.source = source
+        self.topics = topics
+        self.params = params
+        self.session: Any = None
+        self.outputs: Dict[Tuple[str, Optional[str]], Any] = {}
+        self.fields: Dict[str, Dict[str, Any]] = {}
+
+    def results(self) -> dict:
+        """The source's result dict; topics without fields get the unavailable message."""
+        source = self.source
+        if not source.per_topic and (source.stages[-1].name, None) in self.outputs:
+            return self.outputs[(source.stages[-1].name, None)]
+        results: Dict[str, Dict[str, Any]] = {f"{source.name}_analysis": {}}
+        for topic in self.topics:
+            fields = self.fields.get(topic) or {"analysis": source.unavailable(topic)}
+            for field, value in fields.items():
+                if value is not None:
+                    results.setdefault(f"{source.name}_{field}", {})[topic] = value
+        return results
+
+
+SOURCES: Dict[str, Source] = {}
+
+# Per (source, stage): nodes run, failed and retried, seconds running and waiting for limits
+_stats: Dict[Tuple[str, str], Dict[str, float]] = defaultdict(
+    lambda: {"runs": 0, "failures": 0, "retries": 0, "seconds": 0.0, "waited_seconds": 0.0})
+_semaphores: Dict[Tuple[int, str, str], asyncio.Semaphore] = {}
+
+
+def register(source: Source) -> Source:
+    """Add a source to the registry (replacing one of the same name)."""
+    SOURCES[source.name] = source
+    admission.SOURCE_COSTS[source.name] = source.cost
+    return source
+
+
+def load_plugins() -> None:
+    """Import the built-in source modules and those listed in SOURCE_PLUGINS."""
+    for module in (*BUILTIN_PLUGINS, *SOURCE_PLUGINS):
+        importlib.import_module(module)
+
+
+def describe() -> List[dict]:
+    return [source.describe() for source in SOURCES.values()]
+
+
+def _semaphore(source: str, stage: Stage) -> Any:
+    if not stage.concurrency:
+        return nullcontext()
+    # Per loop: asyncio primitives can't be shared between event loops
+    key = (id(asyncio.get_running_loop()), source, stage.name)
+    if key not in _semaphores:
+        _semaphores[key] = asyncio.Semaphore(stage.concurrency)
+    return _semaphores[key]
+
+
+async def _run_node(ctx: SourceRun, stage: Stage, topic: Optional[str], inputs: Dict[str, Any]) -> Any:
+    """Run one node under its stage's concurrency, rate limit and retry policy."""
+    stats = _stats[(ctx.source.name, stage.name)]
+    queued = time.perf_counter()
+    async with _semaphore(ctx.source.name, stage):
+        # Optional sources only retry while the brief's reserve stays untouched
+        reserve = deadline.BRIEF_RESERVE_SECONDS if ctx.source.optional else 0.0
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(stage.attempts) | deadline.stop_before_deadline(reserve),
+            wait=wait_exponential(multiplier=1, min=stage.retry_wait[0], max=stage.retry_wait[1]),
+            retry=retry_if_exception_type(stage.retry_on),
+            reraise=True,
+        )
+        started = None
+        try:
+            async for attempt in retrying:
+                with attempt:
+                    if attempt.retry_state.attempt_number > 1:
+                        stats["retries"] += 1
+                    if stage.limiter is not None:
+                        await stage.limiter.acquire()
+                    if started is None:
+                        started = time.perf_counter()
+                        stats["waited_seconds"] += started - queued
+                    output = await stage.run(ctx, topic, inputs)
+        except BaseException:
+            stats["failures"] += 1
+            raise
+        finally:
+            stats["runs"] += 1
+            if started is not None:
+                stats["seconds"] += time.perf_counter() - started
+    logger.debug("Stage done", extra={"source": ctx.source.name, "stage": stage.name, "topic": topic})
+    return output
+
+
+async def _execute(ctx: SourceRun) -> None:
+    """
+    Schedule every (stage, topic) node of the source as soon as its
+    dependencies are done; independent nodes run concurrently.
+    """
+    source = ctx.source
+    topics = list(ctx.topics)
+    if source.per_topic and source.cache is not None:
+        for topic in ctx.topics:
+            hit = await source.cache.get(topic)
+            if hit is not None:
+                fields, matched, _ = hit
+                ctx.fields[topic] = fields
+                topics.remove(topic)
+                progress.emit("topic_done", source=source.name, topic=topic, cached_from=matched)
+        if not topics:
+            logger.info("All topics served from cache", extra={"source": source.name, "topics": len(ctx.topics)})
+            return
+
+    scopes = {stage.name: stage.scope for stage in source.stages}
+    tasks: Dict[Tuple[str, Optional[str]], asyncio.Task] = {}
+
+    async def node(stage: Stage, topic: Optional[str]) -> Any:
+        inputs: Dict[str, Any] = {}
+        for dep in stage.after:
+            if scopes[dep] == PER_SOURCE:
+                inputs[dep] = await tasks[(dep, None)]
+            elif topic is not None:
+                inputs[dep] = await tasks[(dep, topic)]
+            else:
+                # Fan-in: a source-wide stage after a per-topic one sees every topic
+                done = await asyncio.gather(*(tasks[(dep, t)] for t in topics))
+                inputs[dep] = dict(zip(topics, done))
+        output = await _run_node(ctx, stage, topic, inputs)
+        ctx.outputs[(stage.name, topic)] = output
+        return output
+
+    async def finish(topic: str) -> None:
+        progress.emit("topic_start", source=source.name, topic=topic)
+        topic_nodes = [s.name for s in source.stages if s.scope == PER_TOPIC]
+        try:
+            await asyncio.gather(*(tasks[(name, topic)] for name in topic_nodes))
+        except Exception as e:
+            if not source.optional:
+                raise
+            logger.warning("Topic failed: %s", e, extra={"source": source.name, "topic": topic})
+            return
+        fields = source.result(topic, {name: ctx.outputs[(name, topic)] for name in topic_nodes})
+        ctx.fields[topic] = fields
+        if source.cache is not None and source.cacheable(topic, fields):
+            await source.cache.put(topic, fields)
+        logger.info("Topic completed", extra={"source": source.name, "topic": topic})
+        progress.emit("topic_done", source=source.name, topic=topic)
+
+    async with source.session(ctx) as ctx.session:
+        for stage in source.stages:
+            for topic in (topics if stage.scope == PER_TOPIC else [None]):
+                tasks[(stage.name, topic)] = asyncio.create_task(node(stage, topic))
+        try:
+            if source.per_topic:
+                # finish() settles failed topics of optional sources
+                await asyncio.gather(*(finish(topic) for topic in topics))
+            else:
+                await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+            # Collect cancelled and failed nodes so none is left unawaited
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+
+async def _scrape_source(source: Source, topics: List[str], params: Dict[str, Any]) -> dict:
+    progress.emit("scrape_start", source=source.name, topics=topics)
+    start = time.perf_counter()
+    ctx = SourceRun(source, topics, params)
+    try:
+        if source.optional:
+            # Optional sources only get what the brief's reserve leaves over
+            deadline.check(f"{source.title} scraping", deadline.BRIEF_RESERVE_SECONDS + deadline.ESSENTIAL_MIN_SECONDS)
+            await asyncio.wait_for(_execute(ctx), deadline.timeout(deadline.BRIEF_RESERVE_SECONDS))
+        else:
+            await _execute(ctx)
+    except Exception as e:
+        if not source.optional:
+            raise
+        logger.warning("%s scraping failed: %s", source.title, e, extra={"source": source.name})
+        if isinstance(e, (deadline.DeadlineExceeded, asyncio.TimeoutError)):
+            deadline.note(f"{source.name} skipped")
+        progress.emit("scrape_failed", source=source.name, error=str(e))
+        # Topics finished before the failure keep their results
+        return ctx.results()
+    seconds = elapsed(start)
+    results = ctx.results()
+    logger.info("%s scraping completed", source.title, extra={
+        "source": source.name, "seconds": seconds, "topics": len(results.get(f"{source.name}_analysis", {})),
+    })
+    progress.emit("scrape_done", source=source.name, seconds=seconds)
+    return results
+
+
+async def scrape(topics: List[str], names: Sequence[str], **params) -> Dict[str, dict]:
+    """
+    Scrape and analyze topics on the named sources, all sources at once.
+    Args:
+        topics: Topics to cover
+        names: Registered source names; unknown ones are ignored
+        **params: Request parameters for the stages, e.g. seen=SeenIndex
+    Returns:
+        Dict[str, dict]: Result dict per source, e.g. {"reddit": {"reddit_analysis": {...}}}
+    Raises:
+        Exception: The first failure of a non-optional source
+    """
+    selected = [SOURCES[name] for name in names if name in SOURCES]
+    outcomes = await asyncio.gather(*(_scrape_source(s, topics, params) for s in selected),
+                                    return_exceptions=True)
+    for outcome in outcomes:
+        if isinstance(outcome, BaseException):
+            raise outcome
+    return {source.name: outcome for source, outcome in zip(selected, outcomes)}
@@ -0,0 +1,263 @@
+import asyncio
+import base64
+import json
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+import backend
+from audio_store import AudioStore
+from admission import AdmissionController, Overloaded, TooLarge, INTERACTIVE, BATCH
+from models import NewsRequest
+
+
+def controller(capacity=2.0, interactive=1.0, batch=1.0):
+    return AdmissionController(capacity, batch_share=0.5,
+                               max_queue_seconds={INTERACTIVE: interactive, BATCH: batch}, seconds_per_unit=0.01)
+
+
+def test_idle_worker_admits_right_away():
+    async def body():
+        admission = controller()
+        async with admission.admit(2.0) as queued:
+            assert queued < 0.01
+            assert admission.in_flight == 2.0
+        assert admission.in_flight == 0.0
+
+    asyncio.run(body())
+
+
+def test_work_larger_than_its_class_is_rejected():
+    async def body():
+        admission = controller()
+        with pytest.raises(TooLarge) as rejected:
+            async with admission.admit(5.0):
+                pass
+        assert (rejected.value.cost, rejected.value.limit) == (5.0, 2.0)
+        with pytest.raises(TooLarge):
+            admission.check(1.5, BATCH)
+        assert admission.in_flight == 0.0 and admission.stats()["queued"] == {INTERACTIVE: 0, BATCH: 0}
+
+    asyncio.run(body())
+
+
+def test_queued_interactive_work_goes_before_batch():
+    async def body():
+        admission = controller()
+        order = []
+        release = asyncio.Event()
+
+        async def run(name, priority):
+            async with admission.admit(1.0, priority):
+                order.append(name)
+                await release.wait()
+
+        holders = [asyncio.create_task(run("first", INTERACTIVE)), asyncio.create_task(run("second", INTERACTIVE))]
+        await asyncio.sleep(0)
+        batch = asyncio.create_task(run("batch", BATCH))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(run("interactive", INTERACTIVE))
+        await asyncio.sleep(0)
+        assert admission.stats()["queued"] == {INTERACTIVE: 1, BATCH: 1}
+        release.set()
+        await asyncio.gather(*holders, batch, interactive)
+        assert order == ["first", "second", "interactive", "batch"]
+
+    asyncio.run(body())
+
+
+def test_batch_work_is_held_to_its_share():
+    async def body():
+        admission = controller()
+        release = asyncio.Event()
+
+        async def run(priority):
+            async with admission.admit(1.0, priority):
+                await release.wait()
+
+        tasks = [asyncio.create_task(run(BATCH)), asyncio.create_task(run(BATCH)),
+                 asyncio.create_task(run(INTERACTIVE))]
+        await asyncio.sleep(0)
+        assert admission.stats()["in_flight"] == {INTERACTIVE: 1.0, BATCH: 1.0}
+        assert admission.stats()["queued"][BATCH] == 1
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(body())
+
+
+def test_work_is_shed_instead_of_queueing_too_long():
+    async def body():
+        admission = controller(interactive=0.05)
+        release = asyncio.Event()
+
+        async def hold():
+            async with admission.admit(2.0):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        admission.seconds_per_unit = 10.0
+        with pytest.raises(Overloaded) as shed:
+            admission.check(1.0)
+        assert shed.value.retry_after >= 1
+        with pytest.raises(Overloaded):
+            async with admission.admit(1.0):
+                pass
+        admission.seconds_per_unit = 0.0001
+        with pytest.raises(Overloaded):
+            # Fits the estimate, but still waits past the limit
+            async with admission.admit(1.0):
+                pass
+        assert admission.stats()["queued"][INTERACTIVE] == 0
+        release.set()
+        await holder
+
+    asyncio.run(body())
+
+
+def test_coalesced_duplicates_are_not_admitted(monkeypatch):
+    """Only the leader holds capacity; duplicates waiting for its result are never shed."""
+    admission = controller(capacity=2.0, interactive=0.05)
+    calls = []
+
+    async def scrape_sources(topics, names, seen=None):
+        calls.append(topics)
+        await asyncio.sleep(0.3)
+        return {}
+
+    async def build_brief(req, results, start_time, seen=None, **options):
+        return {"metadata": {"processing_time": 0.3}}
+
+    monkeypatch.setattr(backend, "admission", admission)
+    monkeypatch.setattr(backend, "scrape_sources", scrape_sources)
+    monkeypatch.setattr(backend, "build_brief", build_brief)
+    req = NewsRequest(topics=["admission coalescing"], source_type="news")
+
+    async def body():
+        return await asyncio.gather(*(backend._generate_news_audio(req) for _ in range(3)))
+
+    responses = asyncio.run(body())
+    assert len(calls) == 1
+    assert all(response.status_code == 200 for response in responses)
+    assert admission.stats()["shed"][INTERACTIVE] == 0
+
+
+def test_coalesced_duplicates_fail_like_the_leader(monkeypatch):
+    admission = controller(capacity=2.0, interactive=0.05)
+    admission.seconds_per_unit = 10.0
+
+    async def scrape_sources(topics, names, seen=None):
+        await asyncio.sleep(0.3)
+        return {}
+
+    monkeypatch.setattr(backend, "admission", admission)
+    monkeypatch.setattr(backend, "scrape_sources", scrape_sources)
+    req = NewsRequest(topics=["admission shedding"], source_type="news")
+
+    async def body():
+        async def hold():
+            async with admission.admit(2.0):
+                await asyncio.sleep(0.3)
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        results = await asyncio.gather(*(backend._generate_news_audio(req) for _ in range(2)),
+                                       return_exceptions=True)
+        await holder
+        return results
+
+    leader, follower = asyncio.run(body())
+    assert isinstance(leader, Overloaded) and isinstance(follower, Overloaded)
+    assert follower.retry_after == leader.retry_after
+
+
+def test_coalesced_duplicates_get_inline_audio_from_the_store(monkeypatch, tmp_path):
+    store = AudioStore(str(tmp_path))
+    digest = Path(store.save_bytes(b"ID3 brief audio")).stem
+    shared = []
+
+    async def scrape_sources(topics, names, seen=None):
+        await asyncio.sleep(0.3)
+        return {}
+
+    async def build_brief(req, results, start_time, seen=None, **options):
+        return {"summary_text": "Brief", "audio_url": f"/audio/{digest}", "audio_content": "bGVhZGVy",
+                "metadata": {"processing_time": 0.3}}
+
+    real_single_flight = backend.single_flight
+
+    async def single_flight(name, fn, **options):
+        result = await real_single_flight(name, fn, **options)
+        shared.append(options["share"](result))
+        return result
+
+    monkeypatch.setattr(backend, "audio_store", store)
+    monkeypatch.setattr(backend, "scrape_sources", scrape_sources)
+    monkeypatch.setattr(backend, "build_brief", build_brief)
+    monkeypatch.setattr(backend, "single_flight", single_flight)
+    req = NewsRequest(topics=["admission inline audio"], source_type="news")
+
+    async def body():
+        return await asyncio.gather(*(backend._generate_news_audio(req) for _ in range(2)))
+
+    leader, follower = (json.loads(response.body) for response in asyncio.run(body()))
+    assert "audio_content" not in shared[0]
+    assert leader["audio_content"] == "bGVhZGVy"
+    assert base64.b64decode(follower["audio_content"]) == b"ID3 brief audio"
+    assert follower["metadata"]["coalesced"] is True
+
+
+def test_coalesced_duplicates_keep_the_leaders_http_status(monkeypatch):
+    async def scrape_sources(topics, names, seen=None):
+        await asyncio.sleep(0.3)
+        raise HTTPException(status_code=404, detail="No such source")
+
+    monkeypatch.setattr(backend, "scrape_sources", scrape_sources)
+    req = NewsRequest(topics=["admission not found"], source_type="news")
+
+    async def body():
+        return await asyncio.gather(*(backend._generate_news_audio(req) for _ in range(2)), return_exceptions=True)
+
+    assert [(e.status_code, e.detail) for e in asyncio.run(body())] == [(404, "No such source")] * 2
+
+
+def test_oversized_brief_gets_413(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(backend, "admission", controller(capacity=2.0))
+    client = TestClient(backend.app)
+    topics = {"topics": ["one", "two", "three"], "source_type": "news"}
+    response = client.post("/generate-news-audio", json=topics)
+    assert response.status_code == 413 and "too large" in response.json()["detail"]
+    assert client.post("/generate-news-audio/jobs", json=topics).status_code == 413
+
+
+def test_batch_is_admitted_piece_by_piece(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    admission = controller(capacity=4.0, interactive=5.0, batch=5.0)
+    peak, chunks = [], []
+
+    async def scrape_sources(topics, names, seen=None):
+        chunks.append(topics)
+        peak.append(admission.in_flight)
+        await asyncio.sleep(0.01)
+        return {"news": {"news_analysis": {t: f"about {t}" for t in topics}}}
+
+    async def build_brief(req, results, start_time, seen=None, **options):
+        peak.append(admission.in_flight)
+        return {"summary_text": ", ".join(results["news"]["news_analysis"].values()), "metadata": {}}
+
+    monkeypatch.setattr(backend, "admission", admission)
+    monkeypatch.setattr(backend, "scrape_sources", scrape_sources)
+    monkeypatch.setattr(backend, "build_brief", build_brief)
+    requests = [{"topics": [f"batch {n}a", f"batch {n}b", f"batch {n}c"], "source_type": "news"} for n in range(4)]
+    response = TestClient(backend.app).post("/generate-news-audio/batch", json={"requests": requests})
+    assert response.status_code == 200
+    # 12 topics and 4 briefs, far more than the batch share of 2 units at once
+    briefs = response.json()["briefs"]
+    assert [b["summary_text"] for b in briefs][0] == "about batch 0a, about batch 0b, about batch 0c"
+    assert not any("error" in b for b in briefs)
+    assert max(peak) <= 2.0 and max(len(c) for c in chunks) == 2
@@ -0,0 +1,61 @@
+import contextvars
+import os
+import time
+
+import zstandard
+
+import artifacts
+from artifacts import ArtifactStore, topic_var
+from log import request_id_var
+
+
+def in_request(request_id, fn, topic=None):
+    def run():
+        request_id_var.set(request_id)
+        topic_var.set(topic)
+        fn()
+    contextvars.copy_context().run(run)
+
+
+def test_records_round_trip_through_zstd_files(monkeypatch, tmp_path):
+    monkeypatch.setattr(artifacts, "ARTIFACTS_ENABLED", True)
+    store = ArtifactStore(str(tmp_path))
+
+    def scrape():
+        store.record("raw_html", "<html>" + "launch " * 500 + "</html>", url="https://example.com")
+        store.record("headlines", ["Launch"])
+        store.record("llm", {"prompt": "Summarize"}, topic="_")
+
+    in_request("../Req 1", scrape, topic="Space X")
+    store.flush()
+
+    files = sorted(tmp_path.rglob("*.json.zst"))
+    # Ids and topics from clients can't escape the store
+    assert {f.relative_to(tmp_path).parts[:2] for f in files} == {("req-1", "space-x"), ("req-1", "_")}
+    assert all(f.stat().st_size < 3500 and f.read_bytes()[:4] == zstandard.FRAME_HEADER for f in files)
+
+    pages = store.load("../Req 1", kind="raw_html")
+    assert [(p["topic"], p["url"], len(p["data"])) for p in pages] == [("Space X", "https://example.com", 3513)]
+    assert [a["kind"] for a in store.load("../Req 1", topic="Space X")] == ["raw_html", "headlines"]
+    assert store.load("unknown") == []
+
+
+def test_nothing_is_written_when_disabled(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    store.record("raw_html", "<html></html>")
+    store.flush()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_retention_removes_old_requests(monkeypatch, tmp_path):
+    monkeypatch.setattr(artifacts, "ARTIFACTS_ENABLED", True)
+    store = ArtifactStore(str(tmp_path))
+    for request_id in ("old", "new"):
+        in_request(request_id, lambda: store.record("headlines", []))
+    store.flush()
+    day_ago = time.time() - 24 * 3600
+    os.utime(tmp_path / "old", (day_ago, day_ago))
+
+    assert store.enforce_retention(max_age_hours=12) == 1
+    assert [p.name for p in tmp_path.iterdir()] == ["new"]
+    assert store.enforce_retention(max_age_hours=0) == 0
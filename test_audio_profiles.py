@@ -0,0 +1,73 @@
+import subprocess
+from pathlib import Path
+
+import pytest
+
+import audio_profiles
+from audio_profiles import MASTER, ensure_variant, media_type_for, profile_for_client
+from audio_store import AudioStore
+
+
+@pytest.fixture
+def ffmpeg(monkeypatch):
+    """Stand-in ffmpeg that records its arguments and writes a smaller file."""
+    runs = []
+
+    def run(args, **options):
+        runs.append(args)
+        Path(args[-1]).write_bytes(b"OggS speech " + args[args.index("-c:a") + 1].encode())
+        return subprocess.CompletedProcess(args, 0)
+
+    monkeypatch.setattr(audio_profiles, "_find_ffmpeg", lambda: "/usr/bin/ffmpeg")
+    monkeypatch.setattr(audio_profiles.subprocess, "run", run)
+    return runs
+
+
+def master(tmp_path):
+    store = AudioStore(str(tmp_path))
+    return store, Path(store.save_bytes(b"ID3" + b"\x00" * 4000, metadata={"language": "en-US"})).stem
+
+
+def test_variant_is_transcoded_once_and_linked_to_the_master(tmp_path, ffmpeg):
+    store, digest = master(tmp_path)
+    variant = ensure_variant(digest, "speech_opus", store)
+
+    assert variant != digest
+    args, = ffmpeg
+    assert args[args.index("-c:a") + 1:args.index("-c:a") + 4] == ["libopus", "-b:a", "24k"]
+    assert args[args.index("-ac") + 1] == "1" and "voip" in args and args[-1].endswith(".ogg")
+    entry = store.get(variant)
+    assert (entry["master"], entry["profile"], entry["language"]) == (digest, "speech_opus", "en-US")
+    assert media_type_for(entry) == "audio/ogg"
+    assert store.get(digest)["variants"] == {"speech_opus": variant}
+
+    # Later requests, by master or by variant, reuse the file
+    assert ensure_variant(digest, "speech_opus", store) == variant
+    assert ensure_variant(variant, "speech_opus", store) == variant
+    assert ensure_variant(variant, MASTER, store) == digest
+    assert len(ffmpeg) == 1
+
+
+def test_failures_fall_back_to_the_master(tmp_path, monkeypatch, ffmpeg):
+    store, digest = master(tmp_path)
+    assert ensure_variant(digest, "unknown", store) == digest
+    assert ensure_variant("not-stored", "speech_opus", store) == "not-stored"
+
+    def fail(args, **options):
+        Path(args[-1]).write_bytes(b"partial")
+        raise subprocess.CalledProcessError(1, args, stderr=b"Unknown encoder 'libopus'")
+
+    monkeypatch.setattr(audio_profiles.subprocess, "run", fail)
+    assert ensure_variant(digest, "speech_opus", store) == digest
+    assert "variants" not in store.get(digest)
+    assert not list(tmp_path.rglob("*.ogg"))
+
+    monkeypatch.setattr(audio_profiles, "_find_ffmpeg", lambda: None)
+    assert ensure_variant(digest, "speech_mp3", store) == digest
+
+
+def test_profile_for_client(monkeypatch):
+    monkeypatch.setattr(audio_profiles, "AUDIO_CLIENT_PROFILES", {"mobile": "speech_opus"})
+    monkeypatch.setattr(audio_profiles, "AUDIO_DEFAULT_PROFILE", "speech_mp3")
+    assert profile_for_client(" Mobile ") == "speech_opus"
+    assert profile_for_client("smart-speaker") == profile_for_client(None) == "speech_mp3"
@@ -0,0 +1,127 @@
+import multiprocessing
+import os
+import time
+
+from audio_store import AudioStore, estimate_mp3_duration
+
+
+def test_workers_see_each_others_files(tmp_path):
+    # Two instances on one root stand in for two worker processes
+    a, b = AudioStore(str(tmp_path)), AudioStore(str(tmp_path))
+    path_a = a.save_bytes(b"from worker a", metadata={"language": "en-US"})
+    path_b = b.save_bytes(b"from worker b")
+    digest_a = os.path.basename(path_a).split(".")[0]
+    digest_b = os.path.basename(path_b).split(".")[0]
+
+    assert b.get(digest_a)["language"] == "en-US"
+    assert str(b.resolve(digest_a)) == path_a
+    assert str(a.resolve(digest_b)) == path_b
+    # Neither write dropped the other's entry
+    assert set(AudioStore(str(tmp_path)).get(d) is not None for d in (digest_a, digest_b)) == {True}
+
+
+def test_retention_covers_files_of_other_workers(tmp_path):
+    a, b = AudioStore(str(tmp_path)), AudioStore(str(tmp_path))
+    path = a.save_bytes(b"old audio")
+    digest = os.path.basename(path).split(".")[0]
+    b.annotate(digest, {"created": time.time() - 10 * 3600})
+
+    assert b.enforce_retention(max_age_hours=1, max_total_mb=0) == 1
+    assert not os.path.exists(path)
+    assert a.get(digest) is None
+
+
+def test_resolve_falls_back_to_unindexed_file(tmp_path):
+    store = AudioStore(str(tmp_path))
+    path = store.path_for("ab" * 32, "ogg")
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b"x")
+    assert store.resolve("ab" * 32) == path
+    assert store.resolve("cd" * 32) is None
+
+
+def _save_many(root, worker):
+    store = AudioStore(root)
+    for i in range(20):
+        store.save_bytes(f"{worker}-{i}".encode())
+
+
+def test_concurrent_processes_keep_every_entry(tmp_path):
+    workers = [multiprocessing.Process(target=_save_many, args=(str(tmp_path), w)) for w in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    store = AudioStore(str(tmp_path))
+    assert len(store._load_index()) == 60
+
+
+def test_mp3_duration_from_cbr_header():
+    # MPEG-1 Layer III, 128 kbps: 16,000 bytes per second
+    header = bytes([0xFF, 0xFB, 0x90, 0x00])
+    assert estimate_mp3_duration(header + bytes(100), 32_000) == 2.0
+    assert estimate_mp3_duration(b"not audio", 1000) is None
+
+
+def test_identical_audio_is_stored_once(tmp_path):
+    store = AudioStore(str(tmp_path))
+    first = store.save_bytes(b"same audio", metadata={"language": "en-US"})
+    again = store.save_bytes(b"same audio", metadata={"voice": "en-US-natalie"})
+    assert first == again
+    assert len(store._load_index()) == 1
+    digest = os.path.basename(first).split(".")[0]
+    assert store.get(digest)["language"] == "en-US" and store.get(digest)["voice"] == "en-US-natalie"
+
+
+def test_size_quota_evicts_least_recently_used(tmp_path):
+    store = AudioStore(str(tmp_path))
+    digests = []
+    for n in range(3):
+        path = store.save_bytes(bytes([n]) * 400_000)
+        digests.append(os.path.basename(path).split(".")[0])
+        store.annotate(digests[-1], {"last_access": time.time() - 100 + n})
+    # Reading the oldest makes it the most recently used
+    store.get(digests[0])
+
+    assert store.enforce_retention(max_age_hours=0, max_total_mb=0.5) == 2
+    assert store.resolve(digests[0]) is not None
+    assert store.resolve(digests[1]) is None and store.resolve(digests[2]) is None
+
+
+def test_murf_audio_is_streamed_into_the_store(tmp_path, monkeypatch):
+    import sys
+    import types
+
+    import utils
+
+    mp3 = bytes([0xFF, 0xFB, 0x90, 0x00]) + bytes(31_996)
+    chunk_sizes = []
+
+    class Download:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def raise_for_status(self):
+            pass
+
+        def iter_content(self, chunk_size):
+            chunk_sizes.append(chunk_size)
+            return (mp3[i:i + 10_000] for i in range(0, len(mp3), 10_000))
+
+    class Murf:
+        def __init__(self, api_key, timeout):
+            self.text_to_speech = types.SimpleNamespace(
+                generate=lambda **gen: types.SimpleNamespace(audio_file="https://murf.example/a.mp3"))
+
+    monkeypatch.setitem(sys.modules, "murf", types.SimpleNamespace(Murf=Murf))
+    monkeypatch.setattr(utils.requests, "get", lambda url, stream, timeout: Download())
+    path = utils.text_to_audio_murf("Hello", "en-US-natalie", api_key="key", output_dir=str(tmp_path))
+
+    assert open(path, "rb").read() == mp3 and chunk_sizes == [64 * 1024]
+    digest = os.path.basename(path).split(".")[0]
+    entry = AudioStore(str(tmp_path)).get(digest)
+    assert entry["duration_seconds"] == 2.0 and entry["voice_id"] == "en-US-natalie"
+    assert not any((tmp_path / "tmp").iterdir())
@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+import backend
+import feeds
+from models import NewsRequest
+
+
+def localized(summary, language, **options):
+    return {"language": language, "voice_id": f"voice-{language}", "summary_text": f"{summary} ({language})",
+            "audio_url": f"/audio/{language}", "audio_duration": 1.0, "audio_profile": "master",
+            "audio_media_type": "audio/mpeg", "audio_bytes": 10}
+
+
+def test_one_summary_fans_out_to_every_language(monkeypatch):
+    summaries, started = [], []
+
+    def generate_broadcast_news(**kwargs):
+        summaries.append(kwargs["language"])
+        return "Tonight's news"
+
+    async def localize_brief(summary_en, language, **options):
+        started.append(time.perf_counter())
+        await asyncio.sleep(0.2)
+        return localized(summary_en, language)
+
+    monkeypatch.setattr(backend, "generate_broadcast_news", generate_broadcast_news)
+    monkeypatch.setattr(backend, "localize_brief", localize_brief)
+    monkeypatch.setattr(feeds, "FEEDS_ENABLED", False)
+    req = NewsRequest(topics=["fan out"], source_type="news", languages=["hi-IN", "en-US", "hi-IN"])
+    start = time.perf_counter()
+    response = asyncio.run(backend.build_brief(req, {"news": {"news_analysis": {"fan out": "..."}}}, start))
+
+    assert summaries == ["en-US"]
+    # Localized concurrently, once per distinct language
+    assert len(started) == 2 and time.perf_counter() - start < 0.35
+    assert list(response["localized"]) == ["hi-IN", "en-US"]
+    assert response["summary_text"] == "Tonight's news (hi-IN)" and response["metadata"]["language"] == "hi-IN"
+    assert response["metadata"]["languages"] == ["hi-IN", "en-US"]
+
+
+def test_batch_scrapes_each_source_topic_pair_once(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    scraped = []
+
+    async def scrape_sources(topics, names, seen=None):
+        scraped.extend((name, topic, seen is not None) for name in names for topic in topics)
+        return {name: {f"{name}_analysis": {t: f"{name} on {t}" for t in topics}} for name in names}
+
+    async def build_brief(req, results, start_time, seen=None, **options):
+        if req.topics == ["broken"]:
+            raise RuntimeError("TTS down")
+        return {"summary_text": " | ".join(v for r in results.values() for v in r["news_analysis"].values()),
+                "metadata": {}}
+
+    monkeypatch.setattr(backend, "scrape_sources", scrape_sources)
+    monkeypatch.setattr(backend, "build_brief", build_brief)
+    response = TestClient(backend.app).post("/generate-news-audio/batch", json={"requests": [
+        {"topics": ["AI", "Space"], "source_type": "news"},
+        {"topics": ["Space", "Cars"], "source_type": "news"},
+        {"topics": ["AI"], "source_type": "news", "user_id": "alice", "since": True},
+        {"topics": ["broken"], "source_type": "news"},
+    ]}).json()
+
+    shared = [(topic, since) for _, topic, since in scraped if not since]
+    assert sorted(shared) == sorted([("AI", False), ("Space", False), ("Cars", False), ("broken", False)])
+    # "since" briefs depend on the user's history and scrape on their own
+    assert [(topic, since) for _, topic, since in scraped if since] == [("AI", True)]
+    assert response["metadata"]["unique_pairs"] == 4 and response["metadata"]["requested_pairs"] == 6
+    briefs = response["briefs"]
+    assert briefs[1]["summary_text"] == "news on Space | news on Cars"
+    assert briefs[3]["error"] == "TTS down" and "summary_text" in briefs[0]
+
+
+def test_audio_is_served_by_digest_with_caching_and_ranges(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+    from audio_store import AudioStore
+
+    store = AudioStore(str(tmp_path))
+    path = store.save_bytes(b"0123456789" * 100)
+    digest = path.rsplit("/", 1)[-1].split(".")[0]
+    monkeypatch.setattr(backend, "audio_store", store)
+    client = TestClient(backend.app)
+
+    response = client.get(f"/audio/{digest}")
+    assert response.status_code == 200 and response.content == b"0123456789" * 100
+    assert response.headers["etag"] == f'"{digest}"' and "immutable" in response.headers["cache-control"]
+    assert client.get(f"/audio/{digest}", headers={"If-None-Match": f'"{digest}"'}).status_code == 304
+    partial = client.get(f"/audio/{digest}", headers={"Range": "bytes=10-19"})
+    assert partial.status_code == 206 and partial.content == b"0123456789"
+    assert client.get("/audio/" + "0" * 64).status_code == 404
@@ -0,0 +1,82 @@
+import contextvars
+
+import pytest
+from tenacity import Retrying, retry_if_exception_type, stop_after_attempt, wait_fixed
+
+import deadline
+
+
+def in_context(fn):
+    """Run in a fresh context so deadlines don't leak between tests."""
+    return contextvars.Context().run(fn)
+
+
+def test_no_deadline_means_no_limits():
+    def body():
+        assert deadline.remaining() is None
+        assert deadline.budget(30, reserve=10) == 30
+        assert deadline.timeout(reserve=10) is None
+        deadline.check("anything", reserve=1000)
+        assert deadline.report() is None
+
+    in_context(body)
+
+
+def test_budget_keeps_the_reserve_and_floor():
+    def body():
+        assert deadline.start(20) == 20
+        assert 9 < deadline.budget(30, reserve=10) <= 10
+        assert deadline.budget(5, reserve=10) == 5
+        assert deadline.budget(30, reserve=25, floor=2) == 2
+        with pytest.raises(deadline.DeadlineExceeded):
+            deadline.check("summary", reserve=25)
+
+    in_context(body)
+
+
+def test_start_caps_the_budget_and_records_degradations():
+    def body():
+        assert deadline.start(10 * deadline.MAX_DEADLINE_SECONDS) == deadline.MAX_DEADLINE_SECONDS
+        deadline.note("short script")
+        deadline.note("short script")
+        assert deadline.report()["degraded"] == ["short script"]
+
+    in_context(body)
+
+
+def test_stop_before_deadline_stops_retries_that_would_eat_the_reserve():
+    attempts = []
+
+    def body():
+        deadline.start(1.0)
+        retrying = Retrying(
+            stop=stop_after_attempt(10) | deadline.stop_before_deadline(reserve=0.5),
+            wait=wait_fixed(0.3),
+            retry=retry_if_exception_type(ConnectionError),
+            reraise=True,
+        )
+        with pytest.raises(ConnectionError):
+            for attempt in retrying:
+                with attempt:
+                    attempts.append(deadline.remaining())
+                    raise ConnectionError("down")
+
+    in_context(body)
+    # 1.0s budget, 0.5s reserve, 0.3s waits: one retry fits, a second would not
+    assert len(attempts) == 2
+
+
+def test_stop_before_deadline_without_deadline_defers_to_attempt_limit():
+    attempts = []
+
+    def body():
+        retrying = Retrying(stop=stop_after_attempt(3) | deadline.stop_before_deadline(reserve=100),
+                            wait=wait_fixed(0), reraise=True)
+        with pytest.raises(ValueError):
+            for attempt in retrying:
+                with attempt:
+                    attempts.append(1)
+                    raise ValueError
+
+    in_context(body)
+    assert len(attempts) == 3
@@ -0,0 +1,61 @@
+import numpy as np
+
+from extractive import condense_analysis, condense_text, textrank_scores, tfidf_matrix, top_headlines
+
+HEADLINES = [
+    "OpenAI releases new GPT model for developers",
+    "Developers test the new OpenAI GPT model",
+    "OpenAI GPT model pricing announced for developers",
+    "Local bakery wins pie contest",
+]
+
+
+def test_tfidf_rows_are_unit_length():
+    vectors = tfidf_matrix(HEADLINES + [""])
+    norms = np.linalg.norm(vectors, axis=1)
+    assert np.allclose(norms[:-1], 1.0)
+    assert norms[-1] == 0
+
+
+def test_textrank_ranks_one_off_noise_last():
+    scores = textrank_scores(HEADLINES)
+    assert np.isclose(scores.sum(), 1.0)
+    assert scores.argmin() == 3
+
+
+def test_top_headlines_keeps_central_items_in_order_and_dedupes():
+    text = "\n".join(HEADLINES + [HEADLINES[0], "  "])
+    kept = top_headlines(text, k=2).split("\n")
+    assert len(kept) == 2 and set(kept) <= set(HEADLINES[:3])
+    assert kept == sorted(kept, key=HEADLINES.index)
+    assert top_headlines(text, k=0).split("\n") == HEADLINES
+
+
+def test_condense_text_leaves_short_text_alone():
+    assert condense_text("One. Two.", k=3) == "One. Two."
+    long = " ".join(f"{h}." for h in HEADLINES)
+    assert "bakery" not in condense_text(long, k=3)
+
+
+def test_condense_text_keeps_nothing_for_k_zero():
+    long = " ".join(f"{h}." for h in HEADLINES)
+    assert condense_text(long, k=0) == condense_text("One.", k=-1) == ""
+
+
+def test_condense_text_fits_the_character_budget():
+    long = " ".join(f"{h}." for h in HEADLINES)
+    condensed = condense_text(long, k=3, max_chars=90)
+    assert 0 < len(condensed) <= 90 and "bakery" not in condensed
+    # Budget below the most central sentence: it is cut at a word boundary
+    cut = condense_text(long, k=3, max_chars=20)
+    assert len(cut) <= 20 and long.find(cut) >= 0 and not cut.endswith(" ")
+    assert condense_text("Supercalifragilistic. Word.", k=1, max_chars=5) == "Super"
+    assert condense_text("One. Two.", k=3, max_chars=100) == "One. Two."
+
+
+def test_condense_analysis_only_touches_the_field():
+    data = {"reddit_analysis": {"AI": "Short."}, "reddit_signals": {"AI": {"posts": 2}}}
+    assert condense_analysis(data, "reddit_analysis") == data
+    assert condense_analysis(None, "reddit_analysis") is None
+    long = {"reddit_analysis": {"AI": " ".join(f"{h}." for h in HEADLINES)}}
+    assert condense_analysis(long, "reddit_analysis", k=0) == long
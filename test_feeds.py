@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+import backend
+import feeds
+from models import NewsRequest
+
+
+def localized_brief(language="en-US"):
+    return {language: {"language": language, "summary_text": "Today's brief.", "audio_url": "/audio/abc123",
+                       "audio_duration": 61.0}}
+
+
+def test_publish_brief_to_topic_and_user_feeds(monkeypatch):
+    monkeypatch.setattr(feeds.audio_profiles, "ensure_variant", lambda digest, profile: digest)
+
+    async def body():
+        paths = await feeds.publish_brief(["feeds publish"], "news", localized_brief(), user_id="alice")
+        topic_id = feeds.topic_feed_id(["Feeds Publish"], "news", "en-US")
+        assert paths == {"topics": {"en-US": f"/feeds/{topic_id}.xml"}, "episode": "abc123:en-US",
+                         "user": f"/feeds/{feeds.user_feed_id('alice')}.xml"}
+        feed = await feeds.load(topic_id)
+        assert [e["guid"] for e in feed["episodes"]] == ["abc123:en-US"]
+        assert feed["episodes"][0]["duration"] == 61.0
+
+        # Adding the same episode to the user's feed again keeps one copy
+        assert await feeds.publish_to_user("alice", ["feeds publish"], "news", "en-US", "abc123:en-US") \
+            == paths["user"]
+        user_feed = await feeds.load(feeds.user_feed_id("alice"))
+        assert len(user_feed["episodes"]) == 1
+        assert await feeds.publish_to_user("alice", ["feeds publish"], "news", "en-US", "gone:en-US") is None
+
+    asyncio.run(body())
+
+
+def test_render_rss():
+    feed = {"title": "OpenAI (en-US)", "updated": 0.0, "episodes": [{
+        "guid": "abc:en-US", "title": "OpenAI", "description": "Brief", "audio_digest": "abc", "size": 42,
+        "media_type": "audio/mpeg", "duration": 3725, "language": "en-US", "published": 0.0,
+    }]}
+    xml = feeds.render_rss("t-1", feed, "http://testserver/").decode()
+    assert '<enclosure url="http://testserver/audio/abc" length="42" type="audio/mpeg" />' in xml
+    assert "<itunes:duration>01:02:05</itunes:duration>" in xml
+    assert "<pubDate>Thu, 01 Jan 1970 00:00:00 GMT</pubDate>" in xml
+
+
+def test_coalesced_requests_get_only_their_own_user_feed(monkeypatch):
+    monkeypatch.setattr(feeds.audio_profiles, "ensure_variant", lambda digest, profile: digest)
+    computed = []
+
+    async def scrape_sources(topics, names, seen=None):
+        await asyncio.sleep(0.3)
+        return {}
+
+    async def build_brief(req, results, start_time, seen=None, **options):
+        computed.append(req.user_id)
+        paths = await feeds.publish_brief(req.topics, req.source_type.value, localized_brief(),
+                                          req.user_id if options.get("user_feed", True) else None)
+        return {"metadata": {"processing_time": 0.3, "feeds": paths}}
+
+    monkeypatch.setattr(backend, "scrape_sources", scrape_sources)
+    monkeypatch.setattr(backend, "build_brief", build_brief)
+    requests = [NewsRequest(topics=["feeds coalescing"], source_type="news", user_id=user_id)
+                for user_id in ("alice", "bob", None)]
+
+    async def body():
+        responses = await asyncio.gather(*(backend._generate_news_audio(req) for req in requests))
+        return [json.loads(response.body)["metadata"]["feeds"] for response in responses], \
+            [await feeds.load(feeds.user_feed_id(user_id)) for user_id in ("alice", "bob")]
+
+    paths, user_feeds = asyncio.run(body())
+    assert len(computed) == 1
+    assert paths[0]["user"] == f"/feeds/{feeds.user_feed_id('alice')}.xml"
+    assert paths[1]["user"] == f"/feeds/{feeds.user_feed_id('bob')}.xml"
+    assert "user" not in paths[2]
+    assert paths[0]["topics"] == paths[1]["topics"] == paths[2]["topics"]
+    assert all(len(feed["episodes"]) == 1 for feed in user_feeds)
+
+
+def test_since_brief_goes_only_to_the_users_feed(monkeypatch):
+    monkeypatch.setattr(feeds.audio_profiles, "ensure_variant", lambda digest, profile: digest)
+
+    async def body():
+        paths = await feeds.publish_brief(["feeds since"], "news", {**localized_brief(), **localized_brief("hi-IN")},
+                                          user_id="alice", topic_feeds=False)
+        return paths, await feeds.load(feeds.topic_feed_id(["feeds since"], "news", "en-US")), \
+            await feeds.load(feeds.user_feed_id("alice"))
+
+    paths, topic_feed, user_feed = asyncio.run(body())
+    assert paths == {"topics": {}, "episode": "abc123:en-US", "user": f"/feeds/{feeds.user_feed_id('alice')}.xml"}
+    assert topic_feed is None
+    assert [e["guid"] for e in user_feed["episodes"]] == ["abc123:en-US"]
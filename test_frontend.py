@@ -0,0 +1,106 @@
+from pathlib import Path
+
+import pytest
+import requests
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+FRONTEND = str(Path(__file__).with_name("frontend.py"))
+
+
+class Response:
+    def __init__(self, status_code, body, headers=None):
+        self.status_code, self.body, self.headers, self.text = status_code, body, headers or {}, ""
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(response=self)
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """Fake backend: job submissions, job status and stored briefs."""
+    st.cache_data.clear()
+    state = {"posts": [], "gets": [], "submit": Response(202, {"job_id": "job-1"}),
+             "job": {"status": "running", "stage": "summary_start"}}
+
+    def post(url, **options):
+        state["posts"].append(options["json"])
+        return state["submit"]
+
+    def get(url, **options):
+        state["gets"].append(url)
+        if "/requests/" in url:
+            return Response(200, {"localized": {"hi-IN": {"summary_text": "Replayed", "audio_url": "/audio/hi",
+                                                          "audio_media_type": "audio/ogg"}}})
+        return Response(200, state["job"])
+
+    monkeypatch.setattr(requests, "post", post)
+    monkeypatch.setattr(requests, "get", get)
+    yield state
+    st.cache_data.clear()
+
+
+def app(topics=("AI",)):
+    at = AppTest.from_file(FRONTEND, default_timeout=10)
+    at.session_state.topics = list(topics)
+    return at.run()
+
+
+def click(at, label):
+    next(b for b in at.button if label in b.label).click()
+    return at.run()
+
+
+def test_brief_is_polled_without_blocking_and_kept_in_history(backend):
+    at = click(app(), "Generate Summary")
+    assert len(backend["posts"]) == 1
+    assert at.session_state.pending_job["job_id"] == "job-1"
+    assert [i.value for i in at.info] == ["✍️ Writing the broadcast script..."]
+    # The page stays interactive while the job runs; only a second brief is held back
+    assert next(b for b in at.button if "Generate" in b.label).disabled
+    assert not next(b for b in at.button if "Add" in b.label).disabled
+
+    backend["job"] = {"status": "done", "result": {"summary_text": "Brief <b>", "audio_url": "/audio/abc",
+                                                   "metadata": {"audio_media_type": "audio/ogg"}}}
+    at.run()
+    assert at.session_state.pending_job is None
+    assert at.session_state.current_brief == {"summary_text": "Brief <b>", "audio_url": "/audio/abc",
+                                              "media_type": "audio/ogg"}
+    assert any("Brief &lt;b&gt;" in m.value for m in at.markdown)
+    history, = at.session_state.history
+    assert (history["topics"], history["source_type"], history["language"]) == (["AI"], "all", "en-US")
+
+    # The same brief again within the cache TTL reuses the finished job
+    at = click(at.run(), "Generate Summary")
+    assert len(backend["posts"]) == 1 and backend["gets"][-1] == "http://localhost:1234/jobs/job-1"
+    assert at.session_state.pending_job is None and len(at.session_state.history) == 1
+
+
+def test_failed_job_is_not_served_from_the_cache(backend):
+    backend["job"] = {"status": "failed"}
+    at = click(app(), "Generate Summary")
+    assert "could not be generated" in at.error[0].value
+    click(at.run(), "Generate Summary")
+    assert len(backend["posts"]) == 2
+
+
+def test_replay_loads_the_brief_from_the_backend(backend):
+    at = app()
+    at.session_state.history = [{"request_id": "req-1", "topics": ["AI"], "source_type": "news",
+                                 "language": "hi-IN", "created": 0.0}]
+    at = click(at.run(), "Replay")
+    assert backend["gets"] == ["http://localhost:1234/requests/req-1/brief"]
+    assert at.session_state.current_brief == {"summary_text": "Replayed", "audio_url": "/audio/hi",
+                                              "media_type": "audio/ogg"}
+    assert backend["posts"] == []
+
+
+def test_shed_submission_says_when_to_retry(backend):
+    backend["submit"] = Response(503, {"detail": "Server busy"}, {"Retry-After": "12"})
+    at = click(app(), "Generate Summary")
+    assert at.error[0].value == "API Error (503): Server busy (try again in 12s)"
+    assert at.session_state.pending_job is None
@@ -0,0 +1,93 @@
+import gzip
+
+import pytest
+from starlette.applications import Starlette
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+import http_caching
+from http_caching import CompressionMiddleware, http_date, is_not_modified
+
+
+@pytest.mark.parametrize("headers, expected", [
+    ({}, False),
+    ({"If-None-Match": '"abc"'}, True),
+    ({"If-None-Match": 'W/"abc"'}, True),
+    ({"If-None-Match": '"other", "abc"'}, True),
+    ({"If-None-Match": "*"}, True),
+    ({"If-None-Match": '"other"'}, False),
+    # If-None-Match wins over If-Modified-Since
+    ({"If-None-Match": '"other"', "If-Modified-Since": http_date(2000)}, False),
+    ({"If-Modified-Since": http_date(1000)}, True),
+    ({"If-Modified-Since": http_date(999)}, False),
+    ({"If-Modified-Since": "yesterday"}, False),
+])
+def test_is_not_modified(headers, expected):
+    assert is_not_modified(Headers(headers), '"abc"', 1000.5) is expected
+
+
+def test_weak_etag_matches_strong_validator():
+    assert is_not_modified(Headers({"If-None-Match": '"abc"'}), 'W/"abc"')
+    assert not is_not_modified(Headers({"If-Modified-Since": http_date(1000)}), '"abc"')
+
+
+def client(monkeypatch, brotli=None):
+    monkeypatch.setattr(http_caching, "brotli", brotli)
+    payload = {"text": "x" * 2000}
+    app = Starlette(routes=[
+        Route("/json", lambda request: JSONResponse(payload, headers={"ETag": '"v1"'})),
+        Route("/small", lambda request: JSONResponse({"ok": True})),
+        Route("/audio", lambda request: Response(b"\xff" * 2000, media_type="audio/mpeg")),
+        Route("/events", lambda request: StreamingResponse(iter([b"data: 1\n\n" * 200]), media_type="text/event-stream")),
+    ])
+    app.add_middleware(CompressionMiddleware)
+    return TestClient(app)
+
+
+def test_gzip_compresses_large_json(monkeypatch):
+    response = client(monkeypatch).get("/json", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == 'W/"v1"'
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < 2000
+    assert response.json() == {"text": "x" * 2000}
+
+
+def test_identity_when_not_accepted_or_not_worth_it(monkeypatch):
+    http = client(monkeypatch)
+    response = http.get("/json", headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"v1"'
+    for path in ("/small", "/audio", "/events"):
+        response = http.get(path, headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers, path
+    assert "vary" not in response.headers
+
+
+def test_brotli_preferred_when_installed(monkeypatch):
+    class FakeBrotli:
+        @staticmethod
+        def compress(body, quality):
+            return gzip.compress(body)
+
+    response = client(monkeypatch, brotli=FakeBrotli).get("/json", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+
+
+def test_large_bodies_are_compressed_off_the_event_loop(monkeypatch):
+    threaded = []
+    to_thread = http_caching.asyncio.to_thread
+
+    async def spy(fn, *args):
+        threaded.append(len(args[0]))
+        return await to_thread(fn, *args)
+
+    monkeypatch.setattr(http_caching.asyncio, "to_thread", spy)
+    monkeypatch.setattr(http_caching, "COMPRESSION_THREAD_MIN_BYTES", 1500)
+    http = client(monkeypatch)
+    assert http.get("/json", headers={"Accept-Encoding": "gzip"}).json() == {"text": "x" * 2000}
+    monkeypatch.setattr(http_caching, "COMPRESSION_THREAD_MIN_BYTES", 4000)
+    assert http.get("/json", headers={"Accept-Encoding": "gzip"}).headers["content-encoding"] == "gzip"
+    assert len(threaded) == 1 and threaded[0] > 2000
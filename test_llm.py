@@ -0,0 +1,75 @@
+import asyncio
+import concurrent.futures
+import json
+
+import ollama
+
+import llm
+from llm import GeminiProvider, OllamaProvider
+
+
+class FakeAsyncClient:
+    instances = []
+
+    def __init__(self, **options):
+        self.options = options
+        self.calls = []
+        FakeAsyncClient.instances.append(self)
+
+    async def generate(self, stream=False, **request):
+        self.calls.append(request)
+        await asyncio.sleep(0.01)
+        if request.get("format"):
+            return {"response": json.dumps({"topics": ["AI"]})}
+        if stream:
+            async def chunks():
+                for part in ("Hello", "", " world"):
+                    yield {"response": part}
+            return chunks()
+        return {"response": f"echo: {request['prompt']}"}
+
+
+def provider(monkeypatch):
+    FakeAsyncClient.instances = []
+    monkeypatch.setattr(ollama, "AsyncClient", FakeAsyncClient)
+    return OllamaProvider(host="http://ollama.test", model="tiny", keep_alive="5m", max_connections=2)
+
+
+def test_calls_from_many_threads_share_one_pooled_client(monkeypatch):
+    local = provider(monkeypatch)
+    with concurrent.futures.ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda n: local.generate(f"prompt {n}", temperature=0.1, max_tokens=50), range(8)))
+
+    assert results == [f"echo: prompt {n}" for n in range(8)]
+    client, = FakeAsyncClient.instances
+    assert client.options["host"] == "http://ollama.test"
+    assert client.options["limits"].max_connections == 2
+    assert all(call["model"] == "tiny" and call["keep_alive"] == "5m" for call in client.calls)
+    assert client.calls[0]["options"] == {"temperature": 0.1, "num_predict": 50}
+
+
+def test_streaming_and_structured_output(monkeypatch):
+    local = provider(monkeypatch)
+    chunks = []
+    assert local.generate("Hi", on_chunk=chunks.append) == "Hello world"
+    assert chunks == ["Hello", " world"]
+
+    schema = {"type": "object", "properties": {"topics": {"type": "array", "items": {"type": "string"}}}}
+    assert local.generate_json("Topics?", schema) == {"topics": ["AI"]}
+    assert FakeAsyncClient.instances[0].calls[-1]["format"] == schema
+
+
+def test_provider_selection_and_warm_up(monkeypatch):
+    local = provider(monkeypatch)
+    monkeypatch.setattr(llm, "_ollama", local)
+
+    monkeypatch.setattr(llm, "LLM_PROVIDER", "gemini")
+    assert isinstance(llm.get_llm("key"), GeminiProvider)
+    asyncio.run(llm.warm_up())
+    assert FakeAsyncClient.instances == []
+
+    monkeypatch.setattr(llm, "LLM_PROVIDER", "ollama")
+    assert llm.get_llm("key") is local
+    asyncio.run(llm.warm_up())
+    # The empty prompt only loads the model and keeps it resident
+    assert FakeAsyncClient.instances[0].calls == [{"model": "tiny", "prompt": "", "keep_alive": "5m"}]
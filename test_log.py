@@ -0,0 +1,54 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+
+import log
+from log import JsonFormatter, get_logger, job_id_var, request_id_var
+
+
+class Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.threads = set()
+
+    def emit(self, record):
+        self.threads.add(threading.current_thread().name)
+        self.records.append(record)
+
+
+def test_records_carry_the_ids_of_the_context_that_logged_them(monkeypatch):
+    logger = get_logger("test_log")
+    capture = Capture()
+    monkeypatch.setattr(log._listener, "handlers", (capture,))
+
+    async def request(request_id):
+        request_id_var.set(request_id)
+        # Worker threads of asyncio.to_thread see the request's context too
+        await asyncio.to_thread(logger.info, "In a thread", extra={"topic": "AI"})
+        logger.info("On the loop")
+
+    async def body():
+        job_id_var.set("job-1")
+        await asyncio.gather(request("req-a"), request("req-b"))
+
+    asyncio.run(body())
+    give_up = time.monotonic() + 2
+    while len(capture.records) < 4 and time.monotonic() < give_up:
+        time.sleep(0.01)
+
+    stamped = sorted((r.request_id, r.job_id, r.getMessage()) for r in capture.records)
+    assert stamped == [("req-a", "job-1", "In a thread"), ("req-a", "job-1", "On the loop"),
+                       ("req-b", "job-1", "In a thread"), ("req-b", "job-1", "On the loop")]
+    # Formatting and output happen on the listener thread, not in the callers
+    assert threading.current_thread().name not in capture.threads
+
+
+def test_json_lines_hold_extra_fields_and_skip_empty_ids():
+    record = logging.LogRecord("newsninja.x", logging.WARNING, __file__, 1, "Took %ss", (2,), None)
+    record.request_id, record.job_id, record.topic = "req-a", None, "AI"
+    doc = json.loads(JsonFormatter().format(record))
+    assert doc["msg"] == "Took 2s" and doc["level"] == "WARNING" and doc["logger"] == "newsninja.x"
+    assert doc["request_id"] == "req-a" and doc["topic"] == "AI" and "job_id" not in doc
@@ -0,0 +1,47 @@
+import pytest
+from pydantic import ValidationError
+
+from models import NewsRequest, canonical_topic
+
+
+def request(**fields):
+    return NewsRequest(**{"topics": ["AI"], "source_type": "news", **fields})
+
+
+def test_canonical_topic_collapses_whitespace_and_aliases():
+    assert canonical_topic(" artificial   intelligence ") == "AI"
+    assert canonical_topic("Quantum  computing") == "Quantum computing"
+
+
+def test_topics_are_canonicalized_and_deduplicated():
+    assert request(topics=["ai", " AI ", "crypto", "", "Cryptocurrency"]).topics == ["AI", "Cryptocurrency"]
+    with pytest.raises(ValidationError):
+        request(topics=["  "])
+
+
+def test_key_ignores_topic_order_case_and_aliases():
+    key = request(topics=["AI", "Space"]).canonical_key()
+    assert request(topics=["space", "artificial intelligence"]).canonical_key() == key
+
+
+@pytest.mark.parametrize("change", [
+    {"source_type": "reddit"},
+    {"languages": ["en-US", "hi-IN"]},
+    {"inline_audio": False},
+    {"audio_profile": "speech_opus"},
+])
+def test_key_covers_output_affecting_fields(change):
+    assert request(**change).canonical_key() != request().canonical_key()
+
+
+def test_user_id_only_keys_since_mode():
+    assert request(user_id="alice").canonical_key() == request(user_id="bob").canonical_key()
+    assert request(user_id="alice", since=True).canonical_key() != \
+        request(user_id="bob", since=True).canonical_key()
+
+
+def test_since_needs_user_and_profile_must_exist():
+    with pytest.raises(ValidationError):
+        request(since=True)
+    with pytest.raises(ValidationError):
+        request(audio_profile="flac")
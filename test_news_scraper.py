@@ -0,0 +1,145 @@
+import asyncio
+import time
+
+import pytest
+
+import news_scraper
+from news_scraper import NewsScraper
+from topic_cache import SemanticCache
+
+PAGE = "<p>Head one about AI</p><p>Head two about AI</p>"
+
+
+@pytest.fixture(autouse=True)
+def isolated_checkpoints(monkeypatch):
+    monkeypatch.setattr(NewsScraper, "_checkpoints", SemanticCache("news_checkpoints", 300))
+    monkeypatch.setattr(news_scraper, "STAGE_ATTEMPTS", {"fetch": 1, "clean": 1, "headlines": 1, "summarize": 1})
+    monkeypatch.setattr(news_scraper, "summarize_with_gemini_news_script", lambda api_key, headlines: "SUMMARY")
+
+
+def test_concurrent_runs_keep_their_own_status(monkeypatch):
+    calls = []
+
+    async def fetch(self, url):
+        calls.append(url)
+        if len(calls) == 1:
+            raise ConnectionError("upstream down")
+        await asyncio.sleep(0.05)
+        return PAGE
+
+    monkeypatch.setattr(NewsScraper, "fetch_search_html", fetch)
+
+    async def main():
+        return await asyncio.gather(NewsScraper().process_topic("AI"), NewsScraper().process_topic("AI"))
+
+    (failed, _), (ok, text) = asyncio.run(main())
+    assert failed is not ok
+    assert failed.report()["status"] == "failed" and failed.error == "upstream down"
+    assert ok.report()["status"] == "ok" and ok.error is None and text == "SUMMARY"
+    assert failed.stages["fetch"]["status"] == "failed"
+    assert ok.stages["fetch"]["status"] == "ok"
+
+
+def test_rerun_resumes_from_checkpoint_without_sharing_state(monkeypatch):
+    calls = []
+
+    async def fetch(self, url):
+        calls.append(url)
+        return PAGE
+
+    monkeypatch.setattr(NewsScraper, "fetch_search_html", fetch)
+    first, _ = asyncio.run(NewsScraper().process_topic("AI"))
+    # A run may change its own outputs; the checkpoint keeps what was stored
+    first.outputs["summarize"] = "changed"
+    second, text = asyncio.run(NewsScraper().process_topic("AI"))
+    assert len(calls) == 1 and text == "SUMMARY"
+    assert second is not first
+    assert second.stages["fetch"]["checkpointed"] and "checkpointed" not in first.stages["fetch"]
+
+
+def test_checkpoints_are_shared_by_workers_and_keep_only_what_reruns_need(monkeypatch):
+    calls = []
+
+    async def fetch(self, url):
+        calls.append(url)
+        return PAGE
+
+    monkeypatch.setattr(NewsScraper, "fetch_search_html", fetch)
+    asyncio.run(NewsScraper().process_topic("AI"))
+    # Another worker: its own cache object and topic index, the same shared state
+    monkeypatch.setattr(NewsScraper, "_checkpoints", SemanticCache("news_checkpoints", 300))
+    task, text = asyncio.run(NewsScraper().process_topic("latest AI news"))
+    assert len(calls) == 1 and text == "SUMMARY"
+    assert task.reused_from == "AI"
+    stored, _, _ = asyncio.run(NewsScraper._checkpoints.get("AI"))
+    # The page and its text are not needed once the headlines are checkpointed
+    assert set(stored) == {"headlines", "summarize"}
+
+
+def test_news_source_runs_topics_as_concurrent_nodes(monkeypatch):
+    import sources
+
+    async def fetch(self, url):
+        await asyncio.sleep(0.2)
+        return PAGE
+
+    monkeypatch.setattr(NewsScraper, "fetch_search_html", fetch)
+    monkeypatch.setattr(news_scraper, "top_headlines", lambda headlines: headlines)
+    start = time.perf_counter()
+    results = asyncio.run(sources.scrape(["AI", "Cars", "Space"], ["news"]))
+    # Formerly one topic after another, a second apart
+    assert time.perf_counter() - start < 0.6
+    assert results["news"]["news_analysis"] == {"AI": "SUMMARY", "Cars": "SUMMARY", "Space": "SUMMARY"}
+    assert {t: s["status"] for t, s in results["news"]["topic_status"].items()} == \
+        {"AI": "ok", "Cars": "ok", "Space": "ok"}
+    assert [s["name"] for s in sources.SOURCES["news"].describe()["stages"]] == ["fetch", "summarize", "collect"]
+
+
+def test_batched_mode_makes_one_call_and_falls_back_per_topic(monkeypatch):
+    batches, singles = [], []
+
+    async def fetch(self, url):
+        return PAGE
+
+    def summarize_topics_structured(api_key, headlines_by_topic):
+        batches.append(sorted(headlines_by_topic))
+        # The model left one topic out
+        return {t: f"BATCHED {t}" for t in headlines_by_topic if t != "Cars"}
+
+    def summarize_one(api_key, headlines):
+        singles.append(headlines)
+        return "SINGLE"
+
+    monkeypatch.setattr(NewsScraper, "fetch_search_html", fetch)
+    monkeypatch.setattr(news_scraper, "top_headlines", lambda headlines: headlines)
+    monkeypatch.setattr(news_scraper, "summarize_topics_structured", summarize_topics_structured)
+    monkeypatch.setattr(news_scraper, "summarize_with_gemini_news_script", summarize_one)
+    news = asyncio.run(NewsScraper().scrape_news(["AI", "Cars", "Space"], mode="batched"))
+
+    assert batches == [["AI", "Cars", "Space"]] and len(singles) == 1
+    assert news["news_analysis"] == {"AI": "BATCHED AI", "Cars": "SINGLE", "Space": "BATCHED Space"}
+    assert news["topic_status"]["AI"]["stages"]["summarize"]["batched"] is True
+    assert "batched" not in news["topic_status"]["Cars"]["stages"]["summarize"]
+    assert "content" not in news
+
+    # Summaries are checkpointed: a rerun makes no LLM call at all
+    asyncio.run(NewsScraper().scrape_news(["AI", "Cars", "Space"], mode="batched"))
+    assert len(batches) == 1 and len(singles) == 1
+
+
+def test_fused_mode_passes_headlines_on_without_a_summary_call(monkeypatch):
+    async def fetch(self, url):
+        return PAGE
+
+    def no_llm(*args, **kwargs):
+        raise AssertionError("no summary call in fused mode")
+
+    monkeypatch.setattr(NewsScraper, "fetch_search_html", fetch)
+    monkeypatch.setattr(news_scraper, "top_headlines", lambda headlines: headlines)
+    monkeypatch.setattr(news_scraper, "summarize_topics_structured", no_llm)
+    monkeypatch.setattr(news_scraper, "summarize_with_gemini_news_script", no_llm)
+    news = asyncio.run(NewsScraper().scrape_news(["AI"], mode="fused"))
+
+    assert news["content"] == "headlines"
+    assert "Head one about AI" in news["news_analysis"]["AI"]
+    assert news["topic_status"]["AI"]["status"] == "ok"
@@ -0,0 +1,34 @@
+from starlette.requests import Request
+
+import artifacts
+import profiling
+
+
+def request(headers=()):
+    return Request({"type": "http", "method": "POST", "path": "/generate-news-audio", "query_string": b"",
+                    "headers": [(k.lower().encode(), v.encode()) for k, v in headers]})
+
+
+def test_profiles_only_on_demand_when_enabled(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 0)
+    monkeypatch.setattr(artifacts, "ARTIFACTS_ENABLED", True)
+    asked = request([("X-Profile", "1")])
+    assert not profiling.should_profile(asked)
+    monkeypatch.setattr(profiling, "PROFILING_ENABLED", True)
+    assert profiling.should_profile(asked)
+    assert not profiling.should_profile(request())
+
+
+def test_no_profile_without_an_artifact_store(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(artifacts, "ARTIFACTS_ENABLED", False)
+    recorded = []
+    monkeypatch.setattr(profiling.artifact_store, "record", lambda *args, **kwargs: recorded.append(args))
+    with profiling.maybe_profile(request([("X-Profile", "1")])) as profile_url:
+        pass
+    assert profile_url is None and recorded == []
+
+    monkeypatch.setattr(artifacts, "ARTIFACTS_ENABLED", True)
+    with profiling.maybe_profile(request([("X-Profile", "1")])) as profile_url:
+        sum(range(10000))
+    assert profile_url is not None and [kind for kind, _ in recorded] == ["profile"]
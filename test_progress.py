@@ -0,0 +1,56 @@
+import asyncio
+
+import progress
+
+
+def test_spawn_keeps_task_referenced_until_done():
+    async def main():
+        done = asyncio.Event()
+        task = progress.spawn(done.wait())
+        assert task in progress._tasks
+        done.set()
+        await task
+        await asyncio.sleep(0)
+        assert task not in progress._tasks
+
+    asyncio.run(main())
+
+
+def test_late_subscriber_replays_all_events():
+    async def main():
+        job = progress.create_job()
+        progress.emit("scrape_start", source="news")
+        progress.emit("completed", result={})
+        return [event["type"] async for event in job.follow()], job.status, job.stage
+
+    events, status, stage = asyncio.run(main())
+    assert events == ["scrape_start", "completed"]
+    assert status == "completed"
+    assert stage == "completed"
+
+
+def test_queued_job_runs_on_a_worker_and_streams_events(monkeypatch):
+    import backend
+    from fastapi.testclient import TestClient
+
+    async def scrape_sources(topics, names, seen=None):
+        progress.emit("scrape_start", source="news")
+        return {}
+
+    async def build_brief(req, results, start_time, seen=None, **options):
+        return {"summary_text": "brief", "metadata": {"processing_time": 0.0, "topics": req.topics}}
+
+    monkeypatch.setattr(backend, "scrape_sources", scrape_sources)
+    monkeypatch.setattr(backend, "build_brief", build_brief)
+    monkeypatch.setattr(backend, "JOB_WORKER_CONCURRENCY", 1)
+    with TestClient(backend.app) as client:
+        accepted = client.post("/generate-news-audio/jobs", json={"topics": ["queued job"], "source_type": "news"})
+        assert accepted.status_code == 202
+        job_id = accepted.json()["job_id"]
+        # Known (queued or running) before and after a worker picks it up
+        assert client.get(f"/jobs/{job_id}").status_code == 200
+        stream = client.get(accepted.json()["events_url"]).text
+        assert stream.index("event: scrape_start") < stream.index("event: completed")
+        status = client.get(f"/jobs/{job_id}").json()
+        assert status["status"] == "completed" and status["result"]["summary_text"] == "brief"
+        assert client.get("/jobs/unknown").status_code == 404
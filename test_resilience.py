@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+import pytest
+
+from resilience import CircuitBreaker, CircuitOpenError, hedged, CLOSED, OPEN, HALF_OPEN
+
+
+def fail():
+    raise ValueError("upstream down")
+
+
+def test_opens_on_failure_rate_and_rejects():
+    breaker = CircuitBreaker("t", window_size=4, min_calls=4, failure_rate=0.5)
+
+    async def main():
+        for _ in range(2):
+            await breaker.call(lambda: "ok")
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                await breaker.call(fail)
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpenError):
+            await breaker.call(lambda: "ok")
+
+    asyncio.run(main())
+
+
+def test_half_open_probe_closes_or_reopens():
+    breaker = CircuitBreaker("t", min_calls=1, open_seconds=0.01)
+    breaker.record(False, 0.0)
+    assert breaker.state == OPEN
+    time.sleep(0.02)
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    # Only one probe at a time
+    assert not breaker.allow_request()
+    breaker.record(True, 0.0)
+    assert breaker.state == CLOSED
+
+
+def test_slow_calls_trip_the_circuit():
+    breaker = CircuitBreaker("t", min_calls=2, slow_call_seconds=1.0, slow_call_rate=0.8)
+    breaker.record(True, 2.0)
+    breaker.record(True, 3.0)
+    assert breaker.state == OPEN
+
+
+def test_cancelled_call_is_not_a_failure():
+    breaker = CircuitBreaker("t", min_calls=1)
+
+    async def main():
+        task = asyncio.ensure_future(breaker.call(time.sleep, 0.2))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert breaker.state == CLOSED
+
+
+def test_cancelled_probe_releases_the_half_open_slot():
+    breaker = CircuitBreaker("t", min_calls=1, open_seconds=0.5)
+    breaker.record(False, 0.0)
+    breaker._opened_at -= 0.5
+
+    async def main():
+        task = asyncio.ensure_future(breaker.call(time.sleep, 0.2))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+
+
+def test_hedge_loser_does_not_trip_its_breaker():
+    breaker = CircuitBreaker("primary", min_calls=1)
+
+    async def fallback():
+        return "direct"
+
+    async def main():
+        return await hedged(lambda: breaker.call(time.sleep, 0.3), fallback, delay=0.01)
+
+    assert asyncio.run(main()) == "direct"
+    assert breaker.state == CLOSED
+
+
+def test_hedged_falls_back_on_primary_error():
+    async def primary():
+        raise ValueError("boom")
+
+    async def fallback():
+        return "fallback"
+
+    assert asyncio.run(hedged(primary, fallback, delay=None)) == "fallback"
+
+
+def test_cancelling_a_hedge_cancels_both_attempts():
+    cancelled = []
+
+    async def attempt(name):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(name)
+            raise
+
+    async def main():
+        hedge = asyncio.ensure_future(hedged(lambda: attempt("primary"), lambda: attempt("fallback"), delay=0.01))
+        await asyncio.sleep(0.05)
+        hedge.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await hedge
+        await asyncio.sleep(0)
+        # Before the loop shuts down and cancels whatever is left
+        assert sorted(cancelled) == ["fallback", "primary"]
+
+    asyncio.run(main())
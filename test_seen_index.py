@@ -0,0 +1,87 @@
+import asyncio
+
+import news_scraper
+import seen_index
+from news_scraper import NewsScraper
+from seen_index import SeenIndex, no_updates_script
+from topic_cache import SemanticCache
+
+
+def test_only_unheard_headlines_pass_and_updates_count_as_new():
+    async def body():
+        first = SeenIndex("alice")
+        assert await first.filter_new("AI", "Death toll rises to 12\nChip stocks rally") == \
+            "Death toll rises to 12\nChip stocks rally"
+        await first.commit()
+
+        second = SeenIndex("alice")
+        fresh = await second.filter_new("AI", "Chip stocks rally!\nDeath toll rises to 20\nNew model launched")
+        assert fresh == "Death toll rises to 20\nNew model launched"
+        assert second.stats["AI"] == {"new": 1, "updated": 1, "seen": 1}
+
+    asyncio.run(body())
+
+
+def test_concurrent_commits_keep_every_headline(monkeypatch):
+    load = SeenIndex._load
+
+    async def slow_load(self, topic):
+        items = await load(self, topic)
+        # Let the other commit read the same entry before this one writes
+        await asyncio.sleep(0.05)
+        return items
+
+    monkeypatch.setattr(SeenIndex, "_load", slow_load)
+
+    async def brief(headlines):
+        index = SeenIndex("alice")
+        await index.filter_new("AI", headlines)
+        await index.commit()
+
+    async def body():
+        await asyncio.gather(brief("Chip stocks rally"), brief("New model launched"), brief("Lab opens in Paris"))
+        later = SeenIndex("alice")
+        return await later.filter_new("AI", "Chip stocks rally\nNew model launched\nLab opens in Paris")
+
+    assert asyncio.run(body()) == ""
+
+
+def test_commit_goes_ahead_when_the_lock_stays_busy(monkeypatch):
+    monkeypatch.setattr(seen_index, "SEEN_LOCK_WAIT_SECONDS", 0.1)
+
+    async def body():
+        state = seen_index.get_shared_state()
+        await state.acquire_lock(seen_index.key("seen", "alice", "ai", "lock"), 60)
+        index = SeenIndex("alice")
+        await index.filter_new("AI", "Chip stocks rally")
+        await index.commit()
+        return await SeenIndex("alice").filter_new("AI", "Chip stocks rally")
+
+    assert asyncio.run(body()) == ""
+
+
+def test_topic_without_updates_skips_the_summary(monkeypatch):
+    summaries = []
+    monkeypatch.setattr(NewsScraper, "_checkpoints", SemanticCache("news_checkpoints", 300))
+    monkeypatch.setattr(news_scraper, "summarize_with_gemini_news_script",
+                        lambda api_key, headlines: summaries.append(headlines) or "SUMMARY")
+
+    async def fetch(self, url):
+        return "<p>Chip stocks rally</p><p>New model launched</p>"
+
+    monkeypatch.setattr(NewsScraper, "fetch_search_html", fetch)
+
+    async def body():
+        first = SeenIndex("alice")
+        _, text = await NewsScraper().process_topic("AI", first)
+        await first.commit()
+        again = SeenIndex("alice")
+        task, repeat = await NewsScraper().process_topic("AI", again)
+        return text, task, repeat, again
+
+    text, task, repeat, again = asyncio.run(body())
+    assert text == "SUMMARY" and len(summaries) == 1
+    assert task.status == "ok" and repeat == no_updates_script(["AI"])
+    assert again.unchanged_topics() == ["AI"]
+    assert no_updates_script(["AI", "Cars", "Space"]) == \
+        "No major updates on AI, Cars or Space since your last brief."
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+import shared_state
+from shared_state import FlightError, InProcessState, RedisState, SharedQueue, key, single_flight
+
+
+def redis_stand_in():
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisState(fakeredis.FakeAsyncRedis(decode_responses=True))
+
+
+@pytest.fixture(params=["memory", "redis"])
+def state(request, monkeypatch):
+    state = InProcessState() if request.param == "memory" else redis_stand_in()
+    monkeypatch.setattr(shared_state, "_state", state)
+    return state
+
+
+def test_queue_is_fifo_and_waits_for_items(state):
+    async def body():
+        queue = SharedQueue("test", ttl=60)
+        assert await queue.get(timeout=0.1) is None
+        await queue.put({"n": 1})
+        await queue.put({"n": 2})
+        assert [await queue.get(timeout=1), await queue.get(timeout=1)] == [{"n": 1}, {"n": 2}]
+
+        consumer = asyncio.ensure_future(queue.get(timeout=2))
+        await asyncio.sleep(0.1)
+        await queue.put({"n": 3})
+        assert await consumer == {"n": 3}
+
+    asyncio.run(body())
+
+
+def test_every_item_goes_to_exactly_one_consumer(state):
+    async def body():
+        queue = SharedQueue("test")
+        for n in range(20):
+            await queue.put(n)
+
+        async def consume():
+            items = []
+            while (item := await queue.get(timeout=0.2)) is not None:
+                items.append(item)
+                await asyncio.sleep(0)
+            return items
+
+        return await asyncio.gather(consume(), consume(), consume())
+
+    consumed = asyncio.run(body())
+    assert sorted(n for items in consumed for n in items) == list(range(20))
+
+
+def test_single_flight_publishes_only_to_waiters(state):
+    async def body():
+        async def compute():
+            await asyncio.sleep(0.2)
+            return {"audio": "bulky", "url": "/audio/abc"}
+
+        # Nobody waiting: nothing is written to shared state
+        assert await single_flight("alone", compute) == {"audio": "bulky", "url": "/audio/abc"}
+        assert await state.get_json(key("flight", "alone", "result")) is None
+
+        strip = lambda result: {"url": result["url"]}  # noqa: E731
+        leader = asyncio.ensure_future(single_flight("shared", compute, share=strip))
+        await asyncio.sleep(0.05)
+        follower = await single_flight("shared", compute, poll_interval=0.02, share=strip)
+        assert await leader == {"audio": "bulky", "url": "/audio/abc"}
+        assert follower == {"url": "/audio/abc"}
+
+    asyncio.run(body())
+
+
+def test_single_flight_waiters_see_the_leaders_status(state):
+    class Shed(Exception):
+        status_code, retry_after = 503, 7
+
+    async def body():
+        async def fail():
+            await asyncio.sleep(0.2)
+            raise Shed("busy")
+
+        leader = asyncio.ensure_future(single_flight("failing", fail))
+        await asyncio.sleep(0.05)
+        with pytest.raises(FlightError) as failed:
+            await single_flight("failing", fail, poll_interval=0.02)
+        assert (str(failed.value), failed.value.status_code, failed.value.retry_after) == ("busy", 503, 7)
+        with pytest.raises(Shed):
+            await leader
+
+    asyncio.run(body())
@@ -0,0 +1,88 @@
+import math
+
+import numpy as np
+import pytest
+
+from social_signals import (
+    LEXICON, NEGATION_SCALAR, NORMALIZATION_ALPHA, format_signals, parse_count, score_posts, sentiment_scores,
+)
+
+
+def compound(total):
+    return total / math.sqrt(total ** 2 + NORMALIZATION_ALPHA)
+
+
+def test_sentiment_matches_the_lexicon_per_text():
+    scores = sentiment_scores(["Great news", "a terrible disaster", "", "the weather today"])
+    assert scores[0] == pytest.approx(compound(LEXICON["great"]))
+    assert scores[1] == pytest.approx(compound(LEXICON["terrible"] + LEXICON["disaster"]))
+    assert scores[2] == 0.0 and scores[3] == 0.0
+    assert np.all(np.abs(scores) < 1)
+
+
+def test_negation_flips_within_its_scope_only():
+    scores = sentiment_scores(["this is not good", "not that it is really very good", "good, not"])
+    assert scores[0] == pytest.approx(compound(LEXICON["good"] * NEGATION_SCALAR))
+    # "good" is four words after "not"; "very" still boosts it
+    assert scores[1] == pytest.approx(compound(LEXICON["good"] * 1.3))
+    assert scores[2] == pytest.approx(compound(LEXICON["good"]))
+
+
+def test_negation_does_not_cross_texts():
+    scores = sentiment_scores(["I would not", "good"])
+    assert scores[1] == pytest.approx(compound(LEXICON["good"]))
+
+
+def test_boosters_scale_the_next_word():
+    very, barely = sentiment_scores(["very good", "barely good"])
+    assert very == pytest.approx(compound(LEXICON["good"] * 1.3))
+    assert barely == pytest.approx(compound(LEXICON["good"] * 0.6))
+
+
+def test_empty_batch():
+    assert sentiment_scores([]).shape == (0,)
+    assert sentiment_scores(["", "!!!"]).tolist() == [0.0, 0.0]
+
+
+@pytest.mark.parametrize("value, expected", [
+    (1234, 1234.0), ("1,234", 1234.0), ("1.2K", 1200.0), ("3m", 3e6), (" 7 ", 7.0), (2.5, 2.5),
+])
+def test_parse_count(value, expected):
+    assert parse_count(value) == expected
+
+
+@pytest.mark.parametrize("value", [None, True, "", "many", "1.2.3", "12x"])
+def test_parse_count_unparseable(value):
+    assert math.isnan(parse_count(value))
+
+
+def test_score_posts_weights_engaging_posts():
+    records = [
+        {"title": "This is amazing", "num_upvotes": "1.5K", "num_comments": 200,
+         "comments": [{"comment": "I hate it", "likes": 1}, {"comment": ""}]},
+        {"text": "terrible", "likes": 0},
+        "not a record",
+    ]
+    summary = score_posts(records)
+    assert summary["items"] == 3
+    sentiment = summary["sentiment"]
+    assert sentiment["weighted"] > sentiment["mean"]
+    assert sentiment["label"] == "positive"
+    assert sentiment["positive"] == pytest.approx(0.333)
+    assert sentiment["negative"] == pytest.approx(0.667)
+    assert summary["engagement"]["likes"] == 1501
+    assert summary["engagement"]["replies"] == 200
+    assert "views" not in summary["engagement"]
+    assert summary["top"][0] == "This is amazing"
+
+
+def test_score_posts_without_text():
+    assert score_posts([]) is None
+    assert score_posts([{"likes": 3}]) is None
+
+
+def test_format_signals():
+    assert format_signals(None) == ""
+    line = format_signals(score_posts([{"text": "great", "likes": 4100, "replies": 320}]))
+    assert line.startswith("MEASURED SIGNALS (1 posts and comments): sentiment mostly positive (+0.61;")
+    assert line.endswith("100% positive, 0% negative); engagement 4.1K likes, 320 replies")
@@ -0,0 +1,50 @@
+import asyncio
+
+import deadline
+import social_sources
+from social_sources import reddit
+
+
+def analyze(posts, signals):
+    return asyncio.run(reddit.analyze(None, "OpenAI", {"fetch": posts, "score": signals}))
+
+
+class FakeLLM:
+    name = "fake"
+
+    def __init__(self, text="Redditors discuss OpenAI."):
+        self.text = text
+        self.calls = []
+
+    def generate(self, prompt, temperature=0.4, max_tokens=1000, on_chunk=None):
+        self.calls.append((prompt, max_tokens))
+        if isinstance(self.text, Exception):
+            raise self.text
+        return self.text
+
+
+def test_analysis_goes_through_the_configured_llm(monkeypatch):
+    llm = FakeLLM()
+    monkeypatch.setattr(social_sources, "get_llm", lambda api_key=None: llm)
+    posts = [{"title": "GPT news", "description": "A new model"}]
+    assert analyze(posts, {"sentiment": 0.2}) == "Redditors discuss OpenAI."
+    (prompt, max_tokens), = llm.calls
+    assert "Reddit posts and comments about 'OpenAI'" in prompt and max_tokens == 600
+
+    # Without posts the open-ended fallback prompt is used
+    analyze([], None)
+    assert "Analyze Reddit posts about 'OpenAI'" in llm.calls[1][0] and llm.calls[1][1] == 2000
+
+
+def test_analysis_degrades_without_budget_or_on_failure(monkeypatch):
+    llm = FakeLLM(RuntimeError("quota"))
+    monkeypatch.setattr(social_sources, "get_llm", lambda api_key=None: llm)
+    assert analyze([], None) == reddit.unavailable_message("OpenAI")
+
+    async def past_the_reserve():
+        deadline.start(deadline.BRIEF_RESERVE_SECONDS)
+        return await reddit.analyze(None, "OpenAI", {"fetch": [], "score": None})
+
+    llm.text = "unused"
+    assert asyncio.run(past_the_reserve()) == reddit.unavailable_message("OpenAI")
+    assert len(llm.calls) == 1
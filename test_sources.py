@@ -0,0 +1,130 @@
+import asyncio
+import time
+
+import pytest
+
+import admission
+import sources
+from sources import PER_SOURCE, Source, Stage
+from topic_cache import SemanticCache
+
+
+@pytest.fixture
+def register(monkeypatch):
+    """Register test sources for one test only."""
+    def add(source):
+        monkeypatch.setitem(sources.SOURCES, source.name, source)
+        monkeypatch.setitem(admission.SOURCE_COSTS, source.name, source.cost)
+        return source
+    return add
+
+
+def scrape(topics, names):
+    return asyncio.run(sources.scrape(topics, names))
+
+
+def test_independent_nodes_run_concurrently(register):
+    async def fetch(ctx, topic, inputs):
+        await asyncio.sleep(0.2)
+        return f"posts about {topic}"
+
+    async def analyze(ctx, topic, inputs):
+        await asyncio.sleep(0.2)
+        return inputs["fetch"].upper()
+
+    register(Source("dag_a", "A", [Stage("fetch", fetch), Stage("analyze", analyze, after=("fetch",))]))
+    register(Source("dag_b", "B", [Stage("fetch", fetch)]))
+    start = time.perf_counter()
+    results = scrape(["AI", "Cars", "Space"], ["dag_a", "dag_b", "unknown"])
+    # Three topics on two sources, two stages deep
+    assert time.perf_counter() - start < 0.6
+    assert results == {
+        "dag_a": {"dag_a_analysis": {t: f"POSTS ABOUT {t.upper()}" for t in ("AI", "Cars", "Space")}},
+        "dag_b": {"dag_b_analysis": {t: f"posts about {t}" for t in ("AI", "Cars", "Space")}},
+    }
+
+
+def test_stage_concurrency_is_bounded(register):
+    running, peak = 0, 0
+
+    async def fetch(ctx, topic, inputs):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        return topic
+
+    register(Source("dag_bounded", "Bounded", [Stage("fetch", fetch, concurrency=2)]))
+    scrape(["a", "b", "c", "d", "e"], ["dag_bounded"])
+    assert peak == 2
+
+
+def test_per_source_stage_fans_in_every_topic(register):
+    async def per_topic(ctx, topic, inputs):
+        return topic.upper()
+
+    async def combine(ctx, topic, inputs):
+        assert topic is None
+        return {"dag_fan_analysis": inputs["per_topic"], "dag_fan_count": len(inputs["per_topic"])}
+
+    register(Source("dag_fan", "Fan", [Stage("per_topic", per_topic),
+                                      Stage("combine", combine, after=("per_topic",), scope=PER_SOURCE)]))
+    assert scrape(["a", "b"], ["dag_fan"]) == {"dag_fan": {"dag_fan_analysis": {"a": "A", "b": "B"},
+                                                           "dag_fan_count": 2}}
+
+
+def test_optional_source_failure_degrades_per_topic(register):
+    async def analyze(ctx, topic, inputs):
+        if topic == "Boom":
+            raise ValueError("nope")
+        return f"about {topic}"
+
+    register(Source("dag_optional", "Optional", [Stage("analyze", analyze)]))
+    assert scrape(["AI", "Boom"], ["dag_optional"]) == {
+        "dag_optional": {"dag_optional_analysis": {"AI": "about AI", "Boom": "Optional unavailable"}},
+    }
+
+
+def test_essential_source_failure_raises(register):
+    async def fail(ctx, topic, inputs):
+        raise ValueError("nope")
+
+    async def slow(ctx, topic, inputs):
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    register(Source("dag_essential", "Essential", [Stage("scrape", fail, scope=PER_SOURCE)], optional=False))
+    register(Source("dag_other", "Other", [Stage("scrape", slow)]))
+    with pytest.raises(ValueError, match="nope"):
+        scrape(["AI"], ["dag_other", "dag_essential"])
+
+
+def test_retries_the_declared_exceptions(register):
+    calls = []
+
+    async def flaky(ctx, topic, inputs):
+        calls.append(topic)
+        if len(calls) < 3:
+            raise ConnectionError("busy")
+        return "ok"
+
+    register(Source("dag_retry", "Retry", [Stage("fetch", flaky, retry_on=(ConnectionError,), attempts=3,
+                                                 retry_wait=(0, 0))]))
+    assert scrape(["AI"], ["dag_retry"]) == {"dag_retry": {"dag_retry_analysis": {"AI": "ok"}}}
+    assert len(calls) == 3
+    assert sources.SOURCES["dag_retry"].describe()["metrics"]["fetch"]["retries"] == 2
+
+
+def test_cached_topics_skip_the_pipeline(register):
+    calls = []
+
+    async def analyze(ctx, topic, inputs):
+        calls.append(topic)
+        return f"about {topic}"
+
+    register(Source("dag_cached", "Cached", [Stage("analyze", analyze)], cache=SemanticCache("dag_cached", 60)))
+    scrape(["OpenAI"], ["dag_cached"])
+    results = scrape(["latest OpenAI news", "Cars"], ["dag_cached"])
+    assert calls == ["OpenAI", "Cars"]
+    assert results["dag_cached"]["dag_cached_analysis"] == {"latest OpenAI news": "about OpenAI", "Cars": "about Cars"}
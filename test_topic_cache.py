@@ -0,0 +1,95 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+import topic_cache
+from topic_cache import SemanticCache, TopicIndex, hash_embed
+
+
+def similarity(a, b):
+    vectors = hash_embed([a, b])
+    return float(vectors[0] @ vectors[1])
+
+
+def test_hash_embed_is_normalized_and_stable():
+    vectors = hash_embed(["OpenAI", "", "stock market"])
+    assert vectors.shape == (3, topic_cache.HASH_DIM)
+    assert vectors.dtype == np.float32
+    assert np.linalg.norm(vectors[0]) == pytest.approx(1.0)
+    assert not vectors[1].any()
+    assert np.array_equal(hash_embed(["stock market"])[0], vectors[2])
+
+
+@pytest.mark.parametrize("a, b", [
+    ("OpenAI news", "latest on OpenAI"),
+    ("stocks", "Stock"),
+    ("What is happening with Tesla", "tesla updates"),
+])
+def test_phrasings_of_one_topic_embed_identically(a, b):
+    assert similarity(a, b) == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("a, b", [
+    # Words that name the topic are not filler
+    ("New York", "York"),
+    ("Top Gun", "guns"),
+    ("This Week in Tech", "tech"),
+    # Spelling variants only get partial credit from the trigrams
+    ("Open AI", "OpenAI"),
+])
+def test_different_topics_stay_below_the_threshold(a, b):
+    assert similarity(a, b) < topic_cache.TOPIC_CACHE_SIMILARITY
+
+
+def test_index_nearest():
+    index = TopicIndex(threshold=0.85)
+    assert index.nearest("OpenAI") is None
+    for topic in ("OpenAI", "New York", "climate change"):
+        index.add(topic)
+    assert len(index) == 3 and "OpenAI" in index
+    topic, score = index.nearest("latest OpenAI news")
+    assert topic == "OpenAI" and score == pytest.approx(1.0)
+    assert index.nearest("York") is None
+    assert index.nearest("OpenAI", exclude="OpenAI") is None
+    index.discard("OpenAI")
+    assert index.nearest("OpenAI") is None and len(index) == 2
+
+
+def test_semantic_cache_hits_expire():
+    async def body():
+        cache = SemanticCache("test", ttl=0.3)
+        await cache.put("OpenAI", {"analysis": "a"})
+        assert await cache.get("OpenAI") == ({"analysis": "a"}, "OpenAI", 1.0)
+        value, matched, score = await cache.get("OpenAI news")
+        assert (value, matched) == ({"analysis": "a"}, "OpenAI") and score == pytest.approx(1.0)
+        assert await cache.get("New York") is None
+        await asyncio.sleep(0.35)
+        assert await cache.get("OpenAI") is None
+        assert "OpenAI" not in cache.index
+        assert cache.stats == {"exact": 1, "semantic": 1, "misses": 2}
+
+    asyncio.run(body())
+
+
+def test_semantic_cache_is_shared_between_workers():
+    async def body():
+        await SemanticCache("test", ttl=60).put("OpenAI", "from worker 1")
+        other = SemanticCache("test", ttl=60)
+        assert len(other.index) == 0
+        value, matched, _ = await other.get("latest on OpenAI")
+        assert (value, matched) == ("from worker 1", "OpenAI")
+
+    asyncio.run(body())
+
+
+def test_semantic_cache_evicts_the_oldest_beyond_max_entries():
+    async def body():
+        cache = SemanticCache("test", ttl=60, max_entries=2)
+        for topic in ("OpenAI", "New York", "climate change"):
+            await cache.put(topic, topic)
+        assert await cache.get("OpenAI") is None
+        assert (await cache.get("climate change"))[0] == "climate change"
+        assert len(cache.index) == 2
+
+    asyncio.run(body())
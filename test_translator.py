@@ -0,0 +1,62 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+import pytest
+
+import shared_state
+import translator
+from shared_state import RedisState
+from translator import translate_script
+
+SCRIPT = "Good evening.\n\nMarkets rallied today.\n\nGood evening.\n\nThat is all."
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Translations made, as (paragraph, language); each takes 0.1s."""
+    made = []
+    lock = threading.Lock()
+
+    def translate(api_key, text, target_lang):
+        with lock:
+            made.append((text, target_lang))
+        time.sleep(0.1)
+        return f"[{target_lang}] {text}"
+
+    monkeypatch.setattr(translator, "translate_for_language", translate)
+    monkeypatch.setattr(translator, "_translation_cache", OrderedDict())
+    return made
+
+
+def test_english_is_passed_through(calls):
+    assert asyncio.run(translate_script("key", SCRIPT, "en-GB")) == SCRIPT
+    assert calls == []
+
+
+def test_paragraphs_are_translated_once_concurrently_and_in_order(calls):
+    start = time.perf_counter()
+    translated = asyncio.run(translate_script("key", SCRIPT, "hi-IN"))
+    # Three distinct paragraphs at once, not one after another
+    assert time.perf_counter() - start < 0.25
+    assert translated.split("\n\n") == [f"[hi-IN] {p}" for p in SCRIPT.split("\n\n")]
+    assert sorted(calls) == sorted({(p, "hi-IN") for p in SCRIPT.split("\n\n")})
+
+    # Cached per paragraph and language: only the new paragraph is translated
+    asyncio.run(translate_script("key", "Good evening.\n\nRain is expected.", "hi-IN"))
+    assert calls[3:] == [("Rain is expected.", "hi-IN")]
+
+
+def test_other_workers_reuse_shared_translations(calls, monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    monkeypatch.setattr(shared_state, "_state", RedisState(fakeredis.FakeAsyncRedis(decode_responses=True)))
+
+    async def body():
+        await translate_script("key", SCRIPT, "fr-FR")
+        # Another worker: empty in-memory cache, same shared state
+        monkeypatch.setattr(translator, "_translation_cache", OrderedDict())
+        return await translate_script("key", SCRIPT, "fr-FR")
+
+    assert asyncio.run(body()).startswith("[fr-FR] Good evening.")
+    assert len(calls) == 3
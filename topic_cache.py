@@ -0,0 +1,244 @@
+import hashlib
+import json
+import os
+import re
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from log import get_logger
+from shared_state import get_shared_state, key
+
+load_dotenv()
+
+logger = get_logger("topic_cache")
+
+# Cosine similarity above which two phrasings count as the same topic
+TOPIC_CACHE_SIMILARITY = float(os.getenv("TOPIC_CACHE_SIMILARITY", "0.85"))
+TOPIC_CACHE_MAX_ENTRIES = int(os.getenv("TOPIC_CACHE_MAX_ENTRIES", "1024"))
+# Optional sentence-transformers model (name or local path) instead of the hashing vectorizer
+TOPIC_EMBEDDING_MODEL = os.getenv("TOPIC_EMBEDDING_MODEL", "")
+
+# Hashing vectorizer dimension (a power of two)
+HASH_DIM = 1 << 12
+# LSH layout: each table buckets vectors by the signs of LSH_BITS random projections.
+# With 10 tables of 6 bits a neighbour at cosine 0.85 shares a bucket ~97% of the time.
+LSH_TABLES = 10
+LSH_BITS = 6
+
+_WORD = re.compile(r"[^\W_]+", re.UNICODE)
+# Words that say how a topic was asked for, not what it is about
+_FILLER = frozenset("""
+a an and the of on in for about to at with from by what whats what's is are
+news latest recent update updates today breaking headlines story stories developments
+happening going currently
+""".split())
+
+
+def _words(topic: str) -> List[str]:
+    words = _WORD.findall(topic.casefold())
+    content = [w for w in words if w not in _FILLER] or words
+    # Light stemming so "stocks" and "stock" meet
+    return [w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w for w in content]
+
+
+def _features(topic: str) -> List[Tuple[str, float]]:
+    words = _words(topic)
+    # Character trigrams of the joined words give partial credit to spelling variants
+    # ("Open AI" vs "OpenAI" scores ~0.5), not enough on their own to pass the threshold
+    joined = f"#{''.join(words)}#"
+    return ([(f"w:{w}", 1.0) for w in words]
+            + [(f"c:{joined[i:i + 3]}", 0.5) for i in range(len(joined) - 2)])
+
+
+def hash_embed(topics: List[str], dim: int = HASH_DIM) -> np.ndarray:
+    """
+    L2-normalized signed hashing-vectorizer embeddings of topic phrases.
+    Filler words ("latest", "news", "on", ...) are dropped first, so
+    "OpenAI news" and "latest on OpenAI" embed identically. CRC32 keeps the
+    hashing stable across processes.
+    Returns:
+        np.ndarray: Shape (len(topics), dim), float32
+    """
+    rows, cols, values = [], [], []
+    for row, topic in enumerate(topics):
+        for feature, weight in _features(topic):
+            h = zlib.crc32(feature.encode("utf-8"))
+            rows.append(row)
+            cols.append(h & (dim - 1))
+            values.append(weight if (h >> 16) & 1 else -weight)
+    vectors = np.zeros((len(topics), dim), dtype=np.float32)
+    np.add.at(vectors, (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)), values)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+_model = None
+
+
+def embed(topics: List[str]) -> np.ndarray:
+    """Embed topic phrases with TOPIC_EMBEDDING_MODEL if configured, else the hashing vectorizer."""
+    global _model
+    if not TOPIC_EMBEDDING_MODEL:
+        return hash_embed(topics)
+    if _model is None:
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise RuntimeError("TOPIC_EMBEDDING_MODEL is set but 'sentence-transformers' is not installed") from e
+        _model = SentenceTransformer(TOPIC_EMBEDDING_MODEL, device="cpu")
+    return np.asarray(_model.encode(topics, normalize_embeddings=True), dtype=np.float32)
+
+
+class TopicIndex:
+    """
+    In-memory approximate nearest-neighbour index over topic phrases.
+
+    Random-hyperplane LSH narrows a query to the topics sharing a bucket in
+    any table; only those candidates are compared exactly by cosine. Keys
+    are the topic strings themselves.
+    """
+
+    def __init__(self, threshold: float = TOPIC_CACHE_SIMILARITY, tables: int = LSH_TABLES,
+                 bits: int = LSH_BITS, seed: int = 0):
+        self.threshold = threshold
+        self.tables = tables
+        self.bits = bits
+        self._rng = np.random.default_rng(seed)
+        self._planes: Optional[np.ndarray] = None
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._codes: Dict[str, np.ndarray] = {}
+        self._buckets: List[Dict[int, Set[str]]] = [{} for _ in range(tables)]
+
+    def _hash(self, vector: np.ndarray) -> np.ndarray:
+        if self._planes is None:
+            # Dimension is only known once the embedder has produced a vector
+            self._planes = self._rng.standard_normal((self.tables, self.bits, vector.shape[0])).astype(np.float32)
+        signs = (self._planes @ vector) > 0
+        return signs @ (1 << np.arange(self.bits))
+
+    def add(self, key: str, vector: Optional[np.ndarray] = None) -> None:
+        """Index `key` (embedded unless `vector` is given); re-adding replaces it."""
+        self.discard(key)
+        vector = embed([key])[0] if vector is None else vector
+        codes = self._hash(vector)
+        self._vectors[key], self._codes[key] = vector, codes
+        for table, code in zip(self._buckets, codes.tolist()):
+            table.setdefault(code, set()).add(key)
+
+    def discard(self, key: str) -> None:
+        codes = self._codes.pop(key, None)
+        if codes is None:
+            return
+        del self._vectors[key]
+        for table, code in zip(self._buckets, codes.tolist()):
+            bucket = table.get(code)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del table[code]
+
+    def nearest(self, query: str, exclude: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """
+        Most similar indexed topic at or above the threshold.
+        Returns:
+            Optional[Tuple[str, float]]: (topic, cosine similarity), or None
+        """
+        if not self._vectors:
+            return None
+        vector = embed([query])[0]
+        candidates = set().union(*(table.get(code, ()) for table, code in zip(self._buckets, self._hash(vector).tolist())))
+        candidates.discard(exclude)
+        if not candidates:
+            return None
+        keys = list(candidates)
+        similarities = np.stack([self._vectors[k] for k in keys]) @ vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+        return keys[best], float(similarities[best])
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._vectors
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._vectors)
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+
+class SemanticCache:
+    """
+    TTL cache of per-topic results that also answers for differently
+    phrased topics: a miss on the exact topic falls back to the nearest
+    fresh sibling. Entries live in the shared state, so every worker sees
+    what any worker cached; each worker mirrors the list of cached topics
+    into its own TopicIndex for the nearest-neighbour lookup.
+    """
+
+    def __init__(self, name: str, ttl: float, threshold: float = TOPIC_CACHE_SIMILARITY,
+                 max_entries: int = TOPIC_CACHE_MAX_ENTRIES):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.index = TopicIndex(threshold)
+        self._topics_key = key("cache", name, "topics")
+        # Per worker, for monitoring
+        self.stats = {"exact": 0, "semantic": 0, "misses": 0}
+
+    def _entry_key(self, topic: str) -> str:
+        return key("cache", self.name, "entry", hashlib.sha256(topic.encode("utf-8")).hexdigest()[:24])
+
+    async def _sync(self) -> Set[str]:
+        """Bring the local index in line with the shared topic list; returns the fresh topics."""
+        cutoff = time.time() - self.ttl
+        fresh = set()
+        for raw in await get_shared_state().lrange(self._topics_key):
+            item = json.loads(raw)
+            if item["stored"] > cutoff:
+                fresh.add(item["topic"])
+        for topic in [t for t in self.index if t not in fresh]:
+            self.index.discard(topic)
+        for topic in fresh:
+            if topic not in self.index:
+                self.index.add(topic)
+        return fresh
+
+    async def get(self, topic: str) -> Optional[Tuple[Any, str, float]]:
+        """
+        Returns:
+            Optional[Tuple[Any, str, float]]: (value, topic it was stored under, similarity), or None
+        """
+        state = get_shared_state()
+        if topic in await self._sync():
+            value = await state.get_json(self._entry_key(topic))
+            if value is not None:
+                self.stats["exact"] += 1
+                return value, topic, 1.0
+        match = self.index.nearest(topic, exclude=topic)
+        value = await state.get_json(self._entry_key(match[0])) if match else None
+        if value is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["semantic"] += 1
+        logger.info("Semantic cache hit", extra={
+            "cache": self.name, "topic": topic, "matched": match[0], "similarity": round(match[1], 3),
+        })
+        return value, match[0], match[1]
+
+    async def put(self, topic: str, value: Any) -> None:
+        state = get_shared_state()
+        await state.set_json(self._entry_key(topic), value, self.ttl)
+        length = await state.rpush(self._topics_key, json.dumps({"topic": topic, "stored": time.time()}), self.ttl)
+        self.index.add(topic)
+        if length > self.max_entries:
+            evicted = await state.lrange(self._topics_key, 0, length - self.max_entries - 1)
+            await state.ltrim(self._topics_key, -self.max_entries, -1)
+            kept = {json.loads(raw)["topic"] for raw in await state.lrange(self._topics_key)}
+            for gone in {json.loads(raw)["topic"] for raw in evicted} - kept:
+                await state.delete(self._entry_key(gone))
+                self.index.discard(gone)
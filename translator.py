@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+from dotenv import load_dotenv
+from tenacity import retry, stop_after_attempt, wait_exponential
+
+from deadline import stop_before_deadline, ESSENTIAL_MIN_SECONDS
+
+from log import get_logger
+from shared_state import get_shared_state, key as state_key
+from utils import translate_for_language
+
+load_dotenv()
+
+logger = get_logger("translator")
+
+# Max paragraphs sent to Gemini at the same time for one script
+TRANSLATION_CONCURRENCY = int(os.getenv("TRANSLATION_CONCURRENCY", "4"))
+# Max cached (paragraph, language) translations kept in memory
+TRANSLATION_CACHE_SIZE = int(os.getenv("TRANSLATION_CACHE_SIZE", "2048"))
+# How long translations live in the shared (cross-worker) cache
+TRANSLATION_SHARED_TTL_SECONDS = float(os.getenv("TRANSLATION_SHARED_TTL_SECONDS", "604800"))
+# "translate" = write English then translate, "direct" = write in target language
+TRANSLATION_MODE = os.getenv("TRANSLATION_MODE", "translate")
+
+_translation_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+
+
+def needs_translation(target_lang: str) -> bool:
+    """Return True when the target locale is not English."""
+    return not target_lang.startswith("en")
+
+
+def direct_generation_enabled(target_lang: str) -> bool:
+    """Return True when the broadcast should be written straight in the target language."""
+    return TRANSLATION_MODE == "direct" and needs_translation(target_lang)
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """Split a broadcast script into non-empty paragraphs."""
+    return [p.strip() for p in text.split("\n\n") if p.strip()]
+
+
+def _cache_key(paragraph: str, target_lang: str) -> Tuple[str, str]:
+    digest = hashlib.sha256(paragraph.encode("utf-8")).hexdigest()
+    return digest, target_lang
+
+
+def _cache_get(key: Tuple[str, str]):
+    value = _translation_cache.get(key)
+    if value is not None:
+        _translation_cache.move_to_end(key)
+    return value
+
+
+def _cache_put(key: Tuple[str, str], value: str) -> None:
+    _translation_cache[key] = value
+    _translation_cache.move_to_end(key)
+    while len(_translation_cache) > TRANSLATION_CACHE_SIZE:
+        _translation_cache.popitem(last=False)
+
+
+@retry(
+    # Give up early rather than eat into the time TTS still needs
+    stop=stop_after_attempt(3) | stop_before_deadline(ESSENTIAL_MIN_SECONDS),
+    wait=wait_exponential(multiplier=1, min=1, max=8),
+    reraise=True
+)
+async def _translate_paragraph(api_key: str, paragraph: str, target_lang: str) -> str:
+    # Gemini SDK is blocking, keep it off the event loop
+    return await asyncio.to_thread(translate_for_language, api_key, paragraph, target_lang)
+
+
+async def translate_script(api_key: str, text: str, target_lang: str) -> str:
+    """
+    Translate a broadcast script paragraph by paragraph.
+    Args:
+        api_key: Gemini API key
+        text: English broadcast script
+        target_lang: Murf locale code, e.g. "hi-IN"
+    Returns:
+        str: Translated script with the original paragraph structure
+    """
+    if not needs_translation(target_lang):
+        return text
+
+    paragraphs = split_paragraphs(text)
+    translated: List[str] = [""] * len(paragraphs)
+    # Identical paragraphs inside one script are translated only once
+    pending: Dict[Tuple[str, str], List[int]] = {}
+
+    for idx, paragraph in enumerate(paragraphs):
+        key = _cache_key(paragraph, target_lang)
+        cached = _cache_get(key)
+        if cached is not None:
+            translated[idx] = cached
+        else:
+            pending.setdefault(key, []).append(idx)
+
+    # Second level: translations made by other workers
+    state = get_shared_state()
+    if state.distributed:
+        for key in list(pending):
+            shared = await state.get(state_key("translation", *key))
+            if shared is not None:
+                _cache_put(key, shared)
+                for idx in pending.pop(key):
+                    translated[idx] = shared
+
+    logger.info("Translating script", extra={
+        "language": target_lang, "paragraphs": len(paragraphs), "to_translate": len(pending),
+    })
+
+    semaphore = asyncio.Semaphore(TRANSLATION_CONCURRENCY)
+
+    async def run(key: Tuple[str, str], indexes: List[int]):
+        async with semaphore:
+            result = await _translate_paragraph(api_key, paragraphs[indexes[0]], target_lang)
+        _cache_put(key, result)
+        if state.distributed:
+            await state.set(state_key("translation", *key), result, TRANSLATION_SHARED_TTL_SECONDS)
+        for idx in indexes:
+            translated[idx] = result
+
+    await asyncio.gather(*(run(key, indexes) for key, indexes in pending.items()))
+    return "\n\n".join(translated)
@@ -6,18 +6,28 @@ import time
 from murf import Murf
 from fastapi import FastAPI, HTTPException
 from bs4 import BeautifulSoup
-import ollama
-import google.generativeai as genai
-from datetime import datetime
 from pathlib import Path
 from gtts import gTTS
+from audio_store import audio_store, get_audio_store
+from log import get_logger
+from llm import get_llm, get_ollama
+from artifacts import artifact_store
+import deadline
+from social_signals import format_signals
 
 load_dotenv()
 
+logger = get_logger("utils")
+
 class MCPOverloadedError(Exception):
     """Custom exception for MCP service overloads"""
     pass                         # Custom exception for MCP service overloads
 
+def record_llm_call(stage: str, provider: str, prompt: str, completion: str, **meta) -> None:
+    """Keep an LLM prompt/completion pair in the artifact store for replay and debugging"""
+    artifact_store.record("llm", {"stage": stage, "provider": provider, "prompt": prompt,
+                                  "completion": completion, **meta})
+
 def generate_valid_news_url(keyword: str) -> str:
     """
     Generate a Google News search URL for a keyword with optional sorting by latest
@@ -35,7 +45,7 @@ def generate_news_urls_to_scrape(list_of_keywords):
         valid_urls_dict[keyword] = generate_valid_news_url(keyword)
     return valid_urls_dict
 
-def scrape_with_brightdata(url: str) -> str:
+def scrape_with_brightdata(url: str, timeout: float = 30.0) -> str:
     """Scrape a URL using BrightData"""
     headers = {
         "Authorization": f"Bearer {os.getenv('BRIGHTDATA_MCP_KEY')}",
@@ -49,15 +59,24 @@ def scrape_with_brightdata(url: str) -> str:
     }
     
     try:
-        print(f"[{datetime.now()}] BrightData: Sending request to BrightData API for URL: {url}")
-        response = requests.post("https://api.brightdata.com/request", json=payload, headers=headers)
+        logger.debug("BrightData request", extra={"url": url})
+        response = requests.post("https://api.brightdata.com/request", json=payload, headers=headers,
+                                 timeout=timeout)
         response.raise_for_status()
-        print(f"[{datetime.now()}] BrightData: BrightData content accessed successfully for URL: {url}")
+        logger.debug("BrightData content accessed", extra={"url": url})
         return response.text
     except requests.exceptions.RequestException as e:
-        print(f"[{datetime.now()}] BrightData: Error scraping with BrightData for URL {url}: {str(e)}")
+        logger.warning("BrightData error: %s", e, extra={"url": url})
         raise HTTPException(status_code=500, detail=f"BrightData error: {str(e)}")
 
+def fetch_direct(url: str, timeout: float = 15.0) -> str:
+    """Fetch a URL directly, without the BrightData proxy"""
+    response = requests.get(url, headers={
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    }, timeout=timeout)
+    response.raise_for_status()
+    return response.text
+
 def clean_html_to_text(html_content: str) -> str:
     """Clean HTML content to plain text"""
     soup = BeautifulSoup(html_content, "html.parser")
@@ -95,7 +114,7 @@ def extract_headlines(cleaned_text: str) -> str:
     return "\n".join(headlines)
 
 def summarize_with_ollama(headlines) -> str:
-    """Summarize content using Ollama"""
+    """Summarize content using the local Ollama provider, regardless of LLM_PROVIDER"""
     prompt = f"""You are my personal news editor. Summarize these headlines into a TV news script for me, focus on important headlines and remember that this text will be converted to audio:
 
 So no extra stuff other than text which the podcaster/newscaster should read, no special symbols or extra information in between and of course no preamble please.
@@ -105,69 +124,75 @@ So no extra stuff other than text which the podcaster/newscaster should read, no
 News Script:"""
     
     try:
-        print(f"[{datetime.now()}] Ollama: Summarizing with Ollama...")
-        client = ollama.Client(host=os.getenv("OLLAMA_HOST", "http://localhost:11434"))
+        logger.debug("Summarizing with Ollama")
+        # Shared pooled client; the model stays loaded between calls
+        text = get_ollama().generate(prompt, temperature=0.4, max_tokens=800)
+        record_llm_call("topic_summary", "ollama", prompt, text)
         
-        # Generate response using the Ollama client
-        response = client.generate(
-            model="llama3.2",
-            prompt=prompt,
-            options={
-                "temperature": 0.4,
-                "max_tokens": 800
-            },
-            stream=False
-        )
-        
-        print(f"[{datetime.now()}] Ollama: Summary generated.")
-        return response['response']
+        logger.debug("Ollama summary generated")
+        return text
     
     except Exception as e:
-        print(f"[{datetime.now()}] Ollama: Error summarizing with Ollama: {str(e)}")
+        logger.error("Ollama error: %s", e)
         raise HTTPException(status_code=500, detail=f"Ollama error: {str(e)}")
 
-# Update the generate_broadcast_news function to include Twitter data
-
-def generate_broadcast_news(api_key, news_data, reddit_data, twitter_data, topics):
-    """Generate broadcast news using Google Gemini 2.5 Flash including Twitter"""
-    system_prompt = """
+def generate_broadcast_news(api_key, news_data, topics, language="en-US", on_chunk=None, short=False,
+                            social=None):
+    """Generate broadcast news with the configured LLM provider from news and social sources.
+
+    ``social`` lists one dict per social source: ``name``, ``title``,
+    ``heading`` and ``cue`` as declared by its ``sources.Source``, and
+    ``data``, its result dict with ``<name>_analysis`` (and optionally
+    ``<name>_signals``) per topic.
+    When ``language`` is not English the script is written directly in that
+    language, so no separate translation pass is needed. When ``on_chunk`` is
+    given the response is streamed and every text chunk is passed to it.
+    ``short`` asks for a compact script (used when the request is running
+    out of time budget), which is also faster to synthesize.
+    """
+    social = [s for s in (social or []) if s.get("data")]
+    cues = "".join(
+        f'{n}. If {s["title"]} exists: "{s["cue"] or "On " + s["title"] + "..."}" + summary\n'
+        for n, s in enumerate(social, 2)
+    )
+    titles = "/".join(s["title"] for s in social) or "social media"
+    system_prompt = f"""
 You are broadcast_news_writer, a professional virtual news reporter. Generate natural, TTS-ready news reports using available sources:
 
 For each topic, STRUCTURE BASED ON AVAILABLE DATA:
 1. If news exists: "According to official reports..." + summary
-2. If Reddit exists: "Online discussions on Reddit reveal..." + summary  
-3. If Twitter exists: "On Twitter, trending conversations show..." + summary
-4. If multiple sources exist: Present news first, then social media reactions
-5. If neither exists: Skip the topic (shouldn't happen)
+{cues}{len(social) + 2}. If multiple sources exist: Present news first, then social media reactions
+{len(social) + 3}. If neither exists: Skip the topic (shouldn't happen)
 
 Formatting rules:
 - ALWAYS start directly with the content, NO INTRODUCTIONS
 - Keep audio length 60-120 seconds per topic
 - Use natural speech transitions like "Meanwhile, on social media..."
-- Incorporate 1-2 short quotes from Reddit/Twitter when available
+- Incorporate 1-2 short quotes from {titles} when available
 - Maintain neutral tone but highlight key sentiments
+- MEASURED SIGNALS lines are computed from the posts: describe them in words (e.g. "mostly positive", "thousands of likes") and never invent other figures
 - End with "To wrap up this segment..." summary
 
 Write in full paragraphs optimized for speech synthesis. Avoid markdown.
 """
     
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        
         topic_blocks = []
         for topic in topics:
             news_content = news_data["news_analysis"].get(topic) if news_data else ''
-            reddit_content = reddit_data["reddit_analysis"].get(topic) if reddit_data else ''
-            twitter_content = twitter_data["twitter_analysis"].get(topic) if twitter_data else ''
+            # Fused mode hands over the selected headlines instead of per-topic scripts
+            news_label = "OFFICIAL NEWS HEADLINES" if news_data and news_data.get("content") == "headlines" \
+                else "OFFICIAL NEWS CONTENT"
             
             context = []
             if news_content:
-                context.append(f"OFFICIAL NEWS CONTENT:\n{news_content}")
-            if reddit_content:
-                context.append(f"REDDIT DISCUSSION CONTENT:\n{reddit_content}")
-            if twitter_content:
-                context.append(f"TWITTER DISCUSSION CONTENT:\n{twitter_content}")
+                context.append(f"{news_label}:\n{news_content}")
+            for source in social:
+                content = source["data"].get(f"{source['name']}_analysis", {}).get(topic)
+                if content:
+                    # Locally scored sentiment/engagement, when the source got structured posts
+                    signals = format_signals(source["data"].get(f"{source['name']}_signals", {}).get(topic))
+                    context.append(f"{source['heading']}:\n{content}\n{signals}".rstrip())
             
             if context:
                 topic_blocks.append(
@@ -180,29 +205,33 @@ Write in full paragraphs optimized for speech synthesis. Avoid markdown.
             "\n\n--- NEW TOPIC ---\n\n".join(topic_blocks)
         )
         
-        full_prompt = f"{system_prompt}\n\n{user_prompt}"
+        if not language.startswith("en"):
+            user_prompt += (
+                f"\n\nWrite the entire script in the language of locale {language}. "
+                "Keep the formal broadcast tone and paragraph structure."
+            )
         
-        print(f"[{datetime.now()}] Gemini (Broadcast News): Invoking Gemini for broadcast news generation...")
-        response = model.generate_content(
-            full_prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.3,
-                max_output_tokens=4000,
+        if short:
+            user_prompt += (
+                "\n\nKeep it short: two or three sentences per topic and no wrap-up segment. "
+                "This overrides the audio length rule above."
             )
-        )
         
-        print(f"[{datetime.now()}] Gemini (Broadcast News): Broadcast news generated.")
-        return response.text
+        full_prompt = f"{system_prompt}\n\n{user_prompt}"
+        
+        llm = get_llm(api_key)
+        logger.debug("Invoking LLM for broadcast news", extra={"topics": topics, "provider": llm.name, "short": short})
+        text = llm.generate(full_prompt, temperature=0.3, max_tokens=1200 if short else 4000, on_chunk=on_chunk)
+        record_llm_call("broadcast", llm.name, full_prompt, text, language=language)
+        
+        logger.debug("Broadcast news generated", extra={"chars": len(text)})
+        return text
         
     except Exception as e:
-        print(f"[{datetime.now()}] Gemini (Broadcast News): Error generating broadcast news: {str(e)}")
+        logger.error("Broadcast news error: %s", e)
         raise e
 
-def summarize_with_gemini_news_script(api_key: str, headlines: str) -> str:
-    """
-    Summarize multiple news headlines into a TTS-friendly broadcast news script using Google Gemini 2.5 Flash.
-    """
-    system_prompt = """
+NEWS_SCRIPT_PROMPT = """
 You are my personal news editor and scriptwriter for a news podcast. Your job is to turn raw headlines into a clean, professional, and TTS-friendly news script.
 
 The final output will be read aloud by a news anchor or text-to-speech engine. So:
@@ -215,52 +244,111 @@ The final output will be read aloud by a news anchor or text-to-speech engine. S
 
 Remember: Your only output should be a clean script that is ready to be read out loud.
 """
-    
+
+# Structured output of summarize_topics_structured: one script per topic
+TOPIC_SCRIPTS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "segments": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"topic": {"type": "string"}, "script": {"type": "string"}},
+                "required": ["topic", "script"],
+            },
+        },
+    },
+    "required": ["segments"],
+}
+
+def summarize_with_gemini_news_script(api_key: str, headlines: str) -> str:
+    """
+    Summarize multiple news headlines into a TTS-friendly broadcast news script
+    using the configured LLM provider (Gemini by default).
+    """
+    llm = get_llm(api_key)
     try:
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        full_prompt = f"{NEWS_SCRIPT_PROMPT}\n\n{headlines}"
         
-        full_prompt = f"{system_prompt}\n\n{headlines}"
-        
-        print(f"[{datetime.now()}] Gemini (News Script): Invoking Gemini for news script summarization...")
-        response = model.generate_content(
-            full_prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.4,
-                max_output_tokens=1000,
-            )
-        )
+        logger.debug("Invoking LLM for news script summarization", extra={"provider": llm.name})
+        text = llm.generate(full_prompt, temperature=0.4, max_tokens=1000)
+        record_llm_call("topic_summary", llm.name, full_prompt, text)
         
-        print(f"[{datetime.now()}] Gemini (News Script): News script summarized.")
-        return response.text
+        logger.debug("News script summarized")
+        return text
         
     except Exception as e:
-        print(f"[{datetime.now()}] Gemini (News Script): Error summarizing news script: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Gemini error: {str(e)}")
+        logger.error("News script error: %s", e, extra={"provider": llm.name})
+        raise HTTPException(status_code=500, detail=f"{llm.name.title()} error: {str(e)}")
+
+def summarize_topics_structured(api_key: str, headlines_by_topic: dict) -> dict:
+    """
+    Summarize the headlines of several topics in one LLM call with a JSON
+    schema response, instead of one summarize_with_gemini_news_script call
+    per topic.
+    Args:
+        api_key: Gemini API key
+        headlines_by_topic: Topic -> newline-separated headlines
+    Returns:
+        dict: Topic -> news script (topics missing from the response are left out)
+    """
+    llm = get_llm(api_key)
+    blocks = "\n\n".join(f"TOPIC: {topic}\nHEADLINES:\n{headlines}"
+                          for topic, headlines in headlines_by_topic.items())
+    full_prompt = (
+        f"{NEWS_SCRIPT_PROMPT}\n"
+        "Write one separate script per topic below. Return JSON with a \"segments\" list holding "
+        "one {\"topic\", \"script\"} object per topic, using each topic name exactly as given.\n\n"
+        f"{blocks}"
+    )
+    try:
+        logger.debug("Invoking LLM for structured multi-topic summary",
+                     extra={"provider": llm.name, "topics": list(headlines_by_topic)})
+        response = llm.generate_json(full_prompt, TOPIC_SCRIPTS_SCHEMA, temperature=0.4,
+                                     max_tokens=1000 * len(headlines_by_topic))
+        record_llm_call("topic_summary_batched", llm.name, full_prompt, response)
+    except Exception as e:
+        logger.error("Structured news script error: %s", e, extra={"provider": llm.name})
+        raise HTTPException(status_code=500, detail=f"{llm.name.title()} error: {str(e)}")
+
+    scripts = {}
+    wanted = {topic.casefold(): topic for topic in headlines_by_topic}
+    for segment in response.get("segments", []):
+        topic = wanted.get(str(segment.get("topic", "")).strip().casefold())
+        if topic and segment.get("script"):
+            scripts[topic] = segment["script"]
+    return scripts
+
+# Murf master format: one mono narrator; output profiles are transcoded from it
+MURF_SAMPLE_RATE = float(os.getenv("MURF_SAMPLE_RATE", "44100"))
+MURF_CHANNEL_TYPE = os.getenv("MURF_CHANNEL_TYPE", "MONO")
 
 def text_to_audio_murf(
     text: str,
     voice_id: str,
     language: str = "en-US",
     format_type: str = "MP3",
-    sample_rate: float = 44100.0,
+    sample_rate: float = MURF_SAMPLE_RATE,
     output_dir: str = "audio",
     api_key: str = None,
-    channel_type: str = "STEREO",
+    channel_type: str = MURF_CHANNEL_TYPE,
     pitch: int = 0,
     rate: float = 1.0,
     style: str = None,
 ) -> str:
     """
-    Convert text to speech with Murf API Gen-2, save to file, and
-    return the local file path.
+    Convert text to speech with Murf API Gen-2, save it to the audio store,
+    and return the local file path. The file is the master that
+    audio_profiles transcodes to each output profile.
     """
     from murf import Murf
     api_key = api_key or os.getenv("MURF_API_KEY")
     if not api_key:
         raise ValueError("MURF_API_KEY missing")
 
-    client = Murf(api_key=api_key)
+    # Synthesis is essential to the brief, so it keeps a minimum budget past the deadline
+    timeout = deadline.budget(60, floor=deadline.ESSENTIAL_MIN_SECONDS)
+    client = Murf(api_key=api_key, timeout=timeout)
 
     gen = {
         "text": text,
@@ -276,40 +364,38 @@ def text_to_audio_murf(
 
     resp = client.text_to_speech.generate(**gen)
 
-    Path(output_dir).mkdir(exist_ok=True)
-    fp = Path(output_dir) / f"tts_{datetime.now():%Y%m%d_%H%M%S}.mp3"
-
     url = getattr(resp, "audio_file", None) or getattr(resp, "url", None)
     if not url:
         raise RuntimeError("Murf response missing audio URL")
 
-    audio = requests.get(url)
-    audio.raise_for_status()
-    fp.write_bytes(audio.content)
-    return str(fp)
+    # Stream the download straight to disk instead of holding it in memory
+    with requests.get(url, stream=True, timeout=(10, timeout)) as audio:
+        audio.raise_for_status()
+        return get_audio_store(output_dir).save_stream(
+            audio.iter_content(chunk_size=64 * 1024),
+            ext=format_type.lower(),
+            metadata={"engine": "murf", "voice_id": voice_id, "language": language},
+        )
 
 def tts_to_audio(text: str, language: str = 'en') -> str:
     """
     Convert text to speech using gTTS (Google Text-to-Speech) and save to file.
     """
     try:
-        print(f"[{datetime.now()}] gTTS: Converting text to speech with gTTS...")
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Create audio directory if it doesn't exist
-        audio_dir = Path("audio")
-        audio_dir.mkdir(exist_ok=True)
-        
-        filename = audio_dir / f"tts_{timestamp}.mp3"
+        logger.debug("Converting text to speech with gTTS")
+        tmp_path = audio_store.temp_path(".mp3")
         
         tts = gTTS(text=text, lang=language, slow=False)
-        tts.save(str(filename))
+        tts.save(tmp_path)
+        filename = audio_store.ingest_file(
+            tmp_path, metadata={"engine": "gtts", "language": language}
+        )
         
-        print(f"[{datetime.now()}] gTTS: Audio file saved successfully to {filename}.")
+        logger.info("gTTS audio saved", extra={"audio_path": filename})
         return str(filename)
         
     except Exception as e:
-        print(f"[{datetime.now()}] gTTS: Error converting text to audio with gTTS: {str(e)}")
+        logger.error("gTTS error: %s", e)
         return None
 #  ─────────────────────────────────────────────────────────────
 #  Language helpers
@@ -333,20 +419,19 @@ def get_voice_for_language(lang_code: str) -> str:
     return VOICE_BY_LANG.get(lang_code, "en-US-natalie")
 
 def translate_for_language(api_key: str, text: str, target_lang: str) -> str:
-    """Translate English text to the requested language using Gemini."""
+    """Translate English text to the requested language with the configured LLM provider."""
     if target_lang.startswith("en"):      # no translation needed
         return text
 
-    import google.generativeai as genai
-    genai.configure(api_key=api_key)
-    model = genai.GenerativeModel("gemini-2.0-flash-exp")
-
     prompt = (
         f"Translate the following broadcast news script to {target_lang}. "
         "Maintain paragraph structure, formal broadcast tone, no extra commentary.\n\n"
         f"{text}"
     )
-    return model.generate_content(prompt).text.strip()
+    llm = get_llm(api_key)
+    translated = llm.generate(prompt, temperature=0.2, max_tokens=4000).strip()
+    record_llm_call("translation", llm.name, prompt, translated, language=target_lang)
+    return translated
 
 # Create audio directory
 AUDIO_DIR = Path("audio")